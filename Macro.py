@@ -1,4 +1,5 @@
 from ctypes import windll
+from concurrent.futures import Future
 from pathlib import Path
 from typing import TypedDict, Unpack
 
@@ -8,7 +9,10 @@ import time
 import dxcam
 import win32gui
 import pydirectinput as pdi
-from onnxocr.onnx_paddleocr import ONNXPaddleOcr, sav2Img
+from onnxocr import trace
+from onnxocr.timing import format_summary
+from onnxocr.worker import OCRWorker
+from onnxocr.zygote import get_engine
 
 
 # windll.user32.SetProcessDPIAware()
@@ -28,14 +32,25 @@ def get_window_client_rect(hwnd):
 
 
 class Macro:
-    def __init__(self, title: str):
+    def __init__(
+        self, title: str, rec_charsets: dict[str, str] = None, benchmark: bool = False
+    ):
         self.title: str = title
         # 将指定窗口放置最前
         self.window: gw.Win32Window = gw.getWindowsWithTitle(title)[0]
         self.switchToWindow()
         self._cam = dxcam.create(output_color="BGR")
-        self._ocr_handler = ONNXPaddleOcr(use_angle_cls=False, use_gpu=False)
+        # rec_charsets: {"digits": "rec_digits.onnx"}, 供 ocr(roi, charset="digits") 使用
+        # 通过 python -m onnxocr.zygote run 启动时直接使用常驻进程中已加载的模型
+        # benchmark: 记录每次 ocr 的分阶段耗时, 通过 ocr_timing() 查看
+        self._ocr_handler = get_engine(
+            use_angle_cls=False, use_gpu=False, rec_charsets=rec_charsets,
+            benchmark=benchmark,
+        )
         self._template_cache = {}
+        # ocr_async 使用的进程外 OCR worker, 首次调用时启动
+        self._rec_charsets = rec_charsets
+        self._ocr_worker: OCRWorker = None
 
     def switchToWindow(self):
         if self.window.isActive:
@@ -47,12 +62,15 @@ class Macro:
         # 切换窗口有动画, 需要等待
         time.sleep(0.5)
 
+    @trace.traced("grab", "capture")
     def grab(
         self,
         roi: tuple[int, int, int, int] = (0, 0, 0, 0),
         save_path: Path | str = None,
     ):
         # self.switchToWindow()
+        # 每次截图为新的一帧, 之后的识别和操作 span 都带有该帧序号
+        trace.new_frame()
         rect = get_window_client_rect(self.window._hWnd)
         # 指定ROI区域 x,y,w,h
         if roi != (0, 0, 0, 0):
@@ -74,6 +92,7 @@ class Macro:
             cv2.imwrite(str(save_path), img)
         return img
 
+    @trace.traced("find_image")
     def find_image(
         self, template_path: Path | str, threshold=0.8
     ) -> tuple[bool, tuple[int, int], float]:
@@ -115,7 +134,17 @@ class Macro:
             return True, (center_x, center_y), max_val
         return False, None, max_val
 
-    def ocr(self, image: Path | str | tuple[int, int, int, int]):
+    @trace.traced("ocr")
+    def ocr(
+        self,
+        image: Path | str | tuple[int, int, int, int],
+        charset: str = None,
+        text_height: float = None,
+    ):
+        """
+        :param charset: 使用 rec_charsets 中加载的裁剪词表模型, 如 "digits"
+        :param text_height: 区域内文字的大致高度(像素), 用于选择检测缩放比例
+        """
         if type(image) is tuple:
             img = self.grab(roi=image)
         else:
@@ -123,23 +152,127 @@ class Macro:
 
         # 只ocr一行, 最终结果一定为单个
         # [[xxxx], ('检测文本', 0.9989050626754761)]
-        box = self._ocr_handler.ocr(img)[0][0]
-        ocr_text = box[1][0]
+        result = self._ocr_handler.ocr(img, charset=charset, text_height=text_height)[0]
+        # 未检测到文字
+        if not result:
+            return ""
+        ocr_text = result[0][1][0]
         return ocr_text
 
+    def ocr_timing(self) -> str:
+        """
+        最近 ocr 调用各阶段耗时的百分位表 (毫秒), 需要以 benchmark=True 创建
+        """
+        return format_summary(self._ocr_handler.timing_summary())
+
+    def ocr_async(
+        self, image: Path | str | tuple[int, int, int, int], charset: str = None
+    ) -> Future:
+        """
+        在独立进程中 ocr, 立即返回, 不等待推理
+
+        :param image: 区域 x,y,w,h 或图片路径
+        :return: Future, result() 为识别到的第一行文字, 未检测到文字时为空字符串
+        """
+        if type(image) is tuple:
+            img = self.grab(roi=image)
+        else:
+            img = cv2.imread(Path(image))
+        if self._ocr_worker is None:
+            self._ocr_worker = OCRWorker(
+                engine_kwargs=dict(
+                    use_angle_cls=False, use_gpu=False, rec_charsets=self._rec_charsets
+                )
+            )
+
+        text_future = Future()
+
+        def on_done(future):
+            try:
+                result = future.result()[0]
+                text_future.set_result(result[0][1][0] if result else "")
+            except Exception as e:
+                text_future.set_exception(e)
+
+        self._ocr_worker.submit(img, charset=charset).add_done_callback(on_done)
+        return text_future
+
+    def ocr_many(
+        self, rois: list[tuple[int, int, int, int]], charset: str = None
+    ) -> list[str]:
+        """
+        一次截图, 多个区域拼成一张图只做一次检测, 识别也合并成批
+
+        :param rois: 区域列表 x,y,w,h
+        :return: 每个区域识别到的第一行文字, 未检测到文字时为空字符串
+        """
+        img = self.grab()
+        crops = [img[y : y + h, x : x + w] for x, y, w, h in rois]
+        results = self._ocr_handler.ocr_many(crops, charset=charset)
+        return [result[0][1][0] if result else "" for result in results]
+
+    def has_text(
+        self, roi: tuple[int, int, int, int] = (0, 0, 0, 0), std_thresh: float = 4.0
+    ) -> tuple[bool, float]:
+        """
+        只做低分辨率检测, 判断区域内是否有文字, 纯色区域不经过模型直接返回
+
+        :param roi: 检测区域 x,y,w,h
+        :param std_thresh: 灰度标准差低于该值时视为纯色区域
+        :return: 返回值形如(是否有文字, 最大文字概率)
+        """
+        img = self.grab(roi=roi)
+        return self._ocr_handler.has_text(img, std_thresh=std_thresh)
+
+    def find_text(
+        self,
+        pattern: str,
+        roi: tuple[int, int, int, int] = (0, 0, 0, 0),
+        mode: str = "exact",
+        hint: tuple[int, int] = None,
+        charset: str = None,
+    ) -> tuple[bool, tuple[int, int], float]:
+        """
+        查找文字, 找到第一个匹配的文本框后即停止识别
+
+        :param pattern: 要查找的文字
+        :param roi: 查找区域 x,y,w,h
+        :param mode: 匹配方式 exact / regex / fuzzy
+        :param hint: 文字大概位置(应用界面坐标), 距离近的文本框优先识别
+        :return: 返回值形如(是否匹配成功, 文本框中心在屏幕的坐标, 识别置信度)
+        """
+        img = self.grab(roi=roi)
+        if hint is not None:
+            hint = (hint[0] - roi[0], hint[1] - roi[1])
+        found = self._ocr_handler.find_text(
+            img, pattern, mode=mode, hint=hint, charset=charset
+        )
+        if found is None:
+            return False, None, 0.0
+
+        box, (_, score) = found
+        center_x = int(sum(p[0] for p in box) / 4) + self.window.left + roi[0]
+        center_y = int(sum(p[1] for p in box) / 4) + self.window.top + roi[1]
+        return True, (center_x, center_y), score
+
+    @trace.traced("click", "action")
     def click(self, x, y, clicks, interval, button="left", duration=None):
         pdi.click(x, y, clicks, interval, button, duration)
 
+    @trace.traced("drag", "action")
     def drag(self, x1, y1, x2, y2):
         pdi.mouseDown(x1, y1)
         pdi.mouseUp(x2, y2)
 
+    @trace.traced("keyDown", "action")
     def keyDown(self, key):
         pdi.keyDown(key)
 
+    @trace.traced("keyUp", "action")
     def keyUp(self, key):
         pdi.keyUp(key)
 
+    @trace.traced("keyPress", "action")
     def keyPress(self, keys: str, druation=0.01, interval=0.01):
         keys = list(keys)
         for key in keys:
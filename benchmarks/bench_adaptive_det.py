@@ -0,0 +1,88 @@
+"""
+自适应检测分辨率对比: det_limit_type max (固定 960) vs adaptive (按文字高度缩放)
+
+    python benchmarks/bench_adaptive_det.py --det det.onnx --num 60
+
+The workload mixes small ROIs with large fonts and full-screen captures with
+small text. For each mode the script reports the mean detection time, the mean
+number of input pixels fed to the model and the number of boxes found; the
+adaptive mode additionally runs with the true font height passed as hint.
+Adaptive shrinks the large-font ROIs and enlarges the small-text captures that
+the fixed limit shrinks below a readable size, so its speedup depends on the mix.
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+import common  # noqa: F401  把仓库根目录加入 sys.path
+from onnxocr.predict_det import TextDetector
+from onnxocr.utils import infer_args
+
+
+def make_roi(rng):
+    if rng.random() < 0.5:
+        # 小区域大字体
+        h, w, font_scale = int(rng.integers(60, 200)), int(rng.integers(200, 600)), 1.5
+    else:
+        # 全屏小字体
+        h, w, font_scale = 1080, 1920, 0.45
+    img = np.full((h, w, 3), 235, dtype=np.uint8)
+    line_h = cv2.getTextSize("A", cv2.FONT_HERSHEY_SIMPLEX, font_scale, 1)[0][1]
+    for y in range(line_h + 10, h - 5, line_h * 2 + 6):
+        x = int(rng.integers(5, max(6, w // 4)))
+        text = "".join(rng.choice(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 "), 24))
+        cv2.putText(img, text, (x, y), cv2.FONT_HERSHEY_SIMPLEX, font_scale, (20, 20, 20), 1)
+    return img, line_h
+
+
+def run(detector, rois, use_hint):
+    detector(rois[0][0])
+    elapsed = 0.0
+    pixels = 0
+    boxes = 0
+    for img, line_h in rois:
+        text_height = line_h if use_hint else None
+        start = time.perf_counter()
+        dt_boxes = detector(img, text_height)
+        elapsed += time.perf_counter() - start
+        boxes += len(dt_boxes)
+        det_img, shape_list = detector.preprocess(img, text_height)
+        pixels += img.shape[0] * shape_list[0][2] * img.shape[1] * shape_list[0][3]
+    return elapsed / len(rois) * 1000, pixels / len(rois) / 1e6, boxes
+
+
+def main():
+    defaults = infer_args().parse_args([])
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--det", type=str, default=defaults.det_model_dir)
+    parser.add_argument("--num", type=int, default=60)
+    parser.add_argument("--min_text_height", type=float, default=defaults.det_min_text_height)
+    opts = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    rois = [make_roi(rng) for _ in range(opts.num)]
+
+    results = []
+    for label, limit_type, use_hint in [
+        ("max 960", "max", False),
+        ("adaptive", "adaptive", False),
+        ("adaptive+hint", "adaptive", True),
+    ]:
+        det_args = infer_args().parse_args([])
+        det_args.use_gpu = False
+        det_args.det_model_dir = opts.det
+        det_args.det_limit_type = limit_type
+        det_args.det_min_text_height = opts.min_text_height
+        results.append((label,) + run(TextDetector(det_args), rois, use_hint))
+
+    base_ms = results[0][1]
+    print("{:<15}{:>12}{:>14}{:>8}{:>10}".format("mode", "time(ms)", "pixels(M)", "boxes", "speedup"))
+    for label, mean_ms, mpixels, boxes in results:
+        print("{:<15}{:>12.2f}{:>14.3f}{:>8}{:>9.2f}x".format(
+            label, mean_ms, mpixels, boxes, base_ms / mean_ms))
+
+
+if __name__ == "__main__":
+    main()
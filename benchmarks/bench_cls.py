@@ -0,0 +1,51 @@
+"""
+方向分类开销: use_angle_cls 关闭 / 每次分类 / 宽高比门限 / 方向先验
+
+    python benchmarks/bench_cls.py --det det.onnx --rec rec.onnx --cls cls.onnx --num 40
+
+Reports the mean end-to-end OCR time per frame of each configuration and the
+overhead relative to use_angle_cls=False.
+"""
+import argparse
+import time
+
+from common import make_screen
+from onnxocr.onnx_paddleocr import ONNXPaddleOcr
+from onnxocr.utils import infer_args
+
+
+def main():
+    defaults = infer_args().parse_args([])
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--det", type=str, default=defaults.det_model_dir)
+    parser.add_argument("--rec", type=str, default=defaults.rec_model_dir)
+    parser.add_argument("--cls", type=str, default=defaults.cls_model_dir)
+    parser.add_argument("--height", type=int, default=540)
+    parser.add_argument("--width", type=int, default=960)
+    parser.add_argument("--num", type=int, default=40)
+    opts = parser.parse_args()
+
+    frames = [make_screen(opts.height, opts.width, seed=i) for i in range(opts.num)]
+    configs = [
+        ("no cls", dict(use_angle_cls=False)),
+        ("cls", dict(use_angle_cls=True)),
+        ("cls aspect>=2", dict(use_angle_cls=True, cls_min_aspect=2.0)),
+        ("cls prior", dict(use_angle_cls=True, cls_prior_frames=5, cls_recheck_interval=30)),
+    ]
+    base_time = None
+    for label, kwargs in configs:
+        engine = ONNXPaddleOcr(
+            use_gpu=False, det_model_dir=opts.det, rec_model_dir=opts.rec,
+            cls_model_dir=opts.cls, **kwargs
+        )
+        engine.ocr(frames[0])
+        start = time.perf_counter()
+        for frame in frames:
+            engine.ocr(frame)
+        mean_ms = (time.perf_counter() - start) * 1000 / len(frames)
+        base_time = base_time or mean_ms
+        print("{:<15}{:>10.2f} ms/frame {:>+8.1%}".format(label, mean_ms, mean_ms / base_time - 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+检测输入固定画布 (det_buckets) 对比: 每个 ROI 尺寸一个新形状 vs 少量固定画布
+
+    python benchmarks/bench_det_buckets.py --det det.onnx --buckets 320x320,640x640,960x960,960x1728
+
+Runs TextDetector over a stream of random ROI sizes with and without buckets
+and reports latency percentiles, the worst call after warm-up and the RSS
+growth after warm-up (should stay flat with buckets).
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common import get_rss_mb, make_screen
+from onnxocr.predict_det import TextDetector
+from onnxocr.utils import infer_args
+
+
+def run(det_args, sizes, screen, warmup):
+    detector = TextDetector(det_args)
+    latencies = []
+    rss = []
+    for index, (h, w) in enumerate(sizes):
+        roi = screen[:h, :w]
+        start = time.perf_counter()
+        detector(roi)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if index == warmup - 1 or index == len(sizes) - 1:
+            rss.append(get_rss_mb())
+    steady = sorted(latencies[warmup:])
+    return {
+        "p50_ms": steady[len(steady) // 2],
+        "p99_ms": steady[min(len(steady) - 1, int(len(steady) * 0.99))],
+        "max_ms": steady[-1],
+        "rss_growth_mb": rss[-1] - rss[0],
+        "shapes": len(detector.bucket_bindings) or len(set(sizes)),
+    }
+
+
+def main():
+    defaults = infer_args().parse_args([])
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--det", type=str, default=defaults.det_model_dir)
+    parser.add_argument("--buckets", type=str, default="320x320,640x640,960x960,960x1728")
+    parser.add_argument("--num", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=50)
+    opts = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    sizes = [(int(rng.integers(40, 1080)), int(rng.integers(60, 1920))) for _ in range(opts.num)]
+    screen = make_screen(1080, 1920)
+
+    for label, buckets in [("dynamic", None), ("buckets", opts.buckets)]:
+        det_args = infer_args().parse_args([])
+        det_args.use_gpu = False
+        det_args.det_model_dir = opts.det
+        det_args.det_buckets = buckets
+        det_args.warmup = True
+        result = run(det_args, sizes, screen, opts.warmup)
+        print(
+            "{:<8} shapes={:<4} p50={:.2f}ms p99={:.2f}ms max={:.2f}ms rss_growth={:+.1f}MiB".format(
+                label,
+                result["shapes"],
+                result["p50_ms"],
+                result["p99_ms"],
+                result["max_ms"],
+                result["rss_growth_mb"],
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
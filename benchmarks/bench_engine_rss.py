@@ -0,0 +1,64 @@
+"""
+多个引擎的常驻内存: 共用会话 (--share_sessions true) vs 每个引擎各自加载
+
+    python benchmarks/bench_engine_rss.py --det det.onnx --rec rec.onnx --engines 1,4,8
+
+Every measurement runs in a fresh process: N ONNXPaddleOcr instances are
+created (e.g. one per game window) and each runs one ocr() so that ORT
+allocates its arena and prepacked weights, then the RSS is read.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+from common import get_rss_mb, make_screen
+from onnxocr.utils import infer_args
+
+
+def measure(opts, num_engines, share):
+    from onnxocr.onnx_paddleocr import ONNXPaddleOcr
+
+    base_rss = get_rss_mb()
+    img = make_screen(320, 640)
+    engines = []
+    for _ in range(num_engines):
+        engine = ONNXPaddleOcr(
+            use_gpu=False, det_model_dir=opts.det, rec_model_dir=opts.rec,
+            cls_model_dir=opts.cls, use_angle_cls=bool(opts.cls), share_sessions=share,
+        )
+        engine.ocr(img)
+        engines.append(engine)
+    return get_rss_mb() - base_rss
+
+
+def main():
+    defaults = infer_args().parse_args([])
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--det", type=str, default=defaults.det_model_dir)
+    parser.add_argument("--rec", type=str, default=defaults.rec_model_dir)
+    parser.add_argument("--cls", type=str, default="", help="also load the cls model")
+    parser.add_argument("--engines", type=str, default="1,4,8")
+    parser.add_argument("--child", type=str, default=None, help=argparse.SUPPRESS)
+    opts = parser.parse_args()
+
+    if opts.child:
+        num_engines, share = opts.child.split(":")
+        print(json.dumps(measure(opts, int(num_engines), share == "1")))
+        return
+
+    print("{:>8} {:>16} {:>16}".format("engines", "separate MiB", "shared MiB"))
+    for num_engines in [int(n) for n in opts.engines.split(",")]:
+        rss = []
+        for share in ("0", "1"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--det", opts.det, "--rec", opts.rec, "--cls", opts.cls,
+                 "--child", "{}:{}".format(num_engines, share)],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            rss.append(json.loads(out.strip().splitlines()[-1]))
+        print("{:>8} {:>16.1f} {:>16.1f}".format(num_engines, *rss))
+
+
+if __name__ == "__main__":
+    main()
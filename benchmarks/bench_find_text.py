@@ -0,0 +1,68 @@
+"""
+find_text 与整页 OCR 后再查找的耗时对比
+
+    python benchmarks/bench_find_text.py --det det.onnx --rec rec.onnx --num 20
+
+Targets are lines picked from a full OCR of the synthetic screen, so both
+paths search for text the model can actually produce. Reports the mean time of
+each path and the mean number of boxes find_text had to recognize.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common import make_screen
+from onnxocr.onnx_paddleocr import ONNXPaddleOcr
+from onnxocr.utils import infer_args
+
+
+def main():
+    defaults = infer_args().parse_args([])
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--det", type=str, default=defaults.det_model_dir)
+    parser.add_argument("--rec", type=str, default=defaults.rec_model_dir)
+    parser.add_argument("--height", type=int, default=540)
+    parser.add_argument("--width", type=int, default=960)
+    parser.add_argument("--num", type=int, default=20)
+    parser.add_argument("--batch_size", type=int, default=4)
+    parser.add_argument("--drop_score", type=float, default=defaults.drop_score)
+    opts = parser.parse_args()
+
+    engine = ONNXPaddleOcr(
+        use_gpu=False, det_model_dir=opts.det, rec_model_dir=opts.rec, drop_score=opts.drop_score
+    )
+    screen = make_screen(opts.height, opts.width)
+    lines = engine.ocr(screen)[0]
+    assert lines, "nothing recognized on the synthetic screen"
+    rng = np.random.default_rng(0)
+    targets = [lines[int(rng.integers(len(lines)))][1][0] for _ in range(opts.num)]
+
+    start = time.perf_counter()
+    for target in targets:
+        result = engine.ocr(screen)[0]
+        next(line for line in result if "".join(line[1][0].split()) == "".join(target.split()))
+    full_time = (time.perf_counter() - start) / len(targets)
+
+    recognized = [0]
+    run = engine.text_recognizer.run
+
+    def counting_run(input_feed):
+        recognized[0] += next(iter(input_feed.values())).shape[0]
+        return run(input_feed)
+
+    engine.text_recognizer.run = counting_run
+    start = time.perf_counter()
+    found = 0
+    for target in targets:
+        found += engine.find_text(screen, target, batch_size=opts.batch_size) is not None
+    find_time = (time.perf_counter() - start) / len(targets)
+
+    print("boxes on screen: {}  targets: {}  found: {}".format(len(lines), len(targets), found))
+    print("full ocr + search: {:.2f} ms".format(full_time * 1000))
+    print("find_text:         {:.2f} ms ({:.0%} of full), {:.1f} boxes recognized".format(
+        find_time * 1000, find_time / full_time, recognized[0] / len(targets)))
+
+
+if __name__ == "__main__":
+    main()
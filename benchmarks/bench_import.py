@@ -0,0 +1,83 @@
+"""
+导入耗时 (python -X importtime) 与回归检查
+
+    python benchmarks/bench_import.py --module onnxocr.onnx_paddleocr --repeat 5 --max_own_ms 20
+
+Each run imports the module in a fresh interpreter. Reported are the total
+import time, the part spent in onnxocr's own modules (self time, i.e. without
+numpy / cv2 / onnxruntime) and the slowest modules. The exit code is 1 when
+the median exceeds --max_ms / --max_own_ms, or when a module that should be
+loaded lazily (PIL, shapely, the extra rec decoders) is imported.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+from common import ROOT_DIR
+
+LAZY_MODULES = ["PIL", "shapely", "onnxocr.rec_postprocess_extra"]
+
+
+def import_times(module):
+    """{module name: (self us, cumulative us)} of one fresh import"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([ROOT_DIR, env.get("PYTHONPATH", "")])
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        env=env, capture_output=True, text=True, check=True,
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", type=str, default="onnxocr.onnx_paddleocr")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max_ms", type=float, default=0, help="total import time limit, 0 to skip")
+    parser.add_argument("--max_own_ms", type=float, default=20,
+                        help="limit for the self time of onnxocr modules, 0 to skip")
+    opts = parser.parse_args()
+
+    runs = [import_times(opts.module) for _ in range(opts.repeat)]
+    total_ms = median([run[opts.module][1] for run in runs]) / 1000
+    own_ms = median([
+        sum(self_us for name, (self_us, _) in run.items() if name.split(".")[0] == "onnxocr")
+        for run in runs
+    ]) / 1000
+
+    slowest = sorted(runs[-1].items(), key=lambda item: -item[1][0])[: opts.top]
+    print("slowest modules by self time (last run):")
+    for name, (self_us, cumulative_us) in slowest:
+        print("  {:<48} self {:8.1f} ms  cumulative {:8.1f} ms".format(
+            name, self_us / 1000, cumulative_us / 1000))
+    print("import {}: total {:.1f} ms, onnxocr own {:.1f} ms (median of {})".format(
+        opts.module, total_ms, own_ms, opts.repeat))
+
+    failures = []
+    eager = [name for name in LAZY_MODULES if any(name in run for run in runs)]
+    if eager:
+        failures.append("imported eagerly: {}".format(", ".join(eager)))
+    if opts.max_ms and total_ms > opts.max_ms:
+        failures.append("total {:.1f} ms > {:.1f} ms".format(total_ms, opts.max_ms))
+    if opts.max_own_ms and own_ms > opts.max_own_ms:
+        failures.append("onnxocr own {:.1f} ms > {:.1f} ms".format(own_ms, opts.max_own_ms))
+    for failure in failures:
+        print("REGRESSION:", failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
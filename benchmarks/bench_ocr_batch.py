@@ -0,0 +1,57 @@
+"""
+批量 OCR 吞吐对比: 逐张 ocr() vs ocr_batch()
+
+    python benchmarks/bench_ocr_batch.py --det det.onnx --rec rec.onnx --num 64 --chunk 16
+"""
+import argparse
+import time
+
+from common import make_screen
+from onnxocr.onnx_paddleocr import ONNXPaddleOcr
+from onnxocr.utils import infer_args
+
+
+def main():
+    defaults = infer_args().parse_args([])
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--det", type=str, default=defaults.det_model_dir)
+    parser.add_argument("--rec", type=str, default=defaults.rec_model_dir)
+    parser.add_argument("--height", type=int, default=540)
+    parser.add_argument("--width", type=int, default=960)
+    parser.add_argument("--num", type=int, default=64)
+    parser.add_argument("--chunk", type=int, default=16, help="images per ocr_batch call")
+    parser.add_argument("--det_batch", type=int, default=defaults.max_batch_size)
+    parser.add_argument("--rec_batch", type=int, default=defaults.rec_batch_num)
+    opts = parser.parse_args()
+
+    engine = ONNXPaddleOcr(
+        use_gpu=False,
+        det_model_dir=opts.det,
+        rec_model_dir=opts.rec,
+        max_batch_size=opts.det_batch,
+        rec_batch_num=opts.rec_batch,
+    )
+    images = [make_screen(opts.height, opts.width, seed=i) for i in range(opts.num)]
+    engine.ocr(images[0])
+
+    start = time.perf_counter()
+    loop_res = [engine.ocr(img)[0] for img in images]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_res = []
+    for beg in range(0, len(images), opts.chunk):
+        batch_res += engine.ocr_batch(images[beg : beg + opts.chunk])
+    batch_time = time.perf_counter() - start
+
+    boxes = sum(len(res) for res in loop_res)
+    print("images={} boxes={} size={}x{}".format(len(images), boxes, opts.width, opts.height))
+    print("per-image loop: {:.2f} img/s".format(len(images) / loop_time))
+    print("ocr_batch:      {:.2f} img/s ({:.2f}x)".format(
+        len(images) / batch_time, loop_time / batch_time))
+    same = sum(a == b for a, b in zip(loop_res, batch_res))
+    print("identical results: {}/{}".format(same, len(images)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+多区域 OCR 对比: N 次 ocr() vs 一次 ocr_many() (拼图后只检测一次)
+
+    python benchmarks/bench_ocr_many.py --det det.onnx --rec rec.onnx --rois 8 --repeat 20
+
+ROIs of random size and position are cut from one synthetic 1080p screen,
+like the regions a macro reads in one tick.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common import make_screen
+from onnxocr.mosaic import mosaic_layout
+from onnxocr.onnx_paddleocr import ONNXPaddleOcr
+from onnxocr.utils import infer_args
+
+
+def main():
+    defaults = infer_args().parse_args([])
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--det", type=str, default=defaults.det_model_dir)
+    parser.add_argument("--rec", type=str, default=defaults.rec_model_dir)
+    parser.add_argument("--rois", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--gutter", type=int, default=16)
+    opts = parser.parse_args()
+
+    engine = ONNXPaddleOcr(use_gpu=False, det_model_dir=opts.det, rec_model_dir=opts.rec)
+    screen = make_screen(1080, 1920)
+    rng = np.random.default_rng(0)
+    rois = []
+    for _ in range(opts.rois):
+        h, w = int(rng.integers(30, 90)), int(rng.integers(100, 400))
+        y, x = int(rng.integers(0, 1080 - h)), int(rng.integers(0, 1920 - w))
+        rois.append(screen[y : y + h, x : x + w])
+    engine.ocr(rois[0])
+    engine.ocr_many(rois, gutter=opts.gutter)
+
+    start = time.perf_counter()
+    for _ in range(opts.repeat):
+        separate = [engine.ocr(roi)[0] for roi in rois]
+    separate_time = (time.perf_counter() - start) / opts.repeat
+
+    start = time.perf_counter()
+    for _ in range(opts.repeat):
+        many = engine.ocr_many(rois, gutter=opts.gutter)
+    many_time = (time.perf_counter() - start) / opts.repeat
+
+    _, canvas = mosaic_layout(
+        [roi.shape[:2] for roi in rois], defaults.det_limit_side_len, opts.gutter
+    )
+    same = sum(
+        [line[1][0] for line in a] == [line[1][0] for line in b] for a, b in zip(separate, many)
+    )
+    print("rois={} mosaic canvas {}x{}".format(len(rois), canvas[1], canvas[0]))
+    print("{} x ocr(): {:.2f} ms".format(len(rois), separate_time * 1000))
+    print("ocr_many(): {:.2f} ms ({:.2f}x)".format(many_time * 1000, separate_time / many_time))
+    print("rois with identical texts: {}/{}".format(same, len(rois)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+预处理耗时/内存对比: float32 归一化 vs 归一化折叠进模型 (uint8 输入)
+
+    python benchmarks/bench_preprocess.py --det det.onnx --rec rec.onnx --cls cls.onnx
+
+Folded copies of the given models are written to a temporary directory with
+onnxocr.model_tools fold-normalize. For every stage the script reports the
+mean preprocessing time, the tracemalloc peak of one call, the bytes fed to
+ORT, and the max abs difference of the model outputs between both paths.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import onnx
+
+from common import make_crops, make_screen
+from onnxocr.model_tools import fold_normalize
+from onnxocr.predict_cls import TextClassifier
+from onnxocr.predict_det import TextDetector
+from onnxocr.predict_rec import TextRecognizer
+from onnxocr.utils import infer_args
+
+
+def feed_bytes(feed):
+    return sum(value.nbytes for value in feed.values())
+
+
+def measure(func, repeat):
+    func()
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    mean_ms = (time.perf_counter() - start) * 1000 / repeat
+    return result, mean_ms, peak
+
+
+def bench_stage(name, float_pred, folded_pred, session_attr, prepare, repeat):
+    rows = []
+    outputs = []
+    for label, pred in [("float32", float_pred), ("uint8", folded_pred)]:
+        feed, mean_ms, peak = measure(lambda: prepare(pred), repeat)
+        session = getattr(pred, session_attr)
+        outputs.append(session.run(None, feed)[0])
+        rows.append((name, label, mean_ms, peak / 1024, feed_bytes(feed) / 1024))
+    diff = float(np.abs(outputs[0].astype(np.float64) - outputs[1]).max())
+    return rows, diff
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--det", type=str)
+    parser.add_argument("--rec", type=str)
+    parser.add_argument("--cls", type=str)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--crops", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=50)
+    opts = parser.parse_args()
+
+    base = infer_args().parse_args([])
+    base.use_gpu = False
+    base.det_model_dir = opts.det or base.det_model_dir
+    base.rec_model_dir = opts.rec or base.rec_model_dir
+    base.cls_model_dir = opts.cls or base.cls_model_dir
+
+    screen = make_screen(opts.height, opts.width)
+    crops = make_crops(opts.crops)
+    stages = [
+        ("det", TextDetector, "det_model_dir", "det_onnx_session",
+         lambda p: {p.det_input_name[0]: p.preprocess(screen)[0]}),
+        ("rec", TextRecognizer, "rec_model_dir", "rec_onnx_session",
+         lambda p: p.get_batch_feed(crops)),
+        ("cls", TextClassifier, "cls_model_dir", "cls_onnx_session",
+         lambda p: p.get_batch_feed(crops)),
+    ]
+
+    rows = []
+    diffs = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for kind, predictor, attr, session_attr, prepare in stages:
+            model_path = getattr(base, attr)
+            if not os.path.exists(model_path):
+                print("skip {}: {} not found".format(kind, model_path))
+                continue
+            folded_path = os.path.join(tmp_dir, kind + ".onnx")
+            onnx.save(fold_normalize(onnx.load(model_path), kind), folded_path)
+
+            folded_args = argparse.Namespace(**vars(base))
+            setattr(folded_args, attr, folded_path)
+            stage_rows, diffs[kind] = bench_stage(
+                kind, predictor(base), predictor(folded_args),
+                session_attr, prepare, opts.repeat,
+            )
+            rows += stage_rows
+
+    print("{:<6}{:<9}{:>12}{:>14}{:>14}".format("stage", "input", "time(ms)", "peak(KiB)", "feed(KiB)"))
+    for name, label, mean_ms, peak_kib, feed_kib in rows:
+        print("{:<6}{:<9}{:>12.3f}{:>14.1f}{:>14.1f}".format(name, label, mean_ms, peak_kib, feed_kib))
+    for kind, diff in diffs.items():
+        print("{} output max abs diff: {}".format(kind, diff))
+
+
+if __name__ == "__main__":
+    main()
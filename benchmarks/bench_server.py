@@ -0,0 +1,124 @@
+"""
+本地 OCR 服务压测: 多个客户端并发请求, 对比不同的合批窗口
+
+    python benchmarks/bench_server.py --det det.onnx --rec rec.onnx --clients 8 --windows 0,10,20
+
+For every batch window a server process is started, --clients threads send
+small ROIs back to back for --duration seconds (each with --deadline_ms), and
+the throughput, latency percentiles, mean server batch size and the number of
+rejected / expired requests are printed.
+"""
+import argparse
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from common import ROOT_DIR, make_screen
+from onnxocr.server import OCRClient
+from onnxocr.utils import infer_args
+
+
+def wait_ready(port, timeout=60):
+    start = time.time()
+    while time.time() - start < timeout:
+        try:
+            client = OCRClient("127.0.0.1", port, timeout=1)
+            client.stats()
+            client.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def client_loop(port, rois, duration, deadline_ms, latencies, errors):
+    client = OCRClient("127.0.0.1", port)
+    end = time.time() + duration
+    index = 0
+    while time.time() < end:
+        start = time.perf_counter()
+        try:
+            client.ocr(rois[index % len(rois)], deadline_ms=deadline_ms)
+            latencies.append((time.perf_counter() - start) * 1000)
+        except RuntimeError as e:
+            errors.append(str(e).split(":")[0])
+        index += 1
+    client.close()
+
+
+def run(opts, window, rois):
+    cmd = [
+        sys.executable, "-m", "onnxocr.server", "--port", str(opts.port),
+        "--use_gpu", "false", "--det_model_dir", opts.det, "--rec_model_dir", opts.rec,
+        "--batch_window_ms", str(window), "--max_batch", str(opts.max_batch),
+        "--max_queue", str(opts.max_queue),
+    ]
+    server = subprocess.Popen(cmd, cwd=ROOT_DIR, stdout=subprocess.DEVNULL)
+    try:
+        wait_ready(opts.port)
+        latencies, errors = [], []
+        threads = [
+            threading.Thread(
+                target=client_loop,
+                args=(opts.port, rois, opts.duration, opts.deadline_ms, latencies, errors),
+            )
+            for _ in range(opts.clients)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        client = OCRClient("127.0.0.1", opts.port)
+        stats = client.stats()
+        client.close()
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / opts.duration,
+        "p50": latencies[len(latencies) // 2] if latencies else float("nan"),
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else float("nan"),
+        "mean_batch": stats["mean_batch"],
+        "rejected": errors.count("ocr server 503"),
+        "expired": errors.count("ocr server 504"),
+    }
+
+
+def main():
+    defaults = infer_args().parse_args([])
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--det", type=str, default=defaults.det_model_dir)
+    parser.add_argument("--rec", type=str, default=defaults.rec_model_dir)
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--deadline_ms", type=float, default=2000)
+    parser.add_argument("--windows", type=str, default="0,10,20")
+    parser.add_argument("--max_batch", type=int, default=16)
+    parser.add_argument("--max_queue", type=int, default=64)
+    opts = parser.parse_args()
+
+    screen = make_screen(540, 960)
+    rng = np.random.default_rng(0)
+    rois = []
+    for _ in range(16):
+        h, w = int(rng.integers(40, 80)), int(rng.integers(160, 400))
+        y, x = int(rng.integers(0, 540 - h)), int(rng.integers(0, 960 - w))
+        rois.append(screen[y : y + h, x : x + w])
+
+    print("{:<12}{:>8}{:>10}{:>10}{:>12}{:>10}{:>9}".format(
+        "window(ms)", "req/s", "p50(ms)", "p99(ms)", "mean_batch", "rejected", "expired"))
+    for window in [float(w) for w in opts.windows.split(",")]:
+        result = run(opts, window, rois)
+        print("{:<12}{:>8.1f}{:>10.1f}{:>10.1f}{:>12.2f}{:>10}{:>9}".format(
+            window, result["rps"], result["p50"], result["p99"],
+            result["mean_batch"], result["rejected"], result["expired"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+基准测试集: 各阶段单独计时 + 端到端, 结果保存为 JSON 以便跨提交对比
+
+    python benchmarks/bench_suite.py                          # 替身模型
+    python benchmarks/bench_suite.py --det det.onnx --rec rec.onnx
+    python benchmarks/bench_suite.py --compare inference_results/bench_suite/<commit>.json
+
+The screenshots are rendered deterministically with PIL (see
+common.render_screen, pass --font for a fixed TrueType font). Without --det /
+--rec, tiny stand-in models with the PP-OCR signatures are built into a
+temporary directory (see stand_in_models.py): the model times are then
+meaningless, the pre/post-processing times are real.
+
+Micro benchmarks time one stage on inputs taken from a real pipeline run:
+NormalizeImage, DetResizeForTest, DBPostProcess, get_rotate_crop_image,
+resize_norm_img, CTCLabelDecode and sorted_boxes. End-to-end benchmarks time
+ocr() per screenshot and ocr_batch() over all of them. Every result has
+mean / p50 / p90 / min in ms; the file also records the commit, versions,
+models and sizes so that runs from different commits can be compared.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+import cv2
+import numpy as np
+import onnxruntime
+
+from common import ROOT_DIR, render_screen
+from onnxocr.onnx_paddleocr import ONNXPaddleOcr
+from onnxocr.operators import DetResizeForTest, NormalizeImage
+from onnxocr.predict_system import sorted_boxes
+from onnxocr.utils import get_rotate_crop_image
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        return commit, bool(dirty)
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def timeit(func, repeat, warmup=2):
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    times = np.array(times)
+    return {
+        "mean_ms": float(times.mean()), "p50_ms": float(np.percentile(times, 50)),
+        "p90_ms": float(np.percentile(times, 90)), "min_ms": float(times.min()), "repeat": repeat,
+    }
+
+
+def micro_benchmarks(engine, screens):
+    """{name: zero-argument callable}, inputs prepared from one pipeline run"""
+    detector = engine.text_detector
+    recognizer = engine.text_recognizer
+    screen = screens[0]
+    det_limit = detector.args.det_limit_side_len
+    resize_op = DetResizeForTest(limit_side_len=det_limit, limit_type=detector.args.det_limit_type)
+    normalize_op = NormalizeImage(
+        scale="1./255.", mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225], order="hwc"
+    )
+    resized = resize_op({"image": screen})
+
+    # 检测模型输出与文本框, 后处理和裁剪的输入
+    det_img, shape_list = detector.preprocess(screen)
+    det_outputs = detector.run(det_img)
+    dt_boxes = detector.postprocess(det_outputs, shape_list, [screen.shape])[0]
+    if len(dt_boxes) == 0:
+        raise RuntimeError("no text box detected on the synthetic screenshot, check the det model")
+    crops = [get_rotate_crop_image(screen, box.copy()) for box in sorted_boxes(dt_boxes)]
+    max_wh_ratio = max(crop.shape[1] / crop.shape[0] for crop in crops)
+    rec_batch = crops[: recognizer.rec_batch_num]
+    rec_outputs = recognizer.run(recognizer.get_batch_feed(rec_batch))
+    # 打乱顺序, sorted_boxes 才有事可做
+    shuffled_boxes = dt_boxes[np.random.default_rng(0).permutation(len(dt_boxes))]
+
+    return {
+        "NormalizeImage": lambda: normalize_op({"image": resized["image"]}),
+        "DetResizeForTest": lambda: resize_op({"image": screen}),
+        "DBPostProcess": lambda: detector.postprocess_op({"maps": det_outputs[0]}, shape_list),
+        "get_rotate_crop_image": lambda: [get_rotate_crop_image(screen, box.copy()) for box in dt_boxes],
+        "resize_norm_img": lambda: [recognizer.resize_norm_img(crop, max_wh_ratio) for crop in crops],
+        "CTCLabelDecode": lambda: recognizer.postprocess_op(rec_outputs[0]),
+        "sorted_boxes": lambda: sorted_boxes(shuffled_boxes),
+    }, {"boxes": len(dt_boxes), "rec_batch": len(rec_batch), "rec_output_shape": list(rec_outputs[0].shape)}
+
+
+def end_to_end_benchmarks(engine, screens):
+    state = {"next": 0}
+
+    def ocr_one():
+        # 轮流识别每张截图
+        engine.ocr(screens[state["next"] % len(screens)])
+        state["next"] += 1
+
+    return {
+        "e2e.ocr": ocr_one,
+        "e2e.ocr_batch": lambda: engine.ocr_batch(screens),
+    }
+
+
+def format_results(results, baseline=None):
+    base = (baseline or {}).get("results", {})
+    header = "{:<24}{:>12}{:>12}{:>12}".format("benchmark", "mean ms", "p50 ms", "p90 ms")
+    if base:
+        header += "{:>12}{:>9}".format("base ms", "ratio")
+    lines = [header]
+    for name, row in results.items():
+        line = "{:<24}{:>12.3f}{:>12.3f}{:>12.3f}".format(name, row["mean_ms"], row["p50_ms"], row["p90_ms"])
+        if name in base:
+            line += "{:>12.3f}{:>8.2f}x".format(base[name]["mean_ms"], row["mean_ms"] / base[name]["mean_ms"])
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--det", type=str, default="", help="det model, default a stand-in model")
+    parser.add_argument("--rec", type=str, default="", help="rec model, default a stand-in model")
+    parser.add_argument("--height", type=int, default=540)
+    parser.add_argument("--width", type=int, default=960)
+    parser.add_argument("--num_screens", type=int, default=4)
+    parser.add_argument("--font", type=str, default=None, help="TrueType font, default PIL's bundled font")
+    parser.add_argument("--font_size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50, help="calls per micro benchmark")
+    parser.add_argument("--e2e_repeat", type=int, default=10, help="calls per end-to-end benchmark")
+    parser.add_argument("--cpu_threads", type=int, default=0)
+    parser.add_argument("--filter", type=str, default="", help="only run benchmarks whose name contains it")
+    parser.add_argument("--output", type=str, default=None,
+                        help="result JSON, default inference_results/bench_suite/<commit>.json")
+    parser.add_argument("--compare", type=str, default=None, help="result JSON of an earlier run")
+    opts = parser.parse_args()
+
+    screens = [
+        render_screen(opts.height, opts.width, seed, opts.font, opts.font_size)[0]
+        for seed in range(opts.num_screens)
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        det_path, rec_path = opts.det, opts.rec
+        if not (det_path and rec_path):
+            from stand_in_models import build_stand_in_models
+
+            stand_in_det, stand_in_rec = build_stand_in_models(tmp_dir)
+            det_path = det_path or stand_in_det
+            rec_path = rec_path or stand_in_rec
+        engine = ONNXPaddleOcr(
+            use_gpu=False, det_model_dir=det_path, rec_model_dir=rec_path,
+            cpu_threads=opts.cpu_threads, benchmark=True,
+        )
+
+    micro, inputs = micro_benchmarks(engine, screens)
+    results = {}
+    for name, func in micro.items():
+        if opts.filter in name:
+            results[name] = timeit(func, opts.repeat)
+    stages = {}
+    for name, func in end_to_end_benchmarks(engine, screens).items():
+        if opts.filter in name:
+            engine.stats_window.window.clear()
+            results[name] = timeit(func, opts.e2e_repeat, warmup=1)
+            # 分阶段耗时 (ms), 含预热调用, 见 onnxocr.timing
+            stages[name] = engine.timing_summary()
+
+    commit, dirty = git_commit()
+    report = {
+        "meta": {
+            "commit": commit, "dirty": dirty, "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(), "numpy": np.__version__,
+            "opencv": cv2.__version__, "onnxruntime": onnxruntime.__version__,
+            "platform": platform.platform(), "cpu_count": os.cpu_count(),
+            "det_model": opts.det or "stand-in", "rec_model": opts.rec or "stand-in",
+            "screen": [opts.height, opts.width], "num_screens": opts.num_screens,
+            "font": opts.font or "default", "font_size": opts.font_size,
+            "cpu_threads": opts.cpu_threads, "inputs": inputs,
+        },
+        "results": results,
+        "stages": stages,
+    }
+
+    output = opts.output or os.path.join(
+        ROOT_DIR, "inference_results", "bench_suite", "{}{}.json".format(commit[:12], "-dirty" if dirty else "")
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as fout:
+        json.dump(report, fout, ensure_ascii=False, indent=1)
+
+    baseline = None
+    if opts.compare:
+        with open(opts.compare, "r", encoding="utf-8") as fin:
+            baseline = json.load(fin)
+        print("baseline: {} ({})".format(baseline["meta"]["commit"][:12], baseline["meta"]["time"]))
+    print(format_results(results, baseline))
+    print("boxes per screenshot {boxes}, rec batch {rec_batch}, rec output {rec_output_shape}".format(**inputs))
+    print("saved", output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+分块检测对比: 整图缩小 / 整图原分辨率 / 重叠分块
+
+    python benchmarks/bench_tiled_det.py --det det.onnx --height 6000 --width 1080
+
+Each mode runs in its own process so that the reported peak RSS is not shared
+between modes. Boxes found by the full-resolution run are used as reference:
+"matched" counts reference boxes found with IoU > 0.5.
+"""
+import argparse
+import multiprocessing
+import time
+
+import numpy as np
+
+from common import get_rss_mb, make_screen
+from onnxocr.predict_det import TextDetector
+from onnxocr.utils import infer_args
+
+MODES = ["downscale", "full", "tiled"]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return get_rss_mb()
+
+
+def detect(opts, mode):
+    det_args = infer_args().parse_args([])
+    det_args.use_gpu = False
+    det_args.det_model_dir = opts.det
+    if mode == "full":
+        det_args.det_limit_side_len = max(opts.height, opts.width)
+    elif mode == "tiled":
+        det_args.det_tile_size = opts.tile_size
+        det_args.det_tile_overlap = opts.overlap
+        det_args.max_batch_size = opts.batch
+    detector = TextDetector(det_args)
+    img = make_screen(opts.height, opts.width)
+    start = time.perf_counter()
+    dt_boxes = detector(img)
+    elapsed = time.perf_counter() - start
+    return mode, elapsed, peak_rss_mb(), np.array(dt_boxes).reshape(-1, 4, 2)
+
+
+def iou(a, b):
+    ax0, ay0, ax1, ay1 = a[:, 0].min(), a[:, 1].min(), a[:, 0].max(), a[:, 1].max()
+    bx0, by0, bx1, by1 = b[:, 0].min(), b[:, 1].min(), b[:, 0].max(), b[:, 1].max()
+    iw = min(ax1, bx1) - max(ax0, bx0)
+    ih = min(ay1, by1) - max(ay0, by0)
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / ((ax1 - ax0) * (ay1 - ay0) + (bx1 - bx0) * (by1 - by0) - inter)
+
+
+def main():
+    defaults = infer_args().parse_args([])
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--det", type=str, default=defaults.det_model_dir)
+    parser.add_argument("--height", type=int, default=6000)
+    parser.add_argument("--width", type=int, default=1080)
+    parser.add_argument("--tile_size", type=int, default=960)
+    parser.add_argument("--overlap", type=int, default=128)
+    parser.add_argument("--batch", type=int, default=2, help="tiles per detection batch")
+    opts = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+    for mode in MODES:
+        with ctx.Pool(1) as pool:
+            mode, elapsed, peak, boxes = pool.apply(detect, (opts, mode))
+        results[mode] = (elapsed, peak, boxes)
+
+    reference = results["full"][2]
+    print("image {}x{}, reference boxes: {}".format(opts.width, opts.height, len(reference)))
+    print("{:<10}{:>10}{:>14}{:>8}{:>9}".format("mode", "time(s)", "peak_rss(MB)", "boxes", "matched"))
+    for mode in MODES:
+        elapsed, peak, boxes = results[mode]
+        matched = sum(
+            1 for ref in reference if any(iou(ref, box) > 0.5 for box in boxes)
+        )
+        print("{:<10}{:>10.2f}{:>14.1f}{:>8}{:>9}".format(mode, elapsed, peak, len(boxes), matched))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+进程外 OCR worker 的往返开销: 进程内 ocr() vs OCRWorker.submit().result()
+
+    python benchmarks/bench_worker.py --det det.onnx --rec rec.onnx --repeat 50
+
+Overhead is the round trip time minus the inference time measured inside
+the worker, i.e. the cost of the shared-memory copy, the descriptor pipe and
+the result pickling. The in-flight run submits all ROIs at once to show that
+the caller only pays the submit cost.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common import make_screen
+from onnxocr.onnx_paddleocr import ONNXPaddleOcr
+from onnxocr.utils import infer_args
+from onnxocr.worker import OCRWorker
+
+
+def main():
+    defaults = infer_args().parse_args([])
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--det", type=str, default=defaults.det_model_dir)
+    parser.add_argument("--rec", type=str, default=defaults.rec_model_dir)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--slots", type=int, default=8)
+    opts = parser.parse_args()
+
+    engine_kwargs = dict(use_gpu=False, det_model_dir=opts.det, rec_model_dir=opts.rec)
+    screen = make_screen(1080, 1920)
+    rng = np.random.default_rng(0)
+    rois = []
+    for _ in range(opts.repeat):
+        h, w = int(rng.integers(30, 90)), int(rng.integers(100, 400))
+        y, x = int(rng.integers(0, 1080 - h)), int(rng.integers(0, 1920 - w))
+        rois.append(screen[y : y + h, x : x + w])
+
+    engine = ONNXPaddleOcr(**engine_kwargs)
+    engine.ocr(rois[0])
+    start = time.perf_counter()
+    for roi in rois:
+        engine.ocr(roi)
+    local_ms = (time.perf_counter() - start) * 1000 / len(rois)
+
+    worker = OCRWorker(engine_kwargs, slots=opts.slots)
+    worker.submit(rois[0]).result()
+    worker.compute_time, worker.completed = 0.0, 0
+    start = time.perf_counter()
+    for roi in rois:
+        worker.submit(roi).result()
+    remote_ms = (time.perf_counter() - start) * 1000 / len(rois)
+    compute_ms = worker.compute_time * 1000 / worker.completed
+
+    submit_time = 0.0
+    start = time.perf_counter()
+    futures = []
+    for roi in rois:
+        submit_start = time.perf_counter()
+        futures.append(worker.submit(roi))
+        submit_time += time.perf_counter() - submit_start
+    for future in futures:
+        future.result()
+    inflight_ms = (time.perf_counter() - start) * 1000 / len(rois)
+    worker.close()
+
+    print("rois={}".format(len(rois)))
+    print("in-process ocr():        {:.3f} ms/roi".format(local_ms))
+    print("worker round trip:       {:.3f} ms/roi (inference {:.3f} ms, overhead {:.3f} ms)".format(
+        remote_ms, compute_ms, remote_ms - compute_ms))
+    print("worker all in flight:    {:.3f} ms/roi, caller blocked {:.3f} ms/roi in submit()".format(
+        inflight_ms, submit_time * 1000 / len(rois)))
+
+
+if __name__ == "__main__":
+    main()
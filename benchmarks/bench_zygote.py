@@ -0,0 +1,91 @@
+"""
+脚本启动到第一次动作的时间: 直接 python 启动 vs 通过常驻引擎进程启动
+
+    python benchmarks/bench_zygote.py --det det.onnx --rec rec.onnx --repeat 5
+
+A throwaway macro script calls get_engine(), runs one ocr() and prints the
+wall clock time of that first action. Launch-to-first-action is measured
+from just before the launcher process is started:
+    cold:   python script.py (imports and model loading every launch)
+    fork:   python -m onnxocr.zygote run script.py (POSIX only)
+    attach: python -m onnxocr.zygote run --attach script.py (the Windows path)
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT_DIR
+from onnxocr.utils import infer_args
+from onnxocr.zygote import ENV_ADDRESS
+
+SCRIPT = """
+import time
+import numpy as np
+from onnxocr.zygote import get_engine
+
+engine = get_engine(use_gpu=False, det_model_dir={det!r}, rec_model_dir={rec!r})
+img = np.full((64, 320, 3), 255, dtype=np.uint8)
+img[20:44, 16:300] = 0
+engine.ocr(img)
+print("first_action", time.time(), flush=True)
+"""
+
+
+def launch_ms(cmd, env):
+    start = time.time()
+    out = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True).stdout
+    for line in out.splitlines():
+        if line.startswith("first_action"):
+            return (float(line.split()[1]) - start) * 1000
+    raise RuntimeError("script printed no first_action: {}".format(out))
+
+
+def main():
+    defaults = infer_args().parse_args([])
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--det", type=str, default=defaults.det_model_dir)
+    parser.add_argument("--rec", type=str, default=defaults.rec_model_dir)
+    parser.add_argument("--repeat", type=int, default=5)
+    opts = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    script = os.path.join(workdir, "macro.py")
+    with open(script, "w") as fout:
+        fout.write(SCRIPT.format(det=os.path.abspath(opts.det), rec=os.path.abspath(opts.rec)))
+    address = os.path.join(workdir, "zygote.sock") if sys.platform != "win32" else None
+    env = dict(os.environ)
+    env.pop(ENV_ADDRESS, None)
+    env["PYTHONPATH"] = os.pathsep.join([ROOT_DIR, env.get("PYTHONPATH", "")])
+
+    zygote_cmd = [
+        sys.executable, "-m", "onnxocr.zygote", "serve", "--use_gpu", "false",
+        "--det_model_dir", os.path.abspath(opts.det), "--rec_model_dir", os.path.abspath(opts.rec),
+    ]
+    if address:
+        zygote_cmd += ["--address", address]
+    zygote = subprocess.Popen(zygote_cmd, env=env, stdout=subprocess.PIPE, text=True)
+    for line in zygote.stdout:
+        if "listening" in line:
+            address = line.split("listening on", 1)[1].strip()
+            break
+
+    run_cmd = [sys.executable, "-m", "onnxocr.zygote", "run", "--address", address]
+    modes = [("cold", [sys.executable, script])]
+    if hasattr(os, "fork"):
+        modes.append(("fork", run_cmd + [script]))
+    modes.append(("attach", run_cmd + ["--attach", script]))
+    try:
+        for name, cmd in modes:
+            times = sorted(launch_ms(cmd, env) for _ in range(opts.repeat))
+            print("{:<7} launch to first action: median {:8.1f} ms  min {:8.1f} ms".format(
+                name, times[len(times) // 2], times[0]))
+    finally:
+        zygote.terminate()
+        zygote.wait()
+
+
+if __name__ == "__main__":
+    main()
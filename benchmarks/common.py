@@ -0,0 +1,99 @@
+"""
+benchmarks 公用的合成数据和测量工具
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+def make_screen(height, width, seed=0):
+    rng = np.random.default_rng(seed)
+    img = np.full((height, width, 3), 235, dtype=np.uint8)
+    for i in range(height // 40):
+        y = 30 + i * 40
+        x = int(rng.integers(5, max(6, width // 3)))
+        text = "".join(rng.choice(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 "), 18))
+        cv2.putText(img, text, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (20, 20, 20), 2)
+    return img
+
+
+WORDS = [
+    "HP", "MP", "EXP", "Level", "Gold", "Quest", "Inventory", "Attack", "Defense", "Skill",
+    "Cooldown", "Ready", "Accept", "Cancel", "Confirm", "Settings", "Loading", "Victory",
+    "Defeat", "Round", "Score", "Time", "Map", "Shop", "Buy", "Sell", "Item", "Potion",
+]
+
+
+def load_font(font_path=None, font_size=20):
+    from PIL import ImageFont
+
+    if font_path:
+        return ImageFont.truetype(font_path, font_size)
+    try:
+        # Pillow >= 10.1 自带可缩放的默认字体
+        return ImageFont.load_default(font_size)
+    except (TypeError, OSError):
+        return ImageFont.load_default()
+
+
+def render_screen(height, width, seed=0, font_path=None, font_size=20, words=None):
+    """
+    deterministic synthetic screenshot: lines of words rendered with PIL on a
+    light background with a few panels, same seed and font give the same image
+    return: (BGR uint8 image, [(4x2 box, text), ...] of the rendered lines)
+    """
+    from PIL import Image, ImageDraw
+
+    rng = np.random.default_rng(seed)
+    words = words or WORDS
+    font = load_font(font_path, font_size)
+    image = Image.new("RGB", (width, height), (235, 235, 235))
+    draw = ImageDraw.Draw(image)
+    for _ in range(3):
+        x0, y0 = int(rng.integers(0, width // 2)), int(rng.integers(0, height // 2))
+        shade = int(rng.integers(200, 250))
+        draw.rectangle([x0, y0, x0 + width // 3, y0 + height // 4], fill=(shade, shade, shade - 10))
+
+    lines = []
+    line_height = int(font_size * 1.8)
+    for y in range(line_height // 2, height - line_height, line_height):
+        text = " ".join(rng.choice(words, int(rng.integers(1, 5))))
+        x = int(rng.integers(4, max(5, width // 3)))
+        color = tuple(int(c) for c in rng.integers(0, 80, 3))
+        draw.text((x, y), text, fill=color, font=font)
+        left, top, right, bottom = draw.textbbox((x, y), text, font=font)
+        if right > width:
+            continue
+        box = np.array([[left, top], [right, top], [right, bottom], [left, bottom]], dtype=np.float32)
+        lines.append((box, text))
+    return cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2BGR), lines
+
+
+def make_crops(num, seed=0):
+    rng = np.random.default_rng(seed)
+    crops = []
+    for _ in range(num):
+        h = int(rng.integers(24, 64))
+        w = int(rng.integers(h, h * 12))
+        crops.append(rng.integers(0, 255, (h, w, 3), dtype=np.uint8))
+    return crops
+
+
+def get_rss_mb():
+    """resident set size of the current process in MiB"""
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        with open("/proc/self/status") as fin:
+            for line in fin:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    return float("nan")
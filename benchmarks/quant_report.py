@@ -0,0 +1,142 @@
+"""
+量化模型对比报告: fp32 / int8_dynamic / int8_static
+
+    python -m onnxocr.model_tools quantize --det det.onnx --rec rec.onnx --mode both --calib_dir screenshots/
+    python benchmarks/quant_report.py --label_file corpus/labels.txt --det det.onnx --rec rec.onnx
+
+label_file uses the PaddleOCR label format, one "image_path<TAB>text" per line,
+image paths relative to the label file. Each image is OCRed as a whole and the
+recognized lines are joined in reading order before being compared with the
+label (whitespace ignored). Precisions whose model files are missing are skipped.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+import cv2
+
+import common  # noqa: F401  把仓库根目录加入 sys.path
+from onnxocr.onnx_paddleocr import ONNXPaddleOcr
+from onnxocr.predict_base import PRECISIONS, get_model_path
+from onnxocr.utils import infer_args
+
+
+def edit_distance(a, b):
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def load_corpus(label_file):
+    root = os.path.dirname(os.path.abspath(label_file))
+    corpus = []
+    with open(label_file, "r", encoding="utf-8") as fin:
+        for line in fin:
+            line = line.rstrip("\r\n")
+            if not line:
+                continue
+            image_path, label = line.split("\t", 1)
+            img = cv2.imread(os.path.join(root, image_path))
+            if img is None:
+                print("skip unreadable image:", image_path)
+                continue
+            corpus.append((image_path, img, label))
+    return corpus
+
+
+def normalize(text):
+    return "".join(text.split())
+
+
+def evaluate(engine, corpus, warmup):
+    for _, img, _ in corpus[:warmup]:
+        engine.ocr(img)
+
+    latencies = []
+    correct = 0
+    char_errors = 0
+    char_total = 0
+    for _, img, label in corpus:
+        start = time.perf_counter()
+        result = engine.ocr(img)
+        latencies.append((time.perf_counter() - start) * 1000)
+        pred = normalize("".join(line[1][0] for line in result[0]))
+        label = normalize(label)
+        correct += pred == label
+        char_errors += edit_distance(pred, label)
+        char_total += max(len(label), 1)
+
+    latencies.sort()
+    return {
+        "latency_mean_ms": statistics.mean(latencies),
+        "latency_p50_ms": latencies[len(latencies) // 2],
+        "latency_p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "line_accuracy": correct / len(corpus),
+        "char_accuracy": max(0.0, 1 - char_errors / char_total),
+    }
+
+
+def main():
+    defaults = infer_args().parse_args([])
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--label_file", type=str, required=True)
+    parser.add_argument("--det", type=str, default=defaults.det_model_dir)
+    parser.add_argument("--rec", type=str, default=defaults.rec_model_dir)
+    parser.add_argument("--cls", type=str, default=defaults.cls_model_dir)
+    parser.add_argument("--use_angle_cls", action="store_true")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--output", type=str, help="save the report as json")
+    opts = parser.parse_args()
+
+    corpus = load_corpus(opts.label_file)
+    assert corpus, "empty corpus: {}".format(opts.label_file)
+    model_dirs = [opts.det, opts.rec] + ([opts.cls] if opts.use_angle_cls else [])
+
+    report = {}
+    for precision in PRECISIONS:
+        paths = [get_model_path(model_dir, precision) for model_dir in model_dirs]
+        missing = [path for path in paths if not os.path.exists(path)]
+        if missing:
+            print("skip {}: missing {}".format(precision, ", ".join(missing)))
+            continue
+        engine = ONNXPaddleOcr(
+            use_gpu=False,
+            use_angle_cls=opts.use_angle_cls,
+            det_model_dir=opts.det,
+            rec_model_dir=opts.rec,
+            cls_model_dir=opts.cls,
+            precision=precision,
+        )
+        result = evaluate(engine, corpus, opts.warmup)
+        result["model_size_mb"] = sum(os.path.getsize(path) for path in paths) / 2**20
+        report[precision] = result
+
+    header = "{:<14}{:>10}{:>10}{:>10}{:>10}{:>10}{:>10}".format(
+        "precision", "size(MB)", "mean(ms)", "p50(ms)", "p95(ms)", "line_acc", "char_acc"
+    )
+    print(header)
+    for precision, result in report.items():
+        print(
+            "{:<14}{:>10.2f}{:>10.2f}{:>10.2f}{:>10.2f}{:>10.4f}{:>10.4f}".format(
+                precision,
+                result["model_size_mb"],
+                result["latency_mean_ms"],
+                result["latency_p50_ms"],
+                result["latency_p95_ms"],
+                result["line_accuracy"],
+                result["char_accuracy"],
+            )
+        )
+    if opts.output:
+        with open(opts.output, "w", encoding="utf-8") as fout:
+            json.dump({"corpus_size": len(corpus), "results": report}, fout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
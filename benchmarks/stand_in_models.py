@@ -0,0 +1,117 @@
+"""
+tiny stand-in det / rec onnx models with the PP-OCR input/output signatures,
+so that the benchmarks run without the real models
+
+    python benchmarks/stand_in_models.py --output_dir /tmp/stand_in
+
+det: x [N, 3, H, W] (normalized) -> sigmoid_0.tmp_0 [N, 1, H, W], the
+probability map marks dark pixels and is dilated horizontally so that the
+characters of a line merge into one box. rec: x [N, 3, 48, W] ->
+softmax_11.tmp_0 [N, W / 8, num_classes] from random weights, with the
+class count of the character dict so that CTC decoding costs the same as
+with the real model. The texts are meaningless, the shapes and the time
+spent outside the models are realistic.
+"""
+import argparse
+import os
+
+import numpy as np
+import onnx
+from onnx import helper, numpy_helper, TensorProto
+
+from common import ROOT_DIR
+from onnxocr.rec_postprocess import read_char_dict
+from onnxocr.utils import infer_args
+
+OPSET = 11
+DET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+DET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+def make_model(graph):
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", OPSET)])
+    model.ir_version = 7
+    onnx.checker.check_model(model)
+    return model
+
+
+def build_det_model(sharpness=20.0, dilate=(3, 15)):
+    # 1x1 卷积还原灰度 (先撤销归一化), 深色像素概率高
+    weight = (-sharpness * DET_STD / 3).reshape(1, 3, 1, 1)
+    bias = np.array([sharpness * (0.5 - DET_MEAN.sum() / 3)], dtype=np.float32)
+    kh, kw = dilate
+    nodes = [
+        helper.make_node("Conv", ["x", "w", "b"], ["logits"]),
+        helper.make_node("Sigmoid", ["logits"], ["prob"]),
+        # 最大池化相当于膨胀, 把一行中的字符连成一个区域
+        helper.make_node(
+            "MaxPool", ["prob"], ["sigmoid_0.tmp_0"], kernel_shape=[kh, kw],
+            pads=[kh // 2, kw // 2, kh // 2, kw // 2], strides=[1, 1],
+        ),
+    ]
+    graph = helper.make_graph(
+        nodes, "det_stand_in",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["N", 3, "H", "W"])],
+        [helper.make_tensor_value_info("sigmoid_0.tmp_0", TensorProto.FLOAT, ["N", 1, "H", "W"])],
+        [numpy_helper.from_array(weight.astype(np.float32), "w"), numpy_helper.from_array(bias, "b")],
+    )
+    return make_model(graph)
+
+
+def build_rec_model(num_classes, height=48, stride=8, scale=100.0, seed=0):
+    rng = np.random.default_rng(seed)
+    # 每 stride 列池化成一个时间步, 再投影到 num_classes; scale 越大 softmax
+    # 越尖锐, 置信度才能超过 drop_score, 端到端结果不会被全部过滤
+    weight = (rng.normal(size=(3, num_classes)) * scale).astype(np.float32)
+    bias = rng.normal(size=(num_classes,)).astype(np.float32)
+    nodes = [
+        helper.make_node("AveragePool", ["x"], ["pooled"], kernel_shape=[height, stride], strides=[height, stride]),
+        helper.make_node("Reshape", ["pooled", "shape"], ["steps"]),
+        helper.make_node("Transpose", ["steps"], ["features"], perm=[0, 2, 1]),
+        helper.make_node("MatMul", ["features", "weight"], ["proj"]),
+        helper.make_node("Add", ["proj", "bias"], ["logits"]),
+        helper.make_node("Softmax", ["logits"], ["softmax_11.tmp_0"], axis=2),
+    ]
+    graph = helper.make_graph(
+        nodes, "rec_stand_in",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["N", 3, height, "W"])],
+        [helper.make_tensor_value_info("softmax_11.tmp_0", TensorProto.FLOAT, ["N", "T", num_classes])],
+        [
+            numpy_helper.from_array(weight, "weight"),
+            numpy_helper.from_array(bias, "bias"),
+            numpy_helper.from_array(np.array([0, 3, -1], dtype=np.int64), "shape"),
+        ],
+    )
+    return make_model(graph)
+
+
+def rec_num_classes(char_dict_path, use_space_char=True):
+    # CTC 的 blank + 字典 + 可选空格, 与 CTCLabelDecode 一致
+    return len(read_char_dict(char_dict_path)) + 1 + int(use_space_char)
+
+
+def build_stand_in_models(output_dir, char_dict_path=None):
+    """
+    write det.onnx and rec.onnx into output_dir
+    return: (det path, rec path)
+    """
+    char_dict_path = char_dict_path or infer_args().parse_args([]).rec_char_dict_path
+    os.makedirs(output_dir, exist_ok=True)
+    det_path = os.path.join(output_dir, "det.onnx")
+    rec_path = os.path.join(output_dir, "rec.onnx")
+    onnx.save(build_det_model(), det_path)
+    onnx.save(build_rec_model(rec_num_classes(char_dict_path)), rec_path)
+    return det_path, rec_path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output_dir", type=str, default=os.path.join(ROOT_DIR, "inference_results", "stand_in"))
+    parser.add_argument("--rec_char_dict_path", type=str, default=None)
+    opts = parser.parse_args()
+    for path in build_stand_in_models(opts.output_dir, opts.rec_char_dict_path):
+        print("saved", path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+批量目录识别 (batch OCR of an image directory or file list)
+
+The image list (a directory, a single image or a .txt file with one path per
+line) is split into total_process_num shards, shard i taking every N-th image
+starting at i. Each shard is OCR'd by its own process with cpu_threads ORT
+threads (cpu count / N by default) while a prefetch thread decodes the next
+images, and every result is appended to the shard's JSONL file as soon as it
+is ready:
+
+    {"image": "<path>", "result": [[box, [text, score]], ...]}
+    {"image": "<path>", "error": "<message>"}
+
+The JSONL file is also the checkpoint: rerunning the same command skips the
+images already in it, so an interrupted run resumes where it stopped.
+
+    # all shards from one command
+    python -m onnxocr.batch_ocr --image_dir imgs/ --output out/ocr.jsonl \\
+        --use_gpu false --use_mp true --total_process_num 4
+    # or one shard per command / machine
+    python -m onnxocr.batch_ocr --image_dir imgs/ --output out/ocr.jsonl \\
+        --use_gpu false --total_process_num 4 --process_id 1
+"""
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from .utils import get_image_file_list, infer_args, str2bool
+
+BATCH_KEYS = ["output", "prefetch", "resume"]
+
+
+def shard_path(output, process_id, total_process_num):
+    if total_process_num <= 1:
+        return output
+    stem, ext = os.path.splitext(output)
+    return "{}.{}-of-{}{}".format(stem, process_id, total_process_num, ext or ".jsonl")
+
+
+def load_checkpoint(path):
+    """
+    images already written to path; a partial last line left by an
+    interrupted run is truncated
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    valid_end = 0
+    with open(path, "rb") as fin:
+        for line in fin:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(line)["image"])
+            except (ValueError, KeyError):
+                break
+            valid_end += len(line)
+    if valid_end < os.path.getsize(path):
+        with open(path, "r+b") as fout:
+            fout.truncate(valid_end)
+    return done
+
+
+def read_image(path):
+    # np.fromfile + imdecode, 支持非 ascii 路径
+    data = np.fromfile(path, dtype=np.uint8)
+    img = cv2.imdecode(data, cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("cannot decode image")
+    return img
+
+
+def prefetch_images(paths, out_queue, stats):
+    """decode paths in order into out_queue, None marks the end"""
+    for path in paths:
+        start = time.perf_counter()
+        try:
+            item = (path, read_image(path), None)
+        except Exception as e:
+            item = (path, None, e)
+        stats["decode_s"] += time.perf_counter() - start
+        out_queue.put(item)
+    out_queue.put(None)
+
+
+def run_shard(args, process_id):
+    """
+    OCR shard process_id of args.image_dir into its JSONL file
+    return: stats dict of the shard
+    """
+    from .onnx_paddleocr import ONNXPaddleOcr
+
+    total = max(args.total_process_num, 1)
+    output = shard_path(args.output, process_id, total)
+    paths = get_image_file_list(args.image_dir)[process_id::total]
+    done = load_checkpoint(output) if args.resume else set()
+    todo = [path for path in paths if path not in done]
+
+    stats = {
+        "process_id": process_id, "output": output, "images": 0, "errors": 0,
+        "skipped": len(paths) - len(todo), "decode_s": 0.0, "wait_s": 0.0,
+        "ocr_s": 0.0, "write_s": 0.0, "wall_s": 0.0,
+    }
+    if not todo:
+        return stats
+
+    engine_kwargs = {k: v for k, v in vars(args).items() if k not in BATCH_KEYS}
+    engine = ONNXPaddleOcr(**engine_kwargs)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    start = time.perf_counter()
+    # 预取线程解码后续图片, 与推理重叠
+    image_queue = queue.Queue(maxsize=max(args.prefetch, 1))
+    prefetcher = threading.Thread(
+        target=prefetch_images, args=(todo, image_queue, stats), daemon=True
+    )
+    prefetcher.start()
+    with open(output, "a" if args.resume else "w", encoding="utf-8") as fout:
+        while True:
+            wait_start = time.perf_counter()
+            item = image_queue.get()
+            stats["wait_s"] += time.perf_counter() - wait_start
+            if item is None:
+                break
+            path, img, error = item
+            record = {"image": path}
+            if error is None:
+                ocr_start = time.perf_counter()
+                try:
+                    result = engine.ocr(img, cls=args.use_angle_cls)[0]
+                    record["result"] = result or []
+                except Exception as e:
+                    error = e
+                stats["ocr_s"] += time.perf_counter() - ocr_start
+            if error is not None:
+                record["error"] = "{}: {}".format(type(error).__name__, error)
+                stats["errors"] += 1
+
+            write_start = time.perf_counter()
+            fout.write(json.dumps(record, ensure_ascii=False, default=float) + "\n")
+            # 每条结果立即落盘, 中断后可从此处继续
+            fout.flush()
+            stats["write_s"] += time.perf_counter() - write_start
+            stats["images"] += 1
+    stats["wall_s"] = time.perf_counter() - start
+    return stats
+
+
+def run_shard_star(job):
+    return run_shard(*job)
+
+
+def format_stats(stats):
+    images = max(stats["images"], 1)
+    return (
+        "shard {process_id}: {images} images ({skipped} skipped, {errors} errors) "
+        "in {wall_s:.1f}s, {ips:.2f} img/s | per image ms: decode {decode:.1f} "
+        "ocr {ocr:.1f} write {write:.1f} wait {wait:.1f} -> {output}".format(
+            ips=stats["images"] / max(stats["wall_s"], 1e-9),
+            decode=stats["decode_s"] * 1000 / images,
+            ocr=stats["ocr_s"] * 1000 / images,
+            write=stats["write_s"] * 1000 / images,
+            wait=stats["wait_s"] * 1000 / images,
+            **stats
+        )
+    )
+
+
+def build_parser():
+    parser = infer_args()
+    parser.prog = "python -m onnxocr.batch_ocr"
+    parser.add_argument("--output", type=str, default="ocr_results.jsonl",
+                        help="JSONL result file, suffixed .<id>-of-<N> per shard")
+    parser.add_argument("--prefetch", type=int, default=8, help="images decoded ahead of inference")
+    parser.add_argument("--resume", type=str2bool, default=True,
+                        help="skip images already in the output, false starts over")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.image_dir is None:
+        raise SystemExit("--image_dir is required")
+    total = max(args.total_process_num, 1)
+    # 按核数给每个进程分配 ORT 线程, 避免多进程间线程争用
+    if args.cpu_threads <= 0 and total > 1:
+        args.cpu_threads = max((os.cpu_count() or 1) // total, 1)
+
+    start = time.perf_counter()
+    if args.use_mp and total > 1:
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(total) as pool:
+            all_stats = []
+            for stats in pool.imap_unordered(run_shard_star, [(args, i) for i in range(total)]):
+                print(format_stats(stats), flush=True)
+                all_stats.append(stats)
+    else:
+        all_stats = [run_shard(args, args.process_id)]
+        print(format_stats(all_stats[0]), flush=True)
+
+    wall = time.perf_counter() - start
+    images = sum(stats["images"] for stats in all_stats)
+    print("total: {} images ({} skipped, {} errors) in {:.1f}s, {:.2f} img/s".format(
+        images, sum(stats["skipped"] for stats in all_stats),
+        sum(stats["errors"] for stats in all_stats), wall, images / max(wall, 1e-9),
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -22,7 +22,6 @@ from __future__ import print_function
 import numpy as np
 import cv2
 # import paddle
-from shapely.geometry import Polygon
 import pyclipper
 
 
@@ -149,8 +148,12 @@ class DBPostProcess(object):
         return np.array(boxes, dtype="int32"), scores
 
     def unclip(self, box, unclip_ratio):
-        poly = Polygon(box)
-        distance = poly.area * unclip_ratio / poly.length
+        # 多边形面积 (鞋带公式) 和周长, 与 shapely.geometry.Polygon 的 area / length 相同
+        poly = np.asarray(box, dtype=np.float64).reshape(-1, 2)
+        x, y = poly[:, 0], poly[:, 1]
+        area = abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2.0
+        length = np.linalg.norm(poly - np.roll(poly, -1, axis=0), axis=1).sum()
+        distance = area * unclip_ratio / length
         offset = pyclipper.PyclipperOffset()
         offset.AddPath(box, pyclipper.JT_ROUND, pyclipper.ET_CLOSEDPOLYGON)
         expanded = np.array(offset.Execute(distance))
@@ -222,22 +225,33 @@ class DBPostProcess(object):
         # if isinstance(pred, paddle.Tensor):
         #     pred = pred.numpy()
         pred = pred[:, 0, :, :]
-        segmentation = pred > self.thresh
+        if 'mask' in outs_dict:
+            # binarized inside the model by onnxocr.model_tools
+            segmentation = outs_dict['mask'][:, 0, :, :]
+        else:
+            segmentation = pred > self.thresh
 
         boxes_batch = []
         for batch_index in range(pred.shape[0]):
-            src_h, src_w, ratio_h, ratio_w = shape_list[batch_index]
+            src_h, src_w, ratio_h, ratio_w = shape_list[batch_index][:4]
+            batch_pred = pred[batch_index]
+            batch_segmentation = segmentation[batch_index]
+            if len(shape_list[batch_index]) > 4:
+                # letterboxed input: only the valid region maps back to the source
+                valid_h, valid_w = [int(v) for v in shape_list[batch_index][4:6]]
+                batch_pred = batch_pred[:valid_h, :valid_w]
+                batch_segmentation = batch_segmentation[:valid_h, :valid_w]
             if self.dilation_kernel is not None:
                 mask = cv2.dilate(
-                    np.array(segmentation[batch_index]).astype(np.uint8),
+                    np.array(batch_segmentation).astype(np.uint8),
                     self.dilation_kernel)
             else:
-                mask = segmentation[batch_index]
+                mask = batch_segmentation
             if self.box_type == 'poly':
-                boxes, scores = self.polygons_from_bitmap(pred[batch_index],
+                boxes, scores = self.polygons_from_bitmap(batch_pred,
                                                           mask, src_w, src_h)
             elif self.box_type == 'quad':
-                boxes, scores = self.boxes_from_bitmap(pred[batch_index], mask,
+                boxes, scores = self.boxes_from_bitmap(batch_pred, mask,
                                                        src_w, src_h)
             else:
                 raise ValueError("box_type can only be one of ['quad', 'poly']")
@@ -0,0 +1,337 @@
+import hashlib
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from .predict_system import sorted_box_indices
+
+
+def box_iou(a, b):
+    ax0, ay0, ax1, ay1 = a[:, 0].min(), a[:, 1].min(), a[:, 0].max(), a[:, 1].max()
+    bx0, by0, bx1, by1 = b[:, 0].min(), b[:, 1].min(), b[:, 0].max(), b[:, 1].max()
+    iw = min(ax1, bx1) - max(ax0, bx0)
+    ih = min(ay1, by1) - max(ay0, by0)
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return float(inter / ((ax1 - ax0) * (ay1 - ay0) + (bx1 - bx0) * (by1 - by0) - inter))
+
+
+def rects_intersect(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+class CropStore(object):
+    """
+    persistent crop hash -> (text, score) store in a sqlite file, shared
+    across sessions
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS crops (hash TEXT PRIMARY KEY, text TEXT, score REAL)"
+        )
+
+    def get(self, key):
+        row = self.conn.execute("SELECT text, score FROM crops WHERE hash = ?", (key,)).fetchone()
+        return None if row is None else [row[0], row[1]]
+
+    def put_many(self, items):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO crops VALUES (?, ?, ?)",
+            [(key, text, score) for key, (text, score) in items],
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class IncrementalTextSystem(object):
+    """
+    OCR for live streams where most text stays the same between frames:
+    the frame is diffed with the previous one on a tile grid, detection only
+    runs on the dirty regions, boxes outside them keep their tracked result,
+    and recognition only runs on crops whose hash is not cached yet
+    (identical crops of one frame are recognized once)
+
+        inc = IncrementalTextSystem(model, store_path="cache/crops.db")
+        for frame in frames:
+            dt_boxes, rec_res = inc(frame)
+            print(inc.last_stats)
+    """
+
+    def __init__(self, text_system, tile_size=64, diff_thresh=12, cache_size=4096,
+                 store_path=None, track_iou=0.5, cls=True, charset=None):
+        self.text_system = text_system
+        self.text_recognizer = text_system.text_recognizer.get_recognizer(charset)
+        self.use_angle_cls = text_system.use_angle_cls and cls
+        self.tile_size = tile_size
+        self.diff_thresh = diff_thresh
+        self.cache_size = cache_size
+        self.track_iou = track_iou
+        self.cache = OrderedDict()
+        self.store = CropStore(store_path) if store_path else None
+        self.fingerprint = self.model_fingerprint(charset)
+        self.reset()
+
+        self.totals = {
+            "frames": 0, "crops": 0, "reused": 0, "cache_hits": 0,
+            "store_hits": 0, "duplicates": 0, "recognized": 0,
+            "time_s": 0.0, "time_saved_s": 0.0,
+        }
+        self.last_stats = {}
+        # 用于估算节省时间的单次耗时 (滑动平均)
+        self.full_det_time = None
+        self.rec_time_per_crop = None
+
+    def reset(self):
+        """forget the previous frame, the next frame is processed in full"""
+        self.prev_gray = None
+        # 上一帧的文本框, 与识别结果一一对应 (未按 drop_score 过滤)
+        self.prev_boxes = []
+        self.prev_rec = []
+        self.prev_ids = []
+        self.next_id = 0
+
+    def dirty_regions(self, gray):
+        """
+        rects (x0, y0, x1, y1) covering the changed tiles, grown by one tile;
+        None means the whole frame
+        """
+        if self.prev_gray is None or self.prev_gray.shape != gray.shape:
+            return None
+        h, w = gray.shape
+        t = self.tile_size
+        gh, gw = -(-h // t), -(-w // t)
+        diff = cv2.absdiff(gray, self.prev_gray)
+        padded = np.zeros((gh * t, gw * t), dtype=diff.dtype)
+        padded[:h, :w] = diff
+        dirty = padded.reshape(gh, t, gw, t).max(axis=(1, 3)) > self.diff_thresh
+        if not dirty.any():
+            return []
+        dirty = cv2.dilate(dirty.astype(np.uint8), np.ones((3, 3), np.uint8))
+        num, _, stats, _ = cv2.connectedComponentsWithStats(dirty, connectivity=8)
+        regions = []
+        for x, y, rw, rh, _ in stats[1:num]:
+            regions.append([x * t, y * t, min((x + rw) * t, w), min((y + rh) * t, h)])
+        return regions
+
+    def grow_regions(self, regions):
+        """
+        grow regions until no previous box is cut by a region border, merging
+        regions that come to overlap
+        """
+        prev_rects = [
+            (b[:, 0].min(), b[:, 1].min(), b[:, 0].max(), b[:, 1].max()) for b in self.prev_boxes
+        ]
+        changed = True
+        while changed:
+            changed = False
+            for region in regions:
+                for rect in prev_rects:
+                    if rects_intersect(region, rect):
+                        grown = [
+                            min(region[0], int(rect[0])), min(region[1], int(rect[1])),
+                            max(region[2], int(np.ceil(rect[2]))), max(region[3], int(np.ceil(rect[3]))),
+                        ]
+                        if grown != region:
+                            region[:] = grown
+                            changed = True
+            merged = []
+            for region in regions:
+                for other in merged:
+                    if rects_intersect(region, other):
+                        other[:] = [
+                            min(region[0], other[0]), min(region[1], other[1]),
+                            max(region[2], other[2]), max(region[3], other[3]),
+                        ]
+                        changed = True
+                        break
+                else:
+                    merged.append(region)
+            regions = merged
+        return regions
+
+    def model_fingerprint(self, charset):
+        """
+        rec model file (path, mtime, size), charset and cls setting; part of
+        every crop key, so that results of another model, a re-quantized file
+        or another cls setting are never served from the cache or the store
+        """
+        model_files = [self.text_recognizer.rec_model_path]
+        if self.use_angle_cls:
+            model_files.append(self.text_system.text_classifier.cls_model_path)
+        parts = [repr(charset), repr(self.use_angle_cls)]
+        for path in model_files:
+            stat = os.stat(path)
+            parts.append("{}:{}:{}".format(os.path.realpath(path), stat.st_mtime_ns, stat.st_size))
+        return "|".join(parts).encode()
+
+    def crop_key(self, crop):
+        digest = hashlib.blake2b(np.ascontiguousarray(crop).data, digest_size=16)
+        digest.update(str(crop.shape).encode())
+        digest.update(self.fingerprint)
+        return digest.hexdigest()
+
+    def lookup(self, key):
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key], "cache"
+        if self.store is not None:
+            rec_result = self.store.get(key)
+            if rec_result is not None:
+                self.remember(key, rec_result)
+                return rec_result, "store"
+        return None, None
+
+    def remember(self, key, rec_result):
+        self.cache[key] = rec_result
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def detect(self, img, regions):
+        """
+        return: (boxes, rec results or None for boxes to recognize, track ids)
+        """
+        detector = self.text_system.text_detector
+        if regions is None:
+            start = time.perf_counter()
+            dt_boxes = detector(img)
+            elapsed = time.perf_counter() - start
+            self.full_det_time = elapsed if self.full_det_time is None else \
+                0.8 * self.full_det_time + 0.2 * elapsed
+            dt_boxes = [] if dt_boxes is None else list(dt_boxes)
+            return dt_boxes, [None] * len(dt_boxes), self.match_tracks(dt_boxes, [])
+
+        # 脏区域之外的框沿用上一帧的结果
+        boxes, rec_res, ids = [], [], []
+        for box, rec_result, track_id in zip(self.prev_boxes, self.prev_rec, self.prev_ids):
+            rect = (box[:, 0].min(), box[:, 1].min(), box[:, 0].max(), box[:, 1].max())
+            if not any(rects_intersect(region, rect) for region in regions):
+                boxes.append(box)
+                rec_res.append(rec_result)
+                ids.append(track_id)
+
+        new_boxes = []
+        for x0, y0, x1, y1 in regions:
+            dt_boxes = detector(img[y0:y1, x0:x1])
+            if dt_boxes is None:
+                continue
+            offset = np.array([x0, y0], dtype=np.float32)
+            new_boxes += [box + offset for box in dt_boxes]
+        boxes += new_boxes
+        rec_res += [None] * len(new_boxes)
+        ids += self.match_tracks(new_boxes, ids)
+        return boxes, rec_res, ids
+
+    def match_tracks(self, new_boxes, used_ids):
+        """keep the track id of the previous box with the best IoU"""
+        used = set(used_ids)
+        ids = []
+        for box in new_boxes:
+            best_id, best_iou = None, self.track_iou
+            for prev_box, prev_id in zip(self.prev_boxes, self.prev_ids):
+                if prev_id in used:
+                    continue
+                iou = box_iou(box, prev_box)
+                if iou >= best_iou:
+                    best_id, best_iou = prev_id, iou
+            if best_id is None:
+                best_id = self.next_id
+                self.next_id += 1
+            used.add(best_id)
+            ids.append(best_id)
+        return ids
+
+    def __call__(self, img):
+        """
+        return: (dt_boxes, rec_res) like TextSystem.__call__, plus
+        last_stats describing the work that was skipped
+        """
+        start = time.perf_counter()
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+        regions = self.dirty_regions(gray)
+        if regions:
+            regions = self.grow_regions(regions)
+        boxes, rec_res, ids = self.detect(img, regions)
+
+        stats = {
+            "dirty_area": 1.0 if regions is None else
+            float(sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in regions)) / gray.size,
+            "crops": len(boxes),
+            "reused": sum(rec_result is not None for rec_result in rec_res),
+            "cache_hits": 0, "store_hits": 0, "duplicates": 0, "recognized": 0,
+        }
+
+        # 按裁剪图哈希查缓存, 同一帧内相同的裁剪图只识别一次
+        pending = OrderedDict()
+        for index, box in enumerate(boxes):
+            if rec_res[index] is not None:
+                continue
+            crop = self.text_system.crop_boxes(img, [box])[0]
+            key = self.crop_key(crop)
+            rec_result, source = self.lookup(key)
+            if rec_result is not None:
+                rec_res[index] = rec_result
+                stats[source + "_hits"] += 1
+            elif key in pending:
+                pending[key][1].append(index)
+                stats["duplicates"] += 1
+            else:
+                pending[key] = (crop, [index])
+
+        if pending:
+            img_crop_list = [crop for crop, _ in pending.values()]
+            if self.use_angle_cls:
+                img_crop_list, angle_list = self.text_system.classify(img_crop_list)
+            rec_start = time.perf_counter()
+            results = self.text_recognizer(img_crop_list)
+            per_crop = (time.perf_counter() - rec_start) / len(img_crop_list)
+            self.rec_time_per_crop = per_crop if self.rec_time_per_crop is None else \
+                0.8 * self.rec_time_per_crop + 0.2 * per_crop
+            for (key, (_, indices)), rec_result in zip(pending.items(), results):
+                self.remember(key, rec_result)
+                for index in indices:
+                    rec_res[index] = rec_result
+            if self.store is not None:
+                self.store.put_many(zip(pending.keys(), results))
+            stats["recognized"] = len(pending)
+
+        self.prev_gray = gray
+        self.prev_boxes, self.prev_rec, self.prev_ids = boxes, rec_res, ids
+
+        skipped = stats["reused"] + stats["cache_hits"] + stats["store_hits"] + stats["duplicates"]
+        stats["time_s"] = time.perf_counter() - start
+        stats["time_saved_s"] = float(skipped * (self.rec_time_per_crop or 0.0) + \
+            (1 - stats["dirty_area"]) * (self.full_det_time or 0.0))
+        for key in self.totals:
+            if key in stats:
+                self.totals[key] += stats[key]
+        self.totals["frames"] += 1
+        self.last_stats = stats
+
+        order = sorted_box_indices(boxes)
+        return self.text_system.filter_rec_res(
+            [boxes[i] for i in order], [rec_res[i] for i in order]
+        )
+
+    def stats(self):
+        """cumulative counters and hit rates since creation"""
+        totals = dict(self.totals)
+        crops = max(totals["crops"], 1)
+        totals["reuse_rate"] = totals["reused"] / crops
+        totals["cache_hit_rate"] = (totals["cache_hits"] + totals["store_hits"]) / crops
+        totals["recognized_rate"] = totals["recognized"] / crops
+        return totals
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
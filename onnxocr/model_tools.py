@@ -0,0 +1,667 @@
+"""
+模型预处理工具 (model preparation tools)
+
+Rewrites the ppocrv5 onnx graphs so that work done in NumPy after every
+inference is moved into the model itself. The rewritten models carry a
+marker in metadata_props and the predictors pick them up automatically.
+
+    python -m onnxocr.model_tools fold-postprocess --det det.onnx --rec rec.onnx
+    python -m onnxocr.model_tools fold-normalize --det det.onnx --rec rec.onnx --cls cls.onnx
+    python -m onnxocr.model_tools quantize --det det.onnx --rec rec.onnx --cls cls.onnx \
+        --mode both --calib_dir screenshots/
+    python -m onnxocr.model_tools prune-vocab --rec rec.onnx --charset digits
+"""
+import argparse
+import os
+import string
+import tempfile
+
+import cv2
+import numpy as np
+import onnx
+import onnx.version_converter
+from onnx import helper, numpy_helper, TensorProto
+from onnxruntime.quantization import (
+    quantize_dynamic,
+    quantize_static,
+    CalibrationDataReader,
+    QuantFormat,
+    QuantType,
+)
+
+from .predict_base import (
+    FOLD_CTC_KEY,
+    FOLD_DB_KEY,
+    FOLD_NORM_KEY,
+    VOCAB_DICT_KEY,
+    get_model_path,
+)
+from .utils import infer_args, get_image_file_list, get_rotate_crop_image, str2bool
+
+
+def get_meta(model):
+    return {prop.key: prop.value for prop in model.metadata_props}
+
+
+def set_meta(model, key, value):
+    for prop in model.metadata_props:
+        if prop.key == key:
+            prop.value = str(value)
+            return
+    prop = model.metadata_props.add()
+    prop.key = key
+    prop.value = str(value)
+
+
+def get_opset(model):
+    for opset in model.opset_import:
+        if opset.domain in ("", "ai.onnx"):
+            return opset.version
+    return 1
+
+
+def unique_name(model, name):
+    """return a tensor name that is not used anywhere in the graph yet"""
+    used = set()
+    for node in model.graph.node:
+        used.update(node.input)
+        used.update(node.output)
+    used.update(init.name for init in model.graph.initializer)
+    used.update(value.name for value in model.graph.input)
+    used.update(value.name for value in model.graph.output)
+    candidate = name
+    index = 0
+    while candidate in used:
+        index += 1
+        candidate = "{}_{}".format(name, index)
+    return candidate
+
+
+def output_dims(value_info):
+    """copy the dims (dim_value or dim_param) of a graph output"""
+    dims = []
+    for dim in value_info.type.tensor_type.shape.dim:
+        if dim.HasField("dim_value"):
+            dims.append(dim.dim_value)
+        elif dim.HasField("dim_param"):
+            dims.append(dim.dim_param)
+        else:
+            dims.append(None)
+    return dims
+
+
+def fold_ctc_argmax(model):
+    """
+    append ArgMax/ReduceMax over the class axis to the recognition graph.
+    The (B, T, C) probability output is replaced by (B, T) int64 indices
+    and (B, T) float32 probabilities, which is all CTCLabelDecode reads.
+    """
+    if FOLD_CTC_KEY in get_meta(model):
+        return model
+    graph = model.graph
+    probs = graph.output[0]
+    dims = output_dims(probs)
+    assert len(dims) == 3, "rec model output must be (B, T, C), got {}".format(dims)
+
+    index_name = unique_name(model, "ctc_index")
+    prob_name = unique_name(model, "ctc_prob")
+    # ArgMax 默认返回第一个最大值, 与 np.argmax 一致
+    graph.node.append(
+        helper.make_node(
+            "ArgMax", [probs.name], [index_name], axis=2, keepdims=0
+        )
+    )
+    if get_opset(model) >= 18:
+        axes_name = unique_name(model, "ctc_axes")
+        graph.initializer.append(
+            numpy_helper.from_array(np.array([2], dtype=np.int64), axes_name)
+        )
+        graph.node.append(
+            helper.make_node(
+                "ReduceMax", [probs.name, axes_name], [prob_name], keepdims=0
+            )
+        )
+    else:
+        graph.node.append(
+            helper.make_node(
+                "ReduceMax", [probs.name], [prob_name], axes=[2], keepdims=0
+            )
+        )
+
+    del graph.output[:]
+    graph.output.extend(
+        [
+            helper.make_tensor_value_info(index_name, TensorProto.INT64, dims[:2]),
+            helper.make_tensor_value_info(prob_name, probs.type.tensor_type.elem_type, dims[:2]),
+        ]
+    )
+    set_meta(model, FOLD_CTC_KEY, "1")
+    return model
+
+
+def fold_db_threshold(model, thresh=0.3):
+    """
+    append Greater/Cast to the detection graph so that the binarized map used
+    by DBPostProcess comes out of the model as a uint8 mask next to the
+    probability map (the map is still needed for box scores).
+    """
+    meta = get_meta(model)
+    if FOLD_DB_KEY in meta:
+        if abs(float(meta[FOLD_DB_KEY]) - thresh) < 1e-6:
+            return model
+        # 已折叠但阈值不同, 只改常量
+        for init in model.graph.initializer:
+            if init.name == meta.get(FOLD_DB_KEY + ".const"):
+                init.CopyFrom(
+                    numpy_helper.from_array(np.array(thresh, dtype=np.float32), init.name)
+                )
+        set_meta(model, FOLD_DB_KEY, thresh)
+        return model
+
+    graph = model.graph
+    maps = graph.output[0]
+    dims = output_dims(maps)
+    assert len(dims) == 4, "det model output must be (B, 1, H, W), got {}".format(dims)
+
+    thresh_name = unique_name(model, "db_thresh")
+    binary_name = unique_name(model, "db_binary")
+    mask_name = unique_name(model, "db_mask")
+    # float32 阈值, 与 numpy 中 float32 数组和 python float 比较的结果一致
+    graph.initializer.append(
+        numpy_helper.from_array(np.array(thresh, dtype=np.float32), thresh_name)
+    )
+    graph.node.append(
+        helper.make_node("Greater", [maps.name, thresh_name], [binary_name])
+    )
+    graph.node.append(
+        helper.make_node("Cast", [binary_name], [mask_name], to=TensorProto.UINT8)
+    )
+    graph.output.append(
+        helper.make_tensor_value_info(mask_name, TensorProto.UINT8, dims)
+    )
+    set_meta(model, FOLD_DB_KEY, thresh)
+    set_meta(model, FOLD_DB_KEY + ".const", thresh_name)
+    return model
+
+
+# 与 predict_det/predict_rec/predict_cls 中的 numpy 预处理保持相同的运算顺序,
+# 这样 float32 结果逐位一致
+NORM_STEPS = {
+    # NormalizeImage: (img * scale - mean) / std
+    "det": [
+        ("Mul", np.float32(1.0 / 255.0)),
+        ("Sub", np.array([0.485, 0.456, 0.406], dtype=np.float32).reshape(1, 1, 1, 3)),
+        ("Div", np.array([0.229, 0.224, 0.225], dtype=np.float32).reshape(1, 1, 1, 3)),
+    ],
+    # resize_norm_img: img / 255, -= 0.5, /= 0.5
+    "rec": [
+        ("Div", np.float32(255)),
+        ("Sub", np.float32(0.5)),
+        ("Div", np.float32(0.5)),
+    ],
+}
+NORM_STEPS["cls"] = NORM_STEPS["rec"]
+
+
+def make_unsqueeze(model, data, axes, output):
+    if get_opset(model) >= 13:
+        axes_name = unique_name(model, output + "_axes")
+        model.graph.initializer.append(
+            numpy_helper.from_array(np.array(axes, dtype=np.int64), axes_name)
+        )
+        return helper.make_node("Unsqueeze", [data, axes_name], [output])
+    return helper.make_node("Unsqueeze", [data], [output], axes=axes)
+
+
+def fold_normalize(model, kind):
+    """
+    prepend Cast + normalization + NHWC->NCHW Transpose to a det/rec/cls graph.
+    The new first input is a uint8 (N, H, W, C) image. rec/cls get a second
+    int64 (N,) input holding the width of each image before right padding;
+    padded columns are zeroed after normalization, like the zero padding of
+    resize_norm_img.
+    """
+    assert kind in NORM_STEPS, "kind must be one of {}".format(list(NORM_STEPS))
+    if FOLD_NORM_KEY in get_meta(model):
+        return model
+    assert get_opset(model) >= 11, "fold-normalize needs opset >= 11"
+
+    graph = model.graph
+    float_input = graph.input[0]
+    n, c, h, w = output_dims(float_input)
+    image_name = unique_name(model, "image")
+    nodes = []
+    new_inputs = [
+        helper.make_tensor_value_info(image_name, TensorProto.UINT8, [n, h, w, c])
+    ]
+
+    current = unique_name(model, "image_float")
+    nodes.append(helper.make_node("Cast", [image_name], [current], to=TensorProto.FLOAT))
+    for index, (op_type, value) in enumerate(NORM_STEPS[kind]):
+        prefix = "norm_{}_{}".format(index, op_type.lower())
+        const_name = unique_name(model, prefix + "_const")
+        graph.initializer.append(numpy_helper.from_array(np.asarray(value), const_name))
+        output = unique_name(model, prefix)
+        nodes.append(helper.make_node(op_type, [current, const_name], [output]))
+        current = output
+
+    if kind in ("rec", "cls"):
+        width_name = unique_name(model, "valid_width")
+        new_inputs.append(
+            helper.make_tensor_value_info(width_name, TensorProto.INT64, [n])
+        )
+        names = {
+            key: unique_name(model, "pad_" + key)
+            for key in ["shape", "w", "range", "cols", "widths", "valid", "mask", "zero", "out"]
+        }
+        consts = {
+            "w_index": np.array(2, dtype=np.int64),
+            "start": np.array(0, dtype=np.int64),
+            "delta": np.array(1, dtype=np.int64),
+        }
+        for key, value in consts.items():
+            names[key] = unique_name(model, "pad_" + key)
+            graph.initializer.append(numpy_helper.from_array(value, names[key]))
+        graph.initializer.append(
+            numpy_helper.from_array(np.array(0, dtype=np.float32), names["zero"])
+        )
+        nodes += [
+            helper.make_node("Shape", [image_name], [names["shape"]]),
+            helper.make_node("Gather", [names["shape"], names["w_index"]], [names["w"]], axis=0),
+            helper.make_node("Range", [names["start"], names["w"], names["delta"]], [names["range"]]),
+            make_unsqueeze(model, names["range"], [0], names["cols"]),
+            make_unsqueeze(model, width_name, [1], names["widths"]),
+            # (N, W): 列号 < 有效宽度
+            helper.make_node("Less", [names["cols"], names["widths"]], [names["valid"]]),
+            make_unsqueeze(model, names["valid"], [1, 3], names["mask"]),
+            helper.make_node("Where", [names["mask"], current, names["zero"]], [names["out"]]),
+        ]
+        current = names["out"]
+
+    # 转置的输出沿用原输入名, 原图其余部分无需改动
+    nodes.append(
+        helper.make_node("Transpose", [current], [float_input.name], perm=[0, 3, 1, 2])
+    )
+
+    old_nodes = list(graph.node)
+    del graph.node[:]
+    graph.node.extend(nodes + old_nodes)
+    other_inputs = [value for value in graph.input if value.name != float_input.name]
+    del graph.input[:]
+    graph.input.extend(new_inputs + other_inputs)
+    set_meta(model, FOLD_NORM_KEY, kind)
+    return model
+
+
+def constants_to_initializers(model):
+    """
+    paddle2onnx exports weights as Constant nodes; the ORT quantizer only
+    quantizes weights stored as initializers
+    """
+    graph = model.graph
+    nodes = []
+    for node in graph.node:
+        if (
+            node.op_type == "Constant"
+            and len(node.attribute) == 1
+            and node.attribute[0].name == "value"
+        ):
+            tensor = onnx.TensorProto()
+            tensor.CopyFrom(node.attribute[0].t)
+            tensor.name = node.output[0]
+            graph.initializer.append(tensor)
+        else:
+            nodes.append(node)
+    del graph.node[:]
+    graph.node.extend(nodes)
+    return model
+
+
+class FeedCalibrationReader(CalibrationDataReader):
+    """
+    CalibrationDataReader over input feeds; make_feeds() returns a new
+    generator of the feeds, called again on rewind
+    """
+
+    def __init__(self, make_feeds):
+        self.make_feeds = make_feeds
+        self.feeds = iter(make_feeds())
+
+    def get_next(self):
+        return next(self.feeds, None)
+
+    def rewind(self):
+        self.feeds = iter(self.make_feeds())
+
+
+def calibration_feeds(kind, args, image_list, max_num):
+    """
+    input feeds for static quantization, built with the fp32 predictors so
+    they see exactly what inference will see: whole screenshots for det,
+    single text crops (cut with the fp32 det model) for rec and cls
+    """
+    from .predict_det import TextDetector
+    from .predict_rec import TextRecognizer
+    from .predict_cls import TextClassifier
+
+    detector = TextDetector(args)
+    if kind == "rec":
+        predictor = TextRecognizer(args)
+    elif kind == "cls":
+        predictor = TextClassifier(args)
+
+    num = 0
+    for image_file in image_list:
+        img = cv2.imread(image_file)
+        if img is None:
+            continue
+        if kind == "det":
+            det_img, _ = detector.preprocess(img)
+            if det_img is None:
+                continue
+            yield detector.get_input_feed(detector.det_input_name, det_img)
+            num += 1
+        else:
+            dt_boxes = detector(img)
+            # 预处理失败时检测器返回 (None, 0)
+            if not isinstance(dt_boxes, np.ndarray):
+                continue
+            for box in dt_boxes:
+                crop = get_rotate_crop_image(img, box.astype(np.float32))
+                yield predictor.get_batch_feed([crop])
+                num += 1
+                if num >= max_num:
+                    break
+        if num >= max_num:
+            break
+
+
+def quantize_model(kind, model_path, mode, args, weight_type="QUInt8",
+                   calib_list=None, calib_num=64):
+    """
+    write <model>_int8_dynamic.onnx or <model>_int8_static.onnx next to model_path
+    """
+    output_path = get_model_path(model_path, "int8_" + mode)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        prepared_path = os.path.join(tmp_dir, os.path.basename(model_path))
+        model = constants_to_initializers(onnx.load(model_path))
+        if mode == "static" and get_opset(model) < 13:
+            # per-channel 的 DequantizeLinear(axis) 需要 opset 13
+            model = onnx.version_converter.convert_version(model, 13)
+        onnx.save(model, prepared_path)
+        if mode == "dynamic":
+            quantize_dynamic(
+                prepared_path,
+                output_path,
+                weight_type=getattr(QuantType, weight_type),
+            )
+        else:
+            assert calib_list, "static quantization needs --calib_dir"
+            reader = FeedCalibrationReader(
+                lambda: calibration_feeds(kind, args, calib_list, calib_num)
+            )
+            quantize_static(
+                prepared_path,
+                output_path,
+                reader,
+                quant_format=QuantFormat.QDQ,
+                per_channel=True,
+                activation_type=QuantType.QUInt8,
+                weight_type=QuantType.QInt8,
+            )
+    print("saved:", output_path)
+    return output_path
+
+
+# prune-vocab --charset 预设
+PRUNE_CHARSETS = {
+    "digits": string.digits,
+    "number": string.digits + "+-.,:/%",
+    "alnum": string.digits + string.ascii_letters,
+    "latin": string.digits + string.ascii_letters + string.punctuation + " ",
+}
+
+# 从输出往回找最后一层投影时可以直接穿过的算子
+PASS_THROUGH_OPS = {"Softmax", "Identity", "Transpose", "Reshape", "Squeeze", "Unsqueeze"}
+
+
+def load_character(character_dict_path, use_space_char=True):
+    """same character list as CTCLabelDecode: blank + dict lines (+ space)"""
+    character = ["blank"]
+    with open(character_dict_path, "rb") as fin:
+        for line in fin.readlines():
+            character.append(line.decode("utf-8").strip("\n").strip("\r\n"))
+    if use_space_char:
+        character.append(" ")
+    return character
+
+
+def find_output_projection(model, num_classes):
+    """
+    walk back from the (B, T, C) output to the MatMul(+Add) that produces
+    the C logits; return (matmul_node, add_node or None, reshape_nodes)
+    """
+    producers = {}
+    for node in model.graph.node:
+        for output in node.output:
+            producers[output] = node
+    initializers = {init.name: init for init in model.graph.initializer}
+
+    def weight_of(node):
+        for name in node.input:
+            if name in initializers:
+                return name, numpy_helper.to_array(initializers[name])
+        return None, None
+
+    add_node = None
+    reshape_nodes = []
+    tensor = model.graph.output[0].name
+    while tensor in producers:
+        node = producers[tensor]
+        if node.op_type in PASS_THROUGH_OPS:
+            if node.op_type == "Reshape":
+                reshape_nodes.append(node)
+            tensor = node.input[0]
+        elif node.op_type == "Add" and add_node is None:
+            _, bias = weight_of(node)
+            assert bias is not None and bias.shape[-1] == num_classes, (
+                "unexpected Add before the rec output"
+            )
+            add_node = node
+            tensor = [name for name in node.input if name not in initializers][0]
+        elif node.op_type in ("MatMul", "Gemm"):
+            _, weight = weight_of(node)
+            assert weight is not None and num_classes in weight.shape, (
+                "unexpected {} before the rec output".format(node.op_type)
+            )
+            return node, add_node, reshape_nodes
+        else:
+            break
+    raise ValueError("cannot find the output projection of the rec model")
+
+
+def prune_vocab(model, character, allowed):
+    """
+    keep only the logits of the allowed characters (and the CTC blank) in the
+    last projection of the rec model. Softmax is then taken over the kept
+    classes only, i.e. recognition is restricted to the allowed charset.
+    return: the pruned model and its character list without the blank
+    """
+    meta = get_meta(model)
+    assert FOLD_CTC_KEY not in meta, "run prune-vocab before fold-postprocess"
+    assert VOCAB_DICT_KEY not in meta, "model is already pruned"
+    model = constants_to_initializers(model)
+    num_classes = len(character)
+    keep = [0] + [
+        index for index, char in enumerate(character) if index > 0 and char in allowed
+    ]
+    missing = set(allowed) - set(character[index] for index in keep)
+    if missing:
+        print("not in the dictionary, ignored:", "".join(sorted(missing)))
+
+    matmul, add, reshape_nodes = find_output_projection(model, num_classes)
+    initializers = {init.name: init for init in model.graph.initializer}
+
+    def replace(name, array):
+        initializers[name].CopyFrom(numpy_helper.from_array(array, name))
+
+    for name in matmul.input:
+        if name in initializers:
+            weight = numpy_helper.to_array(initializers[name])
+            # MatMul: (D, C); Gemm transB=1: (C, D)
+            axis = list(weight.shape).index(num_classes)
+            replace(name, np.take(weight, keep, axis=axis))
+    if add is not None:
+        for name in add.input:
+            if name in initializers:
+                bias = numpy_helper.to_array(initializers[name])
+                replace(name, np.take(bias, keep, axis=-1))
+    for node in reshape_nodes:
+        if node.input[1] in initializers:
+            shape = numpy_helper.to_array(initializers[node.input[1]]).copy()
+            shape[shape == num_classes] = len(keep)
+            replace(node.input[1], shape)
+
+    dims = model.graph.output[0].type.tensor_type.shape.dim
+    if len(dims) and dims[-1].HasField("dim_value"):
+        dims[-1].dim_value = len(keep)
+    # 旧的形状标注里还是原来的类别数
+    del model.graph.value_info[:]
+    return model, [character[index] for index in keep[1:]]
+
+
+def save_model(model, path):
+    onnx.checker.check_model(model)
+    onnx.save(model, path)
+    print("saved:", path)
+
+
+def cmd_fold_postprocess(args):
+    if args.det:
+        model = fold_db_threshold(onnx.load(args.det), args.det_db_thresh)
+        save_model(model, args.det_out or args.det)
+    if args.rec:
+        model = fold_ctc_argmax(onnx.load(args.rec))
+        save_model(model, args.rec_out or args.rec)
+
+
+def cmd_fold_normalize(args):
+    for kind in ["det", "rec", "cls"]:
+        path = getattr(args, kind)
+        if path:
+            model = fold_normalize(onnx.load(path), kind)
+            save_model(model, getattr(args, kind + "_out") or path)
+
+
+def cmd_quantize(args):
+    infer = infer_args().parse_args([])
+    infer.use_gpu = False
+    infer.det_model_dir = args.calib_det or args.det or infer.det_model_dir
+    infer.rec_model_dir = args.rec or infer.rec_model_dir
+    infer.cls_model_dir = args.cls or infer.cls_model_dir
+
+    modes = ["dynamic", "static"] if args.mode == "both" else [args.mode]
+    calib_list = get_image_file_list(args.calib_dir) if "static" in modes else None
+    for kind in ["det", "rec", "cls"]:
+        model_path = getattr(args, kind)
+        if not model_path:
+            continue
+        for mode in modes:
+            quantize_model(
+                kind, model_path, mode, infer,
+                weight_type=args.weight_type,
+                calib_list=calib_list,
+                calib_num=args.calib_num,
+            )
+
+
+def cmd_prune_vocab(args):
+    if args.charset in PRUNE_CHARSETS:
+        allowed = PRUNE_CHARSETS[args.charset]
+    elif os.path.isfile(args.charset):
+        # 文本文件, 例如每行一个需要识别的词
+        with open(args.charset, "r", encoding="utf-8") as fin:
+            allowed = fin.read().replace("\n", "").replace("\r", "")
+    else:
+        allowed = args.charset
+    name = args.name or (args.charset if args.charset in PRUNE_CHARSETS else "custom")
+
+    root, ext = os.path.splitext(args.rec)
+    model_path = args.rec_out or "{}_{}{}".format(root, name, ext)
+    dict_path = os.path.splitext(model_path)[0] + "_dict.txt"
+
+    character = load_character(args.rec_char_dict_path, args.use_space_char)
+    model, kept = prune_vocab(onnx.load(args.rec), character, set(allowed))
+    set_meta(model, VOCAB_DICT_KEY, os.path.basename(dict_path))
+    # 每行一个字符, 空格也单独占一行, 加载时不再追加空格
+    with open(dict_path, "w", encoding="utf-8") as fout:
+        fout.write("\n".join(kept) + "\n")
+    print("classes: {} -> {}".format(len(character), len(kept) + 1))
+    print("saved:", dict_path)
+    save_model(model, model_path)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m onnxocr.model_tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fold = subparsers.add_parser(
+        "fold-postprocess",
+        help="fold CTC argmax/max into rec and DB thresholding into det",
+    )
+    fold.add_argument("--det", type=str, help="det.onnx to rewrite")
+    fold.add_argument("--rec", type=str, help="rec.onnx to rewrite")
+    fold.add_argument("--det_out", type=str, help="default: overwrite --det")
+    fold.add_argument("--rec_out", type=str, help="default: overwrite --rec")
+    fold.add_argument("--det_db_thresh", type=float, default=0.3)
+    fold.set_defaults(func=cmd_fold_postprocess)
+
+    norm = subparsers.add_parser(
+        "fold-normalize",
+        help="fold uint8 -> float normalization and HWC->CHW into det/rec/cls",
+    )
+    for kind in ["det", "rec", "cls"]:
+        norm.add_argument("--" + kind, type=str, help="{}.onnx to rewrite".format(kind))
+        norm.add_argument("--{}_out".format(kind), type=str, help="default: overwrite --" + kind)
+    norm.set_defaults(func=cmd_fold_normalize)
+
+    quant = subparsers.add_parser(
+        "quantize",
+        help="write int8 variants next to det/rec/cls, select them with --precision",
+    )
+    quant.add_argument("--det", type=str, help="fp32 det.onnx")
+    quant.add_argument("--rec", type=str, help="fp32 rec.onnx")
+    quant.add_argument("--cls", type=str, help="fp32 cls.onnx")
+    quant.add_argument("--mode", type=str, default="dynamic", choices=["dynamic", "static", "both"])
+    quant.add_argument("--weight_type", type=str, default="QUInt8", choices=["QInt8", "QUInt8"],
+                       help="weight type of dynamic quantization")
+    quant.add_argument("--calib_dir", type=str, help="screenshots used to calibrate static models")
+    quant.add_argument("--calib_num", type=int, default=64, help="max calibration samples per model")
+    quant.add_argument("--calib_det", type=str,
+                       help="fp32 det model that cuts rec/cls calibration crops, default: --det")
+    quant.set_defaults(func=cmd_quantize)
+
+    defaults = infer_args().parse_args([])
+    prune = subparsers.add_parser(
+        "prune-vocab",
+        help="keep only the rec output classes of a character set",
+    )
+    prune.add_argument("--rec", type=str, required=True, help="rec.onnx (before fold-postprocess)")
+    prune.add_argument("--charset", type=str, required=True,
+                       help="one of {}, a text file, or the characters themselves".format(
+                           sorted(PRUNE_CHARSETS)))
+    prune.add_argument("--name", type=str, help="charset name, default: the preset name")
+    prune.add_argument("--rec_out", type=str, help="default: rec_<name>.onnx next to --rec")
+    prune.add_argument("--rec_char_dict_path", type=str, default=defaults.rec_char_dict_path)
+    prune.add_argument("--use_space_char", type=str2bool, default=defaults.use_space_char)
+    prune.set_defaults(func=cmd_prune_vocab)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
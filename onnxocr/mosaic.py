@@ -0,0 +1,101 @@
+import math
+
+import numpy as np
+
+from .predict_system import sorted_boxes
+
+
+def pack_shelves(sizes, max_width, gutter=16):
+    """
+    shelf packing: slots (image plus gutter on every side) are placed left
+    to right by decreasing height, a new shelf starts when a row is full
+    args:
+        sizes: list of (h, w)
+        max_width: canvas width limit, widened to the widest slot if needed
+    return: (positions (x, y) of every image, canvas (h, w) in multiples of 32)
+    """
+    slots = [(h + 2 * gutter, w + 2 * gutter) for h, w in sizes]
+    width = max([max_width] + [w for _, w in slots])
+    positions = [None] * len(sizes)
+    shelf_y = shelf_h = x = 0
+    for index in sorted(range(len(sizes)), key=lambda i: -slots[i][0]):
+        slot_h, slot_w = slots[index]
+        if x + slot_w > width:
+            shelf_y += shelf_h
+            x = shelf_h = 0
+        positions[index] = (x + gutter, shelf_y + gutter)
+        x += slot_w
+        shelf_h = max(shelf_h, slot_h)
+    canvas_w = max(p[0] + s[1] + gutter for p, s in zip(positions, sizes)) if sizes else 32
+    canvas_h = shelf_y + shelf_h
+    return positions, (int(math.ceil(canvas_h / 32.) * 32), int(math.ceil(canvas_w / 32.) * 32))
+
+
+def mosaic_layout(sizes, limit_side_len, gutter=16):
+    """
+    canvas close to a square and not wider than limit_side_len, so that the
+    detector does not shrink it, see pack_shelves
+    """
+    area = sum((h + 2 * gutter) * (w + 2 * gutter) for h, w in sizes)
+    max_width = min(int(math.sqrt(area) * 1.2), int(limit_side_len))
+    return pack_shelves(sizes, max_width, gutter)
+
+
+def border_value(img):
+    """median color of the image border, used to fill the gutters"""
+    border = np.concatenate([img[0], img[-1], img[:, 0], img[:, -1]])
+    return np.median(border, axis=0).astype(img.dtype)
+
+
+def ocr_mosaic(text_system, img_list, gutter=16, cls=True, charset=None):
+    """
+    OCR many small images with a single detection: the images are packed
+    into one canvas separated by gutters filled with their border color, the
+    canvas is detected once, every box is assigned to the image holding its
+    center and the crops of all images are recognized together
+    return: list of (dt_boxes, rec_res) in the order of img_list, boxes in
+    the coordinates of their own image
+    """
+    if not img_list:
+        return []
+    sizes = [img.shape[:2] for img in img_list]
+    positions, (canvas_h, canvas_w) = mosaic_layout(
+        sizes, int(text_system.args.det_limit_side_len), gutter
+    )
+
+    canvas = np.zeros((canvas_h, canvas_w, 3), dtype=np.uint8)
+    for img, (x, y), (h, w) in zip(img_list, positions, sizes):
+        canvas[
+            max(y - gutter, 0) : y + h + gutter, max(x - gutter, 0) : x + w + gutter
+        ] = border_value(img)
+        canvas[y : y + h, x : x + w] = img
+
+    dt_boxes = text_system.text_detector(canvas)
+    owner_boxes = [[] for _ in img_list]
+    if dt_boxes is not None:
+        for box in dt_boxes:
+            cx, cy = box[:, 0].mean(), box[:, 1].mean()
+            for index, ((x, y), (h, w)) in enumerate(zip(positions, sizes)):
+                if x <= cx < x + w and y <= cy < y + h:
+                    local = box - np.array([x, y], dtype=box.dtype)
+                    local[:, 0] = np.clip(local[:, 0], 0, w - 1)
+                    local[:, 1] = np.clip(local[:, 1], 0, h - 1)
+                    owner_boxes[index].append(local)
+                    break
+
+    img_crop_list = []
+    for index, img in enumerate(img_list):
+        if owner_boxes[index]:
+            owner_boxes[index] = sorted_boxes(np.array(owner_boxes[index]))
+            img_crop_list += text_system.crop_boxes(img, owner_boxes[index])
+
+    if text_system.use_angle_cls and cls and img_crop_list:
+        img_crop_list, angle_list = text_system.classify(img_crop_list)
+    rec_res = text_system.text_recognizer(img_crop_list, charset=charset)
+
+    results = []
+    beg = 0
+    for boxes in owner_boxes:
+        results.append(text_system.filter_rec_res(boxes, rec_res[beg : beg + len(boxes)]))
+        beg += len(boxes)
+    return results
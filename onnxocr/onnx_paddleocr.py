@@ -1,20 +1,27 @@
 import time
 
 from .predict_system import TextSystem
-from .utils import infer_args as init_args
-from .utils import str2bool, draw_ocr
+from .pipeline import PipelinedTextSystem
+from .text_search import search_text
+from .mosaic import ocr_mosaic
+from .utils import default_args, draw_ocr
 import argparse
 import sys
 
 
+class OCRResult(list):
+    """
+    result list of ocr() / ocr_batch(); with benchmark=True, stats holds the
+    timing.OCRStats of the call
+    """
+
+    stats = None
+
+
 class ONNXPaddleOcr(TextSystem):
     def __init__(self, **kwargs):
         # 默认参数
-        parser = init_args()
-        inference_args_dict = {}
-        for action in parser._actions:
-            inference_args_dict[action.dest] = action.default
-        params = argparse.Namespace(**inference_args_dict)
+        params = argparse.Namespace(**default_args())
 
         # params.rec_image_shape = "3, 32, 320"
         params.rec_image_shape = "3, 48, 320"
@@ -25,38 +32,154 @@ class ONNXPaddleOcr(TextSystem):
         # 初始化模型
         super().__init__(params)
 
-    def ocr(self, img, det=True, rec=True, cls=True):
+    def ocr(self, img, det=True, rec=True, cls=True, charset=None, text_height=None):
+        """
+        text_height: approximate text height in pixels of img, picks the
+        detection scale instead of det_limit_side_len (see det_limit_type adaptive)
+        """
         if cls == True and self.use_angle_cls == False:
             pass
 
         if det and rec:
             ocr_res = []
-            dt_boxes, rec_res = self.__call__(img, cls)
+            dt_boxes, rec_res = self.__call__(
+                img, cls, charset=charset, text_height=text_height
+            )
+            if dt_boxes is None:
+                return self.with_stats([None])
             tmp_res = [[box.tolist(), res] for box, res in zip(dt_boxes, rec_res)]
             ocr_res.append(tmp_res)
-            return ocr_res
+            return self.with_stats(ocr_res)
         elif det and not rec:
             ocr_res = []
-            dt_boxes = self.text_detector(img)
+            dt_boxes = self.record(self.text_detector, img, text_height)
             tmp_res = [box.tolist() for box in dt_boxes]
             ocr_res.append(tmp_res)
-            return ocr_res
+            return self.with_stats(ocr_res)
         else:
-            ocr_res = []
-            cls_res = []
+            return self.with_stats(self.record(self.ocr_crops, img, cls, rec, charset))
 
-            if not isinstance(img, list):
-                img = [img]
-            if self.use_angle_cls and cls:
-                img, cls_res_tmp = self.text_classifier(img)
-                if not rec:
-                    cls_res.append(cls_res_tmp)
-            rec_res = self.text_recognizer(img)
-            ocr_res.append(rec_res)
+    def ocr_crops(self, img, cls=True, rec=True, charset=None):
+        # 不检测, 直接分类 / 识别已裁剪的文本行
+        ocr_res = []
+        cls_res = []
 
+        if not isinstance(img, list):
+            img = [img]
+        if self.use_angle_cls and cls:
+            img, cls_res_tmp = self.classify(img)
             if not rec:
-                return cls_res
+                cls_res.append(cls_res_tmp)
+        rec_res = self.text_recognizer(img, charset=charset)
+        ocr_res.append(rec_res)
+
+        if not rec:
+            return cls_res
+        return ocr_res
+
+    def ocr_batch(self, img_list, cls=True, charset=None):
+        """
+        OCR a list of images with shared detection and recognition batches
+        return: one [[box, (text, score)], ...] list per image, i.e.
+        ocr_batch(imgs)[i] == ocr(imgs[i])[0]
+        """
+        ocr_res = []
+        for dt_boxes, rec_res in self.batch(img_list, cls, charset=charset):
+            if dt_boxes is None:
+                ocr_res.append(None)
+                continue
+            tmp_res = [[box.tolist(), res] for box, res in zip(dt_boxes, rec_res)]
+            ocr_res.append(tmp_res)
+        return self.with_stats(ocr_res)
+
+    def with_stats(self, ocr_res):
+        if not self.benchmark:
             return ocr_res
+        ocr_res = OCRResult(ocr_res)
+        ocr_res.stats = self.last_stats
+        return ocr_res
+
+    def timing_summary(self, percentiles=(50, 90, 99)):
+        """
+        rolling per-stage percentiles (ms) of the last calls, see
+        timing.StatsWindow.summary and timing.format_summary
+        """
+        return self.stats_window.summary(percentiles)
+
+    def profile(self, images, models=("det", "rec", "cls"), num_calls=20, warmup=1,
+                output_dir="./inference_results/ort_profile", tag="", cpu_threads=None, cls=True):
+        """
+        run ocr() num_calls times over images with the ORT profiler on for the
+        selected models, see ort_profile.profile_engine
+        return: {model: per-operator / per-node summary}
+        """
+        from .ort_profile import profile_engine
+
+        return profile_engine(self, images, models, num_calls, warmup, output_dir, tag,
+                              cpu_threads, cls=cls)
+
+    def ocr_iter(self, img, cls=True, charset=None):
+        """
+        streaming variant of ocr(): yield (box, text, score) in reading order
+        as each recognition batch completes; stop iterating (or close the
+        generator) to cancel the remaining batches. With benchmark=True the
+        stats of the call are in last_stats once the iteration ends
+        """
+        results = self.record_iter(self.iter_results(img, cls, charset=charset))
+        for box, (text, score) in results:
+            yield box.tolist(), text, score
+
+    def ocr_many(self, img_list, cls=True, charset=None, gutter=16):
+        """
+        OCR many small images (e.g. ROIs of one screenshot) with a single
+        detection over a packed mosaic, see mosaic.ocr_mosaic
+        return: one [[box, (text, score)], ...] list per image, boxes in the
+        coordinates of their own image
+        """
+        ocr_res = []
+        for dt_boxes, rec_res in self.record(ocr_mosaic, self, img_list, gutter, cls, charset):
+            ocr_res.append([[box.tolist(), res] for box, res in zip(dt_boxes, rec_res)])
+        return self.with_stats(ocr_res)
+
+    def has_text(self, img, probe_side_len=320, std_thresh=4.0):
+        """
+        detection-only probe, see TextDetector.has_text; with benchmark=True
+        the stats of the call are in last_stats
+        return: (has_text, max text probability)
+        """
+        return self.record(self.text_detector.has_text, img, probe_side_len, std_thresh)
+
+    def find_text(self, img, pattern, mode="exact", hint=None, batch_size=4,
+                  cls=True, charset=None, fuzzy_thresh=0.8):
+        """
+        detect img and recognize candidate boxes only until one matches
+        pattern (mode: exact / regex / fuzzy), see text_search.search_text
+        return: [box, (text, score)] or None; with benchmark=True the stats of
+        the call are in last_stats
+        """
+        found = self.record(
+            search_text, self, img, pattern, mode, hint, batch_size, cls, charset, fuzzy_thresh
+        )
+        if found is None:
+            return None
+        box, text, score = found
+        return self.with_stats([box.tolist(), (text, score)])
+
+    def ocr_pipeline(self, frames, cls=True, charset=None, queue_size=2, text_height=None):
+        """
+        OCR a stream of frames with PipelinedTextSystem, overlapping the
+        stages of consecutive frames; text_height as in ocr()
+        yield: one [[box, (text, score)], ...] list per frame, in order; with
+        benchmark=True every list carries the stats of its frame
+        """
+        self.pipeline = PipelinedTextSystem(
+            self, queue_size, cls=cls, charset=charset, text_height=text_height
+        )
+        for dt_boxes, rec_res in self.pipeline.run(frames):
+            if dt_boxes is None:
+                yield None
+                continue
+            yield self.with_stats([[box.tolist(), res] for box, res in zip(dt_boxes, rec_res)])
 
 
 def sav2Img(org_img, result, name="draw_ocr.jpg"):
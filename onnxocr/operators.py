@@ -31,6 +31,34 @@ class NormalizeImage(object):
         return data
 
 
+def estimate_text_height(img, max_width=512, strips=4, min_run=2):
+    """
+    estimate the height of the smaller text lines from an edge-density
+    profile: rows with many horizontal-gradient edges form runs, one run per
+    text line, measured independently in a few vertical strips
+    return: text height in pixels of img, None if no text-like rows
+    """
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    scale = min(1., float(max_width) / gray.shape[1])
+    if scale < 1:
+        # 只缩小宽度, 保留行方向的分辨率
+        gray = cv2.resize(gray, (max(int(gray.shape[1] * scale), 1), gray.shape[0]),
+                          interpolation=cv2.INTER_AREA)
+    edges = np.abs(np.diff(gray.astype(np.int16), axis=1)) > 40
+    runs = []
+    strip_w = max(edges.shape[1] // strips, 1)
+    for x in range(0, edges.shape[1], strip_w):
+        profile = edges[:, x:x + strip_w].sum(axis=1)
+        active = np.concatenate(
+            [[False], profile > max(2, 0.03 * strip_w), [False]]).astype(np.int8)
+        change = np.flatnonzero(np.diff(active))
+        lengths = change[1::2] - change[0::2]
+        runs.extend(lengths[lengths >= min_run].tolist())
+    if not runs:
+        return None
+    return float(np.percentile(runs, 25))
+
+
 class DetResizeForTest(object):
     def __init__(self, **kwargs):
         super(DetResizeForTest, self).__init__()
@@ -44,22 +72,36 @@ class DetResizeForTest(object):
         elif 'limit_side_len' in kwargs:
             self.limit_side_len = kwargs['limit_side_len']
             self.limit_type = kwargs.get('limit_type', 'min')
+            # limit_type 'adaptive' 或传入 text_height 时, 按文字高度选择缩放比例
+            self.min_text_height = kwargs.get('min_text_height', 16)
+            self.max_side_len = kwargs.get('max_side_len', 2560)
         elif 'resize_long' in kwargs:
             self.resize_type = 2
             self.resize_long = kwargs.get('resize_long', 960)
         else:
             self.limit_side_len = 736
             self.limit_type = 'min'
+        if kwargs.get('buckets'):
+            # letterbox into a fixed set of (h, w) canvases, see resize_image_type3
+            self.resize_type = 3
+            self.buckets = sorted(kwargs['buckets'], key=lambda x: x[0] * x[1])
 
     def __call__(self, data):
         img = data['image']
         src_h, src_w, _ = img.shape
+        if self.resize_type == 3:
+            img, [ratio_h, ratio_w], [valid_h, valid_w] = self.resize_image_type3(img, data.get('text_height'))
+            data['image'] = img
+            # 多出的 valid_h, valid_w 为画布中有效区域的大小, 后处理只在该区域内找框
+            data['shape'] = np.array([src_h, src_w, ratio_h, ratio_w, valid_h, valid_w])
+            return data
+
         if sum([src_h, src_w]) < 64:
             img = self.image_padding(img)
 
         if self.resize_type == 0:
             # img, shape = self.resize_image_type0(img)
-            img, [ratio_h, ratio_w] = self.resize_image_type0(img)
+            img, [ratio_h, ratio_w] = self.resize_image_type0(img, data.get('text_height'))
         elif self.resize_type == 2:
             img, [ratio_h, ratio_w] = self.resize_image_type2(img)
         else:
@@ -88,11 +130,27 @@ class DetResizeForTest(object):
         # return img, np.array([ori_h, ori_w])
         return img, [ratio_h, ratio_w]
 
-    def resize_image_type0(self, img):
+    def adaptive_ratio(self, img, text_height=None):
+        """
+        smallest scale that keeps text_height (estimated when not given) at
+        least min_text_height pixels, with the long side capped at
+        max_side_len; falls back to limit_side_len 'max' without text
+        """
+        h, w = img.shape[:2]
+        if text_height is None:
+            text_height = estimate_text_height(img)
+        if not text_height:
+            return min(1., float(self.limit_side_len) / max(h, w))
+        ratio = float(self.min_text_height) / text_height
+        return min(ratio, float(self.max_side_len) / max(h, w))
+
+    def resize_image_type0(self, img, text_height=None):
         """
         resize image to a size multiple of 32 which is required by the network
         args:
             img(array): array with shape [h, w, c]
+            text_height(float): text height hint in pixels, used instead of
+                the estimate of the 'adaptive' limit type
         return(tuple):
             img, (ratio_h, ratio_w)
         """
@@ -100,7 +158,9 @@ class DetResizeForTest(object):
         h, w, c = img.shape
 
         # limit the max side
-        if self.limit_type == 'max':
+        if self.limit_type == 'adaptive' or text_height is not None:
+            ratio = self.adaptive_ratio(img, text_height)
+        elif self.limit_type == 'max':
             if max(h, w) > limit_side_len:
                 if h > w:
                     ratio = float(limit_side_len) / h
@@ -160,6 +220,46 @@ class DetResizeForTest(object):
 
         return img, [ratio_h, ratio_w]
 
+    def resize_image_type3(self, img, text_height=None):
+        """
+        letterbox the image into the smallest bucket that holds it after the
+        limit_side_len scaling (or the 'adaptive' / text_height scaling); the
+        image is only resized when the limit requires it or when it does not
+        fit into the largest bucket
+        return(tuple):
+            canvas, (ratio_h, ratio_w), (valid_h, valid_w)
+        """
+        h, w, c = img.shape
+        ratio = 1.
+        if self.limit_type == 'adaptive' or text_height is not None:
+            ratio = self.adaptive_ratio(img, text_height)
+        elif self.limit_type == 'max' and max(h, w) > self.limit_side_len:
+            ratio = float(self.limit_side_len) / max(h, w)
+        elif self.limit_type == 'min' and min(h, w) < self.limit_side_len:
+            ratio = float(self.limit_side_len) / min(h, w)
+        elif self.limit_type == 'resize_long':
+            ratio = float(self.limit_side_len) / max(h, w)
+        resize_h = max(int(h * ratio), 1)
+        resize_w = max(int(w * ratio), 1)
+
+        for bucket_h, bucket_w in self.buckets:
+            if resize_h <= bucket_h and resize_w <= bucket_w:
+                break
+        else:
+            # 放不进任何画布, 缩小到能容纳它的最大比例
+            bucket_h, bucket_w = max(
+                self.buckets, key=lambda x: min(x[0] / resize_h, x[1] / resize_w))
+            scale = min(bucket_h / resize_h, bucket_w / resize_w)
+            resize_h = max(min(int(resize_h * scale), bucket_h), 1)
+            resize_w = max(min(int(resize_w * scale), bucket_w), 1)
+
+        if (resize_h, resize_w) != (h, w):
+            img = cv2.resize(img, (resize_w, resize_h))
+        canvas = np.zeros((bucket_h, bucket_w, c), dtype=img.dtype)
+        canvas[:resize_h, :resize_w] = img
+        return canvas, [resize_h / float(h), resize_w / float(w)], [resize_h, resize_w]
+
+
 class ToCHWImage(object):
     """ convert hwc image to chw image
     """
@@ -0,0 +1,328 @@
+"""
+算子级耗时分析 (ORT profiler report of the det / rec / cls models)
+
+ORT only profiles sessions created with enable_profiling, so the selected
+models get dedicated profiling sessions (same model file, providers and
+thread setting, outside the session registry) for the duration of the run;
+the engine's own sessions are restored afterwards.
+
+    engine = ONNXPaddleOcr(use_gpu=False)
+    summaries = engine.profile(imgs, models=("det", "rec"), num_calls=20)
+    print(format_summary(summaries["det"]))
+
+    python -m onnxocr.ort_profile run --image_dir imgs/ --models det,rec --num_calls 20
+    python -m onnxocr.ort_profile compare a.summary.json b.summary.json
+
+For every model ORT writes its trace to output_dir/<tag>_<model>_<time>.json;
+the summary is saved next to it as .summary.json and .summary.txt, with the
+model path and thread setting, so two runs (another model, precision or
+--cpu_threads) can be compared with the compare subcommand.
+"""
+import argparse
+import collections
+import json
+import os
+import sys
+import time
+
+import onnxruntime
+
+from .predict_base import create_session
+
+# 模型名 -> (TextSystem 上的预测器属性, 会话属性, 模型路径参数)
+MODELS = {
+    "det": ("text_detector", "det_onnx_session", "det_model_dir"),
+    "rec": ("text_recognizer", "rec_onnx_session", "rec_model_dir"),
+    "cls": ("text_classifier", "cls_onnx_session", "cls_model_dir"),
+}
+KERNEL_SUFFIX = "_kernel_time"
+
+
+class CountingSession(object):
+    """forwards to the profiling session and counts the runs"""
+
+    def __init__(self, session):
+        self.session = session
+        self.runs = 0
+
+    def run(self, *args, **kwargs):
+        self.runs += 1
+        return self.session.run(*args, **kwargs)
+
+    def run_with_iobinding(self, *args, **kwargs):
+        self.runs += 1
+        return self.session.run_with_iobinding(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
+def format_shapes(type_shapes):
+    """[{"float": [1, 3, 48, 320]}, ...] -> "float[1,3,48,320] int64[3]" """
+    return " ".join(
+        "{}[{}]".format(dtype, ",".join(str(d) for d in dims))
+        for item in type_shapes for dtype, dims in item.items()
+    )
+
+
+def summarize(events, skip_runs=0, max_shapes=4):
+    """
+    per-operator and per-node summary of ORT profile events; kernels of the
+    first skip_runs model runs (warmup) are left out
+    return: {"runs", "run_total_us", "run_mean_us", "kernel_total_us",
+    "ops": [...], "nodes": [...]}, ops and nodes sorted by total time
+    """
+    runs = sorted(
+        (e for e in events if e.get("cat") == "Session" and e.get("name") == "model_run"),
+        key=lambda e: e["ts"],
+    )
+    cutoff = None
+    if skip_runs and len(runs) > skip_runs:
+        cutoff = runs[skip_runs - 1]["ts"] + runs[skip_runs - 1]["dur"]
+        runs = runs[skip_runs:]
+
+    nodes = collections.OrderedDict()
+    for e in events:
+        if e.get("cat") != "Node" or not e.get("name", "").endswith(KERNEL_SUFFIX):
+            continue
+        if cutoff is not None and e["ts"] < cutoff:
+            continue
+        args = e.get("args", {})
+        name = e["name"][: -len(KERNEL_SUFFIX)]
+        node = nodes.get(name)
+        if node is None:
+            node = nodes[name] = {
+                "node": name, "op": args.get("op_name", "?"), "provider": args.get("provider", ""),
+                "calls": 0, "total_us": 0, "input_shapes": [], "output_shapes": [],
+            }
+        node["calls"] += 1
+        node["total_us"] += e["dur"]
+        # 动态输入 (rec 宽度, det 画布) 每个节点保留前几种形状
+        for key, shapes in (("input_shapes", "input_type_shape"), ("output_shapes", "output_type_shape")):
+            shape = format_shapes(args.get(shapes, []))
+            if shape not in node[key] and len(node[key]) < max_shapes:
+                node[key].append(shape)
+
+    kernel_total = sum(node["total_us"] for node in nodes.values())
+    ops = collections.OrderedDict()
+    for node in nodes.values():
+        node["mean_us"] = node["total_us"] / node["calls"]
+        node["share"] = node["total_us"] / kernel_total if kernel_total else 0.0
+        op = ops.setdefault(node["op"], {"op": node["op"], "nodes": 0, "calls": 0, "total_us": 0})
+        op["nodes"] += 1
+        op["calls"] += node["calls"]
+        op["total_us"] += node["total_us"]
+    for op in ops.values():
+        op["mean_us"] = op["total_us"] / op["calls"]
+        op["share"] = op["total_us"] / kernel_total if kernel_total else 0.0
+
+    run_total = sum(e["dur"] for e in runs)
+    return {
+        "runs": len(runs),
+        "run_total_us": run_total,
+        "run_mean_us": run_total / len(runs) if runs else 0.0,
+        "kernel_total_us": kernel_total,
+        "ops": sorted(ops.values(), key=lambda op: -op["total_us"]),
+        "nodes": sorted(nodes.values(), key=lambda node: -node["total_us"]),
+    }
+
+
+def summarize_file(path, skip_runs=0):
+    with open(path, "r", encoding="utf-8") as fin:
+        events = json.load(fin)
+    # 旧版本 ORT 输出 {"traceEvents": [...]}
+    if isinstance(events, dict):
+        events = events.get("traceEvents", [])
+    return summarize(events, skip_runs)
+
+
+def format_summary(summary, top=20):
+    meta = summary.get("meta", {})
+    lines = []
+    if meta:
+        lines.append("{} {} | {} | cpu_threads {} | ort {}".format(
+            meta.get("model"), meta.get("model_path"), ",".join(meta.get("providers", [])),
+            meta.get("cpu_threads"), meta.get("ort_version"),
+        ))
+    lines.append("runs {}, run mean {:.3f} ms, kernels {:.1f}% of run time".format(
+        summary["runs"], summary["run_mean_us"] / 1000,
+        100.0 * summary["kernel_total_us"] / summary["run_total_us"] if summary["run_total_us"] else 0.0,
+    ))
+    lines.append("")
+    lines.append("{:<24}{:>7}{:>8}{:>12}{:>11}{:>8}".format("op", "nodes", "calls", "total ms", "mean us", "share"))
+    for op in summary["ops"][:top]:
+        lines.append("{:<24}{:>7}{:>8}{:>12.3f}{:>11.1f}{:>7.1f}%".format(
+            op["op"], op["nodes"], op["calls"], op["total_us"] / 1000, op["mean_us"], 100 * op["share"],
+        ))
+    lines.append("")
+    lines.append("{:<40}{:<18}{:>8}{:>12}{:>11}{:>8}  {}".format(
+        "node", "op", "calls", "total ms", "mean us", "share", "input shapes"))
+    for node in summary["nodes"][:top]:
+        lines.append("{:<40}{:<18}{:>8}{:>12.3f}{:>11.1f}{:>7.1f}%  {}".format(
+            node["node"][-40:], node["op"], node["calls"], node["total_us"] / 1000,
+            node["mean_us"], 100 * node["share"], " | ".join(node["input_shapes"]),
+        ))
+    return "\n".join(lines)
+
+
+def format_compare(summaries, names=None, top=20):
+    """side by side total ms and share per operator of several summaries"""
+    names = names or ["#{}".format(i) for i in range(len(summaries))]
+    totals = collections.defaultdict(float)
+    for summary in summaries:
+        for op in summary["ops"]:
+            totals[op["op"]] += op["total_us"]
+    lines = ["{:<24}".format("op") + "".join("{:>22}".format(name[-20:]) for name in names)]
+    lines.append("{:<24}".format("run mean ms") + "".join(
+        "{:>22.3f}".format(summary["run_mean_us"] / 1000) for summary in summaries
+    ))
+    for name in sorted(totals, key=lambda k: -totals[k])[:top]:
+        cells = []
+        for summary in summaries:
+            op = next((op for op in summary["ops"] if op["op"] == name), None)
+            if op is None:
+                cells.append("{:>22}".format("-"))
+                continue
+            # 各次运行调用次数可能不同, 按每次 run 的平均耗时比较
+            per_run = op["total_us"] / 1000 / max(summary["runs"], 1)
+            cells.append("{:>13.3f} {:>7.1f}%".format(per_run, 100 * op["share"]))
+        lines.append("{:<24}".format(name) + "".join(cells))
+    lines.append("(ms per run and share of kernel time)")
+    return "\n".join(lines)
+
+
+def save_summary(summary, trace_path):
+    """write trace.summary.json and trace.summary.txt next to the trace"""
+    root = os.path.splitext(trace_path)[0]
+    with open(root + ".summary.json", "w", encoding="utf-8") as fout:
+        json.dump(summary, fout, ensure_ascii=False, indent=1)
+    with open(root + ".summary.txt", "w", encoding="utf-8") as fout:
+        fout.write(format_summary(summary, top=50) + "\n")
+    return root + ".summary.json"
+
+
+def profile_engine(engine, images, models=("det", "rec", "cls"), num_calls=20, warmup=1,
+                   output_dir="./inference_results/ort_profile", tag="", cpu_threads=None, **ocr_kwargs):
+    """
+    run engine.ocr over images (cycled) num_calls times with ORT profiling on
+    for the selected models
+    cpu_threads: thread setting of the profiling sessions, default the
+    engine's --cpu_threads
+    return: {model: summary}, summary["meta"]["summary_path"] is the saved file
+    """
+    args = engine.args
+    cpu_threads = args.cpu_threads if cpu_threads is None else cpu_threads
+    os.makedirs(output_dir, exist_ok=True)
+    images = list(images) if isinstance(images, (list, tuple)) else [images]
+    assert images, "no images to profile"
+
+    swapped = {}
+    saved_bindings = None
+    try:
+        for model in models:
+            predictor_attr, session_attr, path_attr = MODELS[model]
+            predictor = getattr(engine, predictor_attr, None)
+            if predictor is None:
+                # 未加载 cls 等模型时跳过
+                continue
+            old_session = getattr(predictor, session_attr)
+            model_path = predictor.resolve_model_path(getattr(args, path_attr), args.precision)
+            providers = list(zip(old_session.get_providers(), [
+                old_session.get_provider_options()[name] for name in old_session.get_providers()
+            ]))
+            prefix = os.path.join(output_dir, "_".join(p for p in (tag, model) if p))
+            session = CountingSession(create_session(model_path, providers, cpu_threads, profile_prefix=prefix))
+            swapped[model] = (predictor, session_attr, old_session, session, model_path)
+            setattr(predictor, session_attr, session)
+            if model == "det":
+                # 固定画布的 io binding 绑定在原会话上
+                saved_bindings, predictor.bucket_bindings = predictor.bucket_bindings, {}
+
+        for i in range(warmup):
+            engine.ocr(images[i % len(images)], **ocr_kwargs)
+        warmup_runs = {model: item[3].runs for model, item in swapped.items()}
+        start = time.perf_counter()
+        for i in range(num_calls):
+            engine.ocr(images[i % len(images)], **ocr_kwargs)
+        elapsed = time.perf_counter() - start
+    finally:
+        for model, (predictor, session_attr, old_session, session, _) in swapped.items():
+            setattr(predictor, session_attr, old_session)
+            if model == "det":
+                predictor.bucket_bindings = saved_bindings
+
+    summaries = {}
+    for model, (_, _, old_session, session, model_path) in swapped.items():
+        trace_path = session.end_profiling()
+        summary = summarize_file(trace_path, skip_runs=warmup_runs[model])
+        summary["meta"] = {
+            "model": model, "model_path": os.path.abspath(model_path), "precision": args.precision,
+            "providers": session.get_providers(), "cpu_threads": cpu_threads,
+            "ort_version": onnxruntime.__version__, "ocr_calls": num_calls, "warmup_calls": warmup,
+            "ocr_mean_ms": elapsed / max(num_calls, 1) * 1000, "tag": tag, "trace_path": trace_path,
+        }
+        summary["meta"]["summary_path"] = save_summary(summary, trace_path)
+        summaries[model] = summary
+    return summaries
+
+
+def build_run_parser():
+    from .utils import infer_args
+
+    parser = infer_args()
+    parser.prog = "python -m onnxocr.ort_profile run"
+    parser.add_argument("--models", type=str, default="det,rec,cls")
+    parser.add_argument("--num_calls", type=int, default=20)
+    parser.add_argument("--warmup_calls", type=int, default=1)
+    parser.add_argument("--profile_dir", type=str, default="./inference_results/ort_profile")
+    parser.add_argument("--tag", type=str, default="", help="prefix of the trace files, e.g. int8_t4")
+    parser.add_argument("--top", type=int, default=20)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["run"]:
+        import cv2
+
+        from .onnx_paddleocr import ONNXPaddleOcr
+        from .utils import get_image_file_list
+
+        parser = build_run_parser()
+        args = parser.parse_args(argv[1:])
+        run_keys = ["models", "num_calls", "warmup_calls", "profile_dir", "tag", "top"]
+        engine = ONNXPaddleOcr(**{k: v for k, v in vars(args).items() if k not in run_keys})
+        images = [cv2.imread(path) for path in get_image_file_list(args.image_dir)]
+        images = [img for img in images if img is not None]
+        summaries = profile_engine(
+            engine, images, [m for m in args.models.split(",") if m], args.num_calls,
+            args.warmup_calls, args.profile_dir, args.tag, cls=args.use_angle_cls,
+        )
+        for summary in summaries.values():
+            print(format_summary(summary, args.top))
+            print("saved", summary["meta"]["summary_path"])
+            print()
+    elif argv[:1] == ["compare"]:
+        parser = argparse.ArgumentParser(prog="python -m onnxocr.ort_profile compare")
+        parser.add_argument("summaries", nargs="+", help=".summary.json files or ORT trace .json files")
+        parser.add_argument("--top", type=int, default=20)
+        args = parser.parse_args(argv[1:])
+        summaries = []
+        for path in args.summaries:
+            if path.endswith(".summary.json"):
+                with open(path, "r", encoding="utf-8") as fin:
+                    summaries.append(json.load(fin))
+            else:
+                summaries.append(summarize_file(path))
+        names = [
+            "{} t{}".format("_".join(p for p in (s["meta"]["tag"], s["meta"]["model"]) if p), s["meta"]["cpu_threads"])
+            if "meta" in s else os.path.basename(path)
+            for s, path in zip(summaries, args.summaries)
+        ]
+        print(format_compare(summaries, names, args.top))
+    else:
+        raise SystemExit("usage: python -m onnxocr.ort_profile {run,compare} ...")
+
+
+if __name__ == "__main__":
+    main()
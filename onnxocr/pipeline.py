@@ -0,0 +1,236 @@
+import queue
+import threading
+import time
+
+from .predict_system import sorted_boxes
+from .timing import OCRStats, count, recording, stage
+
+# 流水线结束标记
+_END = object()
+
+
+class PipelinedTextSystem(object):
+    """
+    streaming OCR engine: every stage runs in its own worker thread and the
+    stages are connected by bounded queues, so detection of frame N+1
+    overlaps recognition of frame N. ORT releases the GIL while running, so
+    the inference stages overlap with the python pre/post processing.
+
+        engine = PipelinedTextSystem(text_system, queue_size=2)
+        for dt_boxes, rec_res in engine.run(frames):
+            ...
+        print(engine.stats())
+    """
+
+    STAGES = ["preprocess", "det", "crop", "rec", "decode"]
+
+    def __init__(self, text_system, queue_size=2, cls=True, charset=None, text_height=None):
+        self.text_system = text_system
+        self.text_detector = text_system.text_detector
+        self.text_recognizer = text_system.text_recognizer
+        if charset is not None:
+            self.text_recognizer = self.text_recognizer.charset_recognizers[charset]
+        self.use_angle_cls = text_system.use_angle_cls and cls
+        self.text_height = text_height
+        self.queue_size = queue_size
+
+        self.queues = []
+        self.busy = {name: 0.0 for name in self.STAGES}
+        self.items = {name: 0 for name in self.STAGES}
+        self.max_depths = []
+        self.start_time = None
+        self.end_time = None
+
+    def stats(self):
+        """
+        queue depths and per-stage utilization (busy time / wall time) of the
+        current or last run; the stage with utilization close to 1 is the
+        bottleneck
+        """
+        if self.start_time is None:
+            return {}
+        end_time = self.end_time or time.perf_counter()
+        elapsed = max(end_time - self.start_time, 1e-9)
+        stages = {}
+        for name in self.STAGES:
+            stages[name] = {
+                "items": self.items[name],
+                "busy_s": self.busy[name],
+                "utilization": self.busy[name] / elapsed,
+            }
+        return {
+            "elapsed_s": elapsed,
+            "frames": self.items["decode"],
+            "fps": self.items["decode"] / elapsed,
+            "stages": stages,
+            "queue_depths": [q.qsize() for q in self.queues],
+            "max_queue_depths": list(self.max_depths),
+        }
+
+    # 各阶段处理函数, 输入输出都是同一个 item 字典
+    def preprocess(self, item):
+        if self.text_detector.use_tiling(item["img"]):
+            # 分块检测整体放在 det 阶段, 与 ocr() 的文本框一致
+            item["det_img"] = item["img"]
+            item["tiled"] = True
+            return item
+        with stage("det_preprocess"):
+            item["det_img"], item["shape_list"] = self.text_detector.preprocess(
+                item["img"], self.text_height
+            )
+        return item
+
+    def det(self, item):
+        if item["det_img"] is None:
+            return item
+        if item.get("tiled"):
+            item["dt_boxes"] = self.text_detector.detect_tiled(item["det_img"])
+            return item
+        with stage("det_infer"):
+            item["det_outputs"] = self.text_detector.run(item["det_img"])
+        return item
+
+    def crop(self, item):
+        if item["det_img"] is None:
+            return item
+        img = item["img"]
+        if item.get("tiled"):
+            dt_boxes = item.pop("dt_boxes")
+        else:
+            with stage("det_postprocess"):
+                dt_boxes = self.text_detector.postprocess(
+                    item.pop("det_outputs"), item["shape_list"], [img.shape]
+                )[0]
+        count("boxes", len(dt_boxes))
+        dt_boxes = sorted_boxes(dt_boxes)
+        img_crop_list = self.text_system.crop_boxes(img, dt_boxes)
+        if self.use_angle_cls and img_crop_list:
+            img_crop_list, angle_list = self.text_system.classify(img_crop_list)
+
+        item["dt_boxes"] = dt_boxes
+        item["rec_num"] = len(img_crop_list)
+        with stage("rec_preprocess"):
+            item["rec_feeds"] = [
+                (batch_indices, self.text_recognizer.get_batch_feed(img_batch))
+                for batch_indices, img_batch in self.text_recognizer.get_batches(img_crop_list)
+            ]
+        count("rec_batches", len(item["rec_feeds"]))
+        return item
+
+    def rec(self, item):
+        if item["det_img"] is None:
+            return item
+        with stage("rec_infer"):
+            item["rec_outputs"] = [
+                (batch_indices, self.text_recognizer.run(input_feed))
+                for batch_indices, input_feed in item.pop("rec_feeds")
+            ]
+        return item
+
+    def decode(self, item):
+        if item["det_img"] is None:
+            item["result"] = (None, None)
+            return item
+        rec_res = [["", 0.0]] * item["rec_num"]
+        with stage("rec_decode"):
+            for batch_indices, outputs in item.pop("rec_outputs"):
+                for index, rec_result in zip(batch_indices, self.text_recognizer.postprocess(outputs)):
+                    rec_res[index] = rec_result
+        item["result"] = self.text_system.filter_rec_res(item["dt_boxes"], rec_res)
+        return item
+
+    def _put(self, out_q, item, stop):
+        while not stop.is_set():
+            try:
+                out_q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _feed(self, frames, out_q, stop):
+        try:
+            for seq, img in enumerate(frames):
+                item = {"seq": seq, "img": img}
+                if self.text_system.benchmark:
+                    item["stats"] = OCRStats()
+                if not self._put(out_q, item, stop):
+                    return
+        except Exception as e:
+            self._put(out_q, {"seq": -1, "error": e}, stop)
+        self._put(out_q, _END, stop)
+
+    def _work(self, index, name, func, in_q, out_q, stop):
+        while not stop.is_set():
+            try:
+                item = in_q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            depth = min(in_q.qsize() + 1, self.queue_size)
+            self.max_depths[index] = max(self.max_depths[index], depth)
+            if item is not _END and "error" not in item:
+                start = time.perf_counter()
+                try:
+                    stats = item.get("stats")
+                    if stats is None:
+                        item = func(item)
+                    else:
+                        # 各阶段在不同线程, 分别记录到该帧的 stats, total 为各阶段耗时之和
+                        with recording(stats):
+                            item = func(item)
+                except Exception as e:
+                    item["error"] = e
+                self.busy[name] += time.perf_counter() - start
+                self.items[name] += 1
+            if not self._put(out_q, item, stop) or item is _END:
+                return
+
+    def run(self, frames):
+        """
+        frames: iterable of BGR images
+        yield: (dt_boxes, rec_res) per frame, in input order; an exception
+        raised by any stage is re-raised here and stops the pipeline
+        """
+        self.queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.STAGES) + 1)]
+        self.busy = {name: 0.0 for name in self.STAGES}
+        self.items = {name: 0 for name in self.STAGES}
+        self.max_depths = [0] * len(self.STAGES)
+        self.start_time = time.perf_counter()
+        self.end_time = None
+
+        stop = threading.Event()
+        threads = [
+            threading.Thread(
+                target=self._feed, args=(frames, self.queues[0], stop), daemon=True
+            )
+        ]
+        for index, name in enumerate(self.STAGES):
+            threads.append(
+                threading.Thread(
+                    target=self._work,
+                    args=(index, name, getattr(self, name),
+                          self.queues[index], self.queues[index + 1], stop),
+                    name="ocr-" + name,
+                    daemon=True,
+                )
+            )
+        for thread in threads:
+            thread.start()
+
+        out_q = self.queues[-1]
+        try:
+            while True:
+                item = out_q.get()
+                if item is _END:
+                    break
+                if "error" in item:
+                    raise item["error"]
+                if "stats" in item:
+                    self.text_system.add_stats(item["stats"])
+                yield item["result"]
+        finally:
+            # 提前退出或出错时通知所有线程停止
+            stop.set()
+            for thread in threads:
+                thread.join()
+            self.end_time = time.perf_counter()
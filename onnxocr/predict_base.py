@@ -1,22 +1,153 @@
+import os
+import threading
+import time
+import weakref
+
 import onnxruntime
 
+# model_tools 写入模型 metadata_props 的标记, 预测器据此自动切换输入/输出格式
+FOLD_CTC_KEY = "onnxocr.fold_ctc"
+FOLD_DB_KEY = "onnxocr.fold_db"
+FOLD_NORM_KEY = "onnxocr.fold_norm"
+# 裁剪词表后的 rec 模型, 值为与模型同目录的字典文件名
+VOCAB_DICT_KEY = "onnxocr.vocab_dict"
+
+# --precision 可选值, 量化模型由 python -m onnxocr.model_tools quantize 生成
+PRECISIONS = ("fp32", "int8_dynamic", "int8_static")
+
+
+def get_model_path(model_dir, precision="fp32"):
+    """
+    det.onnx -> det_int8_dynamic.onnx / det_int8_static.onnx
+    """
+    assert precision in PRECISIONS, "precision must be one of {}, got: {}".format(
+        PRECISIONS, precision
+    )
+    if precision == "fp32":
+        return model_dir
+    root, ext = os.path.splitext(model_dir)
+    return "{}_{}{}".format(root, precision, ext)
+
+
+def create_session(model_path, providers, cpu_threads=0, profile_prefix=None):
+    # cpu_threads > 0 时限制 ORT 线程数, 多进程时每个进程分配一部分核心
+    sess_options = None
+    if cpu_threads and cpu_threads > 0:
+        sess_options = onnxruntime.SessionOptions()
+        sess_options.intra_op_num_threads = cpu_threads
+        sess_options.inter_op_num_threads = 1
+    # 开启 ORT profiler, end_profiling() 时写出 <profile_prefix>_<时间>.json
+    if profile_prefix:
+        sess_options = sess_options or onnxruntime.SessionOptions()
+        sess_options.enable_profiling = True
+        sess_options.profile_file_prefix = profile_prefix
+    return onnxruntime.InferenceSession(model_path, sess_options, providers=providers)
+
+
+class SessionRegistry(object):
+    """
+    process-wide ORT sessions keyed by model file and session options:
+    predictors created with the same model and options share one session
+    (and its weights and prepacked buffers) instead of each loading a copy.
+    Sessions are reference counted by their predictors and evicted once they
+    have been unused for idle_timeout seconds
+    """
+
+    def __init__(self, idle_timeout=0.0):
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        # key -> [session, 引用数, 空闲开始时间]
+        self.entries = {}
+
+    def make_key(self, model_path, providers, cpu_threads=0):
+        # 模型文件被替换 (如重新量化) 后不复用旧会话
+        stat = os.stat(model_path)
+        return (os.path.realpath(model_path), stat.st_mtime_ns, stat.st_size,
+                repr(providers), cpu_threads)
+
+    def acquire(self, key, create):
+        """session for key, created by create() when not loaded yet"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = [create(), 0, None]
+            entry[1] += 1
+            entry[2] = None
+            self.evict_idle()
+            return entry[0]
+
+    def release(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return
+            entry[1] -= 1
+            if entry[1] <= 0:
+                entry[2] = time.monotonic()
+            self.evict_idle()
+
+    def evict_idle(self, max_idle=None):
+        max_idle = self.idle_timeout if max_idle is None else max_idle
+        now = time.monotonic()
+        for key in [k for k, (_, refs, since) in self.entries.items()
+                    if refs <= 0 and now - since >= max_idle]:
+            del self.entries[key]
+
+    def evict(self):
+        """drop every unused session now"""
+        with self.lock:
+            self.evict_idle(0)
+
+    def stats(self):
+        with self.lock:
+            return [{"model": key[0], "refs": refs, "idle": since is not None}
+                    for key, (_, refs, since) in self.entries.items()]
+
+
+session_registry = SessionRegistry()
+
+
 class PredictBase(object):
     def __init__(self):
         pass
 
-    def get_onnx_session(self, model_dir, use_gpu, gpu_id = 0):
+    def get_onnx_session(self, model_dir, use_gpu, gpu_id = 0, cpu_threads = 0, share = True):
         # 使用gpu
         if use_gpu:
             providers =[('CUDAExecutionProvider',{"cudnn_conv_algo_search": "DEFAULT","device_id": gpu_id}),'CPUExecutionProvider']
         else:
             providers =['CPUExecutionProvider']
 
-        onnx_session = onnxruntime.InferenceSession(model_dir, None,providers=providers)
+        if not share:
+            return create_session(model_dir, providers, cpu_threads)
+        # 相同模型和参数的预测器共用一个会话, 预测器回收时释放引用
+        key = session_registry.make_key(model_dir, providers, cpu_threads)
+        onnx_session = session_registry.acquire(
+            key, lambda: create_session(model_dir, providers, cpu_threads)
+        )
+        weakref.finalize(self, session_registry.release, key)
 
         # print("providers:", onnxruntime.get_device())
         return onnx_session
 
 
+    def resolve_model_path(self, model_dir, precision="fp32"):
+        model_path = get_model_path(model_dir, precision)
+        if precision != "fp32" and not os.path.exists(model_path):
+            raise FileNotFoundError(
+                "{} not found, create it with: python -m onnxocr.model_tools "
+                "quantize --mode {}".format(model_path, precision.split("_")[-1])
+            )
+        return model_path
+
+    def get_model_meta(self, onnx_session):
+        """
+        custom metadata written into the model by onnxocr.model_tools
+        :param onnx_session:
+        :return: dict
+        """
+        return dict(onnx_session.get_modelmeta().custom_metadata_map)
+
     def get_output_name(self, onnx_session):
         """
         output_name = onnx_session.get_outputs()[0].name
@@ -1,10 +1,10 @@
 import cv2
-import copy
 import numpy as np
 import math
 
 from .cls_postprocess import ClsPostProcess
-from .predict_base import PredictBase
+from .timing import count
+from .predict_base import PredictBase, FOLD_NORM_KEY
 
 
 class TextClassifier(PredictBase):
@@ -15,11 +15,57 @@ class TextClassifier(PredictBase):
         self.postprocess_op = ClsPostProcess(label_list=args.label_list)
 
         # 初始化模型
-        self.cls_onnx_session = self.get_onnx_session(args.cls_model_dir, args.use_gpu, gpu_id = args.gpu_id)
+        self.cls_model_path = self.resolve_model_path(args.cls_model_dir, args.precision)
+        self.cls_onnx_session = self.get_onnx_session(self.cls_model_path, args.use_gpu, gpu_id = args.gpu_id, cpu_threads = args.cpu_threads, share = args.share_sessions)
         self.cls_input_name = self.get_input_name(self.cls_onnx_session)
         self.cls_output_name = self.get_output_name(self.cls_onnx_session)
+        # 模型已折叠了归一化, 输入为 uint8 的 NHWC 图像和每张图的有效宽度
+        self.cls_norm_folded = FOLD_NORM_KEY in self.get_model_meta(self.cls_onnx_session)
+        # 预分配的 batch 输入缓冲, 每个 batch 取前 n 张复用
+        self.batch_buffer = None
+
+        # 宽高比门限: w/h 小于 cls_min_aspect 的短文本不做方向分类 (0 为关闭)
+        self.cls_min_aspect = getattr(args, "cls_min_aspect", 0)
+        # 方向先验: 前 cls_prior_frames 次调用都没有旋转的文本时, 之后只每隔
+        # cls_recheck_interval 次调用分类一次, 一旦发现旋转文本恢复每次分类 (0 为关闭)
+        self.cls_prior_frames = getattr(args, "cls_prior_frames", 0)
+        self.cls_recheck_interval = getattr(args, "cls_recheck_interval", 30)
+        if self.cls_prior_frames and self.cls_recheck_interval < 1:
+            raise ValueError(
+                "cls_recheck_interval must be >= 1 when cls_prior_frames is set, got {}".format(
+                    self.cls_recheck_interval
+                )
+            )
+        self.calls = 0
+        self.upright_calls = 0
 
     def resize_norm_img(self, img):
+        imgC, imgH, imgW = self.cls_image_shape
+        padding_im = np.zeros((imgC, imgH, imgW), dtype=np.float32)
+        self.resize_norm_into(img, padding_im)
+        return padding_im
+
+    def resize_norm_into(self, img, out):
+        """
+        resize and normalize img directly into out (C, H, W float32, the
+        padding on the right must already be zero)
+        """
+        resized_image = self.resize_img(img)
+        resized_w = resized_image.shape[1]
+        view = out[:, :, 0:resized_w]
+        if self.cls_image_shape[0] == 1:
+            view[0] = resized_image
+        else:
+            view[...] = resized_image.transpose((2, 0, 1))
+        view /= 255
+        view -= 0.5
+        view /= 0.5
+
+    def resize_img(self, img):
+        """
+        resize only, normalization is done inside models prepared by
+        onnxocr.model_tools fold-normalize
+        """
         imgC, imgH, imgW = self.cls_image_shape
         h = img.shape[0]
         w = img.shape[1]
@@ -28,50 +74,73 @@ class TextClassifier(PredictBase):
             resized_w = imgW
         else:
             resized_w = int(math.ceil(imgH * ratio))
-        resized_image = cv2.resize(img, (resized_w, imgH))
-        resized_image = resized_image.astype("float32")
-        if self.cls_image_shape[0] == 1:
-            resized_image = resized_image / 255
-            resized_image = resized_image[np.newaxis, :]
-        else:
-            resized_image = resized_image.transpose((2, 0, 1)) / 255
-        resized_image -= 0.5
-        resized_image /= 0.5
-        padding_im = np.zeros((imgC, imgH, imgW), dtype=np.float32)
-        padding_im[:, :, 0:resized_w] = resized_image
-        return padding_im
+        return cv2.resize(img, (resized_w, imgH))
+
+    def get_batch_buffer(self, batch_size):
+        imgC, imgH, imgW = self.cls_image_shape
+        if self.batch_buffer is None or self.batch_buffer.shape[0] < batch_size:
+            batch_num = max(batch_size, self.cls_batch_num)
+            if self.cls_norm_folded:
+                self.batch_buffer = np.zeros((batch_num, imgH, imgW, imgC), dtype=np.uint8)
+            else:
+                self.batch_buffer = np.zeros((batch_num, imgC, imgH, imgW), dtype=np.float32)
+        padding_batch = self.batch_buffer[:batch_size]
+        padding_batch.fill(0)
+        return padding_batch
+
+    def get_batch_feed(self, img_batch):
+        padding_batch = self.get_batch_buffer(len(img_batch))
+        if self.cls_norm_folded:
+            width_batch = np.zeros((len(img_batch),), dtype=np.int64)
+            for ino, img in enumerate(img_batch):
+                resized_image = self.resize_img(img)
+                padding_batch[ino, :, 0 : resized_image.shape[1]] = resized_image
+                width_batch[ino] = resized_image.shape[1]
+            return {
+                self.cls_input_name[0]: padding_batch,
+                self.cls_input_name[1]: width_batch,
+            }
+
+        for ino, img in enumerate(img_batch):
+            self.resize_norm_into(img, padding_batch[ino])
+        return self.get_input_feed(self.cls_input_name, padding_batch)
+
+    def use_prior(self):
+        """
+        True when the orientation prior says this call can skip
+        classification: all the first cls_prior_frames calls were upright
+        """
+        if not self.cls_prior_frames or self.upright_calls < self.cls_prior_frames:
+            return False
+        return self.calls % self.cls_recheck_interval != 0
 
     def __call__(self, img_list):
-        img_list = copy.deepcopy(img_list)
+        # 只复制列表, 旋转的图片才会生成新数组
+        img_list = list(img_list)
         img_num = len(img_list)
+        cls_res = [["", 0.0]] * img_num
+        self.calls += 1
+        if self.use_prior():
+            return img_list, cls_res
+
         # Calculate the aspect ratio of all text bars
         width_list = []
         for img in img_list:
             width_list.append(img.shape[1] / float(img.shape[0]))
+        # 宽高比门限之外的图片不参与分类
+        candidates = [i for i in range(img_num) if width_list[i] >= self.cls_min_aspect]
         # Sorting can speed up the cls process
-        indices = np.argsort(np.array(width_list))
+        indices = sorted(candidates, key=lambda i: width_list[i])
 
-        cls_res = [["", 0.0]] * img_num
         batch_num = self.cls_batch_num
+        rotated = 0
+        for beg_img_no in range(0, len(indices), batch_num):
 
-        for beg_img_no in range(0, img_num, batch_num):
+            end_img_no = min(len(indices), beg_img_no + batch_num)
+            img_batch = [img_list[indices[ino]] for ino in range(beg_img_no, end_img_no)]
 
-            end_img_no = min(img_num, beg_img_no + batch_num)
-            norm_img_batch = []
-            max_wh_ratio = 0
-
-            for ino in range(beg_img_no, end_img_no):
-                h, w = img_list[indices[ino]].shape[0:2]
-                wh_ratio = w * 1.0 / h
-                max_wh_ratio = max(max_wh_ratio, wh_ratio)
-            for ino in range(beg_img_no, end_img_no):
-                norm_img = self.resize_norm_img(img_list[indices[ino]])
-                norm_img = norm_img[np.newaxis, :]
-                norm_img_batch.append(norm_img)
-            norm_img_batch = np.concatenate(norm_img_batch)
-            norm_img_batch = norm_img_batch.copy()
-
-            input_feed = self.get_input_feed(self.cls_input_name, norm_img_batch)
+            input_feed = self.get_batch_feed(img_batch)
+            count("cls_batches")
             outputs = self.cls_onnx_session.run(
                 self.cls_output_name, input_feed=input_feed
             )
@@ -86,4 +155,10 @@ class TextClassifier(PredictBase):
                     img_list[indices[beg_img_no + rno]] = cv2.rotate(
                         img_list[indices[beg_img_no + rno]], 1
                     )
+                    rotated += 1
+
+        if rotated:
+            self.upright_calls = 0
+        elif indices:
+            self.upright_calls += 1
         return img_list, cls_res
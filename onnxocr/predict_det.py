@@ -1,18 +1,125 @@
+import math
+import cv2
 import numpy as np
+import onnxruntime
 from .imaug import transform, create_operators
 from .db_postprocess import DBPostProcess
-from .predict_base import PredictBase
+from .timing import count, stage
+from .predict_base import PredictBase, FOLD_DB_KEY, FOLD_NORM_KEY
+
+
+def parse_det_buckets(det_buckets):
+    """
+    "640x640,960x1728" or [(640, 640), (960, 1728)] -> [(640, 640), (960, 1728)]
+    a single number means a square canvas
+    """
+    if not det_buckets:
+        return []
+    if isinstance(det_buckets, str):
+        det_buckets = det_buckets.split(",")
+    buckets = []
+    for bucket in det_buckets:
+        if isinstance(bucket, str):
+            bucket = [int(v) for v in bucket.lower().split("x")]
+        elif isinstance(bucket, int):
+            bucket = [bucket]
+        h, w = (bucket[0], bucket[0]) if len(bucket) == 1 else bucket
+        assert h % 32 == 0 and w % 32 == 0, "det bucket must be a multiple of 32, got {}x{}".format(h, w)
+        buckets.append((h, w))
+    return buckets
+
+
+def tile_layout(length, tile_size, overlap):
+    """
+    split [0, length) into the fewest tiles of at most tile_size that overlap
+    by at least overlap; all tiles share one length (a multiple of 32) so
+    they can be batched
+    return: (start offsets, tile length)
+    """
+    if not 0 <= overlap < tile_size:
+        raise ValueError(
+            "tile overlap must be in [0, tile_size), got overlap {} for tile_size {}".format(overlap, tile_size)
+        )
+    if length <= tile_size:
+        return [0], length
+    num = math.ceil((length - overlap) / float(tile_size - overlap))
+    tile_len = min(math.ceil((length + (num - 1) * overlap) / num / 32.) * 32, tile_size)
+    step = (length - tile_len) / float(num - 1)
+    return [int(round(i * step)) for i in range(num)], tile_len
+
+
+def merge_tile_boxes(boxes, tile_ids, iou_thresh=0.3, cover_thresh=0.7):
+    """
+    merge boxes duplicated or cut by overlapping tiles: two intersecting
+    boxes from different tiles are merged into their bounding rectangle when
+    they overlap enough (IoU, or the smaller one mostly covered) or continue
+    the same text line across the seam
+    args:
+        boxes: list of [4, 2] boxes in image coordinates
+        tile_ids: index of the tile each box comes from
+    """
+    rects = [(b[:, 0].min(), b[:, 1].min(), b[:, 0].max(), b[:, 1].max()) for b in boxes]
+    parent = list(range(len(boxes)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # 按上边排序, 只比较纵向相交的框
+    order = sorted(range(len(boxes)), key=lambda i: rects[i][1])
+    for n, i in enumerate(order):
+        ax0, ay0, ax1, ay1 = rects[i]
+        for j in order[n + 1:]:
+            bx0, by0, bx1, by1 = rects[j]
+            if by0 >= ay1:
+                break
+            if tile_ids[i] == tile_ids[j]:
+                continue
+            iw = min(ax1, bx1) - max(ax0, bx0)
+            ih = min(ay1, by1) - by0
+            if iw <= 0 or ih <= 0:
+                continue
+            min_h = max(min(ay1 - ay0, by1 - by0), 1)
+            area_a = max((ax1 - ax0) * (ay1 - ay0), 1)
+            area_b = max((bx1 - bx0) * (by1 - by0), 1)
+            inter = iw * ih
+            iou = inter / (area_a + area_b - inter)
+            cover = inter / min(area_a, area_b)
+            # 同一行文字被竖直接缝切开: 两段在重叠带内相交, 且纵向大部分重叠
+            same_line = ih > 0.6 * min_h and max(ay1 - ay0, by1 - by0) < 1.5 * min_h
+            if iou > iou_thresh or cover > cover_thresh or same_line:
+                parent[find(j)] = find(i)
+
+    groups = {}
+    for index in range(len(boxes)):
+        groups.setdefault(find(index), []).append(index)
+    merged = []
+    for group in groups.values():
+        if len(group) == 1:
+            merged.append(boxes[group[0]])
+            continue
+        x0 = min(rects[i][0] for i in group)
+        y0 = min(rects[i][1] for i in group)
+        x1 = max(rects[i][2] for i in group)
+        y1 = max(rects[i][3] for i in group)
+        merged.append(np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.float32))
+    return merged
 
 
 class TextDetector(PredictBase):
     def __init__(self, args):
         self.args = args
         self.det_algorithm = args.det_algorithm
+        self.det_batch_num = args.max_batch_size
         pre_process_list = [
             {
                 "DetResizeForTest": {
                     "limit_side_len": args.det_limit_side_len,
                     "limit_type": args.det_limit_type,
+                    "min_text_height": args.det_min_text_height,
+                    "max_side_len": args.det_max_side_len,
                 }
             },
             {
@@ -36,16 +143,57 @@ class TextDetector(PredictBase):
         postprocess_params["score_mode"] = args.det_db_score_mode
         postprocess_params["box_type"] = args.det_box_type
 
-        # 实例化预处理操作类
-        self.preprocess_op = create_operators(pre_process_list)
         # self.postprocess_op = build_post_process(postprocess_params)
         # 实例化后处理操作类
         self.postprocess_op = DBPostProcess(**postprocess_params)
 
         # 初始化模型
-        self.det_onnx_session = self.get_onnx_session(args.det_model_dir, args.use_gpu, gpu_id = args.gpu_id)
+        self.det_onnx_session = self.get_onnx_session(self.resolve_model_path(args.det_model_dir, args.precision), args.use_gpu, gpu_id = args.gpu_id, cpu_threads = args.cpu_threads, share = args.share_sessions)
         self.det_input_name = self.get_input_name(self.det_onnx_session)
         self.det_output_name = self.get_output_name(self.det_onnx_session)
+        model_meta = self.get_model_meta(self.det_onnx_session)
+
+        # 归一化已折叠进模型, 直接输入 uint8 的 HWC 图像
+        self.det_norm_folded = FOLD_NORM_KEY in model_meta
+        if self.det_norm_folded:
+            pre_process_list = [pre_process_list[0], pre_process_list[-1]]
+        # 固定画布模式, 每个画布复用输入输出缓冲和 io binding
+        self.det_buckets = parse_det_buckets(getattr(args, "det_buckets", None))
+        self.bucket_bindings = {}
+        if self.det_buckets:
+            pre_process_list[0]["DetResizeForTest"]["buckets"] = self.det_buckets
+        # 实例化预处理操作类
+        self.preprocess_op = create_operators(pre_process_list)
+        # 分块检测的小块保持原分辨率, 只对齐到 32 的倍数, 不受 det_limit_* 缩放
+        self.tile_preprocess_op = create_operators(
+            [{"DetResizeForTest": {"limit_side_len": max(getattr(args, "det_tile_size", 0), 32), "limit_type": "max"}}]
+            + pre_process_list[1:]
+        )
+        # has_text 探测用的预处理, 按 probe_side_len 缓存
+        self.probe_pre_process_tail = pre_process_list[1:]
+        self.probe_preprocess_ops = {}
+
+        # 模型已由 model_tools 折叠了 DB 二值化, 且阈值一致时直接使用模型输出的 mask
+        self.det_use_folded_mask = False
+        folded_thresh = model_meta.get(FOLD_DB_KEY)
+        if folded_thresh is not None:
+            if abs(float(folded_thresh) - args.det_db_thresh) < 1e-6:
+                self.det_use_folded_mask = True
+            else:
+                # 阈值不一致, 只取概率图, ORT 不会计算 mask 分支
+                self.det_output_name = self.det_output_name[:1]
+
+        # 分块检测: 长边超过 det_tile_size 的图片按原分辨率切成重叠的小块
+        self.det_tile_size = getattr(args, "det_tile_size", 0)
+        self.det_tile_overlap = getattr(args, "det_tile_overlap", 128)
+        if self.det_tile_size and not 0 <= self.det_tile_overlap < self.det_tile_size:
+            raise ValueError(
+                "det_tile_overlap must be in [0, det_tile_size), got det_tile_overlap {} "
+                "for det_tile_size {}".format(self.det_tile_overlap, self.det_tile_size)
+            )
+
+        if self.det_buckets and args.warmup:
+            self.warmup_buckets()
 
     def order_points_clockwise(self, pts):
         rect = np.zeros((4, 2), dtype="float32")
@@ -91,30 +239,216 @@ class TextDetector(PredictBase):
         dt_boxes = np.array(dt_boxes_new)
         return dt_boxes
 
-    def __call__(self, img):
-        ori_im = img.copy()
+    def preprocess(self, img, text_height=None, preprocess_op=None):
         data = {"image": img}
+        if text_height is not None:
+            data["text_height"] = text_height
 
-        data = transform(data, self.preprocess_op)
+        data = transform(data, preprocess_op or self.preprocess_op)
         img, shape_list = data
         if img is None:
-            return None, 0
+            return None, None
         img = np.expand_dims(img, axis=0)
         shape_list = np.expand_dims(shape_list, axis=0)
-        img = img.copy()
+        # CHW 转置后的数组不连续, 需要拷贝; uint8 输入本身已连续
+        img = np.ascontiguousarray(img)
+        return img, shape_list
 
-        input_feed = self.get_input_feed(self.det_input_name, img)
-        outputs = self.det_onnx_session.run(self.det_output_name, input_feed=input_feed)
+    def get_bucket_binding(self, input_shape, input_dtype):
+        """
+        input/output buffers bound once per canvas shape; later calls only
+        copy the new image into the bound input buffer
+        """
+        key = (tuple(input_shape), input_dtype)
+        if key in self.bucket_bindings:
+            return self.bucket_bindings[key]
 
+        if self.det_norm_folded:
+            map_shape = (input_shape[0], 1, input_shape[1], input_shape[2])
+        else:
+            map_shape = (input_shape[0], 1, input_shape[2], input_shape[3])
+        output_dtypes = {
+            node.name: np.uint8 if node.type == "tensor(uint8)" else np.float32
+            for node in self.det_onnx_session.get_outputs()
+        }
+        input_buffer = np.zeros(input_shape, dtype=input_dtype)
+        output_buffers = [
+            np.zeros(map_shape, dtype=output_dtypes[name]) for name in self.det_output_name
+        ]
+        binding = self.det_onnx_session.io_binding()
+        binding.bind_ortvalue_input(
+            self.det_input_name[0], onnxruntime.OrtValue.ortvalue_from_numpy(input_buffer)
+        )
+        for name, buffer in zip(self.det_output_name, output_buffers):
+            binding.bind_ortvalue_output(
+                name, onnxruntime.OrtValue.ortvalue_from_numpy(buffer)
+            )
+        self.bucket_bindings[key] = (binding, input_buffer, output_buffers)
+        return self.bucket_bindings[key]
+
+    def run_bucket(self, img):
+        binding, input_buffer, output_buffers = self.get_bucket_binding(img.shape, img.dtype)
+        np.copyto(input_buffer, img)
+        self.det_onnx_session.run_with_iobinding(binding)
+        # 输出缓冲绑定在 io binding 上, 下次调用会被覆盖, 返回副本
+        return [buffer.copy() for buffer in output_buffers]
+
+    def warmup_buckets(self):
+        for bucket_h, bucket_w in self.det_buckets:
+            if self.det_norm_folded:
+                self.run_bucket(np.zeros((1, bucket_h, bucket_w, 3), dtype=np.uint8))
+            else:
+                self.run_bucket(np.zeros((1, 3, bucket_h, bucket_w), dtype=np.float32))
+
+    def postprocess(self, outputs, shape_list, ori_shapes):
         preds = {}
         preds["maps"] = outputs[0]
+        if self.det_use_folded_mask:
+            preds["mask"] = outputs[1]
 
         post_result = self.postprocess_op(preds, shape_list)
-        dt_boxes = post_result[0]["points"]
+        dt_boxes_list = []
+        for result, ori_shape in zip(post_result, ori_shapes):
+            dt_boxes = result["points"]
+            if self.args.det_box_type == "poly":
+                dt_boxes = self.filter_tag_det_res_only_clip(dt_boxes, ori_shape)
+            else:
+                dt_boxes = self.filter_tag_det_res(dt_boxes, ori_shape)
+            dt_boxes_list.append(dt_boxes)
+        return dt_boxes_list
 
-        if self.args.det_box_type == "poly":
-            dt_boxes = self.filter_tag_det_res_only_clip(dt_boxes, ori_im.shape)
-        else:
-            dt_boxes = self.filter_tag_det_res(dt_boxes, ori_im.shape)
+    def run(self, img):
+        if self.det_buckets:
+            return self.run_bucket(img)
+        input_feed = self.get_input_feed(self.det_input_name, img)
+        return self.det_onnx_session.run(self.det_output_name, input_feed=input_feed)
+
+    def detect_tiled(self, img):
+        """
+        detect img as overlapping det_tile_size tiles, max_batch_size tiles
+        at a time so that peak memory is bounded by the tile size, and merge
+        the boxes across tile seams
+        """
+        h, w = img.shape[:2]
+        tile_size, overlap = self.det_tile_size, self.det_tile_overlap
+        ys, tile_h = tile_layout(h, tile_size, overlap)
+        xs, tile_w = tile_layout(w, tile_size, overlap)
+        tiles = [(x, y) for y in ys for x in xs]
+
+        boxes = []
+        tile_ids = []
+        for beg_tile_no in range(0, len(tiles), self.det_batch_num):
+            chunk = tiles[beg_tile_no : beg_tile_no + self.det_batch_num]
+            crops = [img[y : y + tile_h, x : x + tile_w] for x, y in chunk]
+            for tile_no, dt_boxes in enumerate(self.batch(crops, self.tile_preprocess_op), beg_tile_no):
+                if dt_boxes is None:
+                    continue
+                offset = np.array(tiles[tile_no], dtype=np.float32)
+                for box in dt_boxes:
+                    boxes.append(box + offset)
+                    tile_ids.append(tile_no)
+
+        boxes = merge_tile_boxes(boxes, tile_ids)
+        return np.array(boxes, dtype=np.float32).reshape(-1, 4, 2)
+
+    def use_tiling(self, img):
+        return bool(
+            self.det_tile_size
+            and self.args.det_box_type == "quad"
+            and max(img.shape[:2]) > self.det_tile_size
+        )
 
+    def __call__(self, img, text_height=None):
+        """
+        text_height: detection scale hint (see det_limit_type adaptive);
+        ignored when the image is tiled, tiles are detected at full resolution
+        """
+        if self.use_tiling(img):
+            return self.detect_tiled(img)
+        ori_im = img.copy()
+        with stage("det_preprocess"):
+            img, shape_list = self.preprocess(img, text_height)
+        if img is None:
+            return None, 0
+
+        with stage("det_infer"):
+            outputs = self.run(img)
+        with stage("det_postprocess"):
+            dt_boxes = self.postprocess(outputs, shape_list, [ori_im.shape])[0]
+        count("boxes", len(dt_boxes))
         return dt_boxes
+
+    def has_text(self, img, probe_side_len=320, std_thresh=4.0):
+        """
+        cheap text presence probe: uniform images (gray standard deviation
+        below std_thresh) are rejected without running the model, the rest
+        is detected with its long side at most probe_side_len (det_limit_*
+        is ignored) and contours are only extracted when the probability map
+        max reaches box_thresh
+        return: (has_text, max text probability)
+        """
+        if img.size == 0:
+            return False, 0.0
+        gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        if float(gray.std()) < std_thresh:
+            return False, 0.0
+
+        scale = probe_side_len / max(img.shape[:2])
+        if scale < 1:
+            img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        probe_op = self.probe_preprocess_ops.get(probe_side_len)
+        if probe_op is None:
+            # 固定 max 缩放, 不会像 min / adaptive 那样把探测图再放大
+            probe_op = create_operators(
+                [{"DetResizeForTest": {"limit_side_len": max(probe_side_len, 32), "limit_type": "max"}}]
+                + self.probe_pre_process_tail
+            )
+            self.probe_preprocess_ops[probe_side_len] = probe_op
+        with stage("det_preprocess"):
+            det_img, shape_list = self.preprocess(img, preprocess_op=probe_op)
+        if det_img is None:
+            return False, 0.0
+
+        with stage("det_infer"):
+            outputs = self.run(det_img)
+        score = float(outputs[0].max())
+        if score < self.postprocess_op.box_thresh:
+            return False, score
+        with stage("det_postprocess"):
+            dt_boxes = self.postprocess(outputs, shape_list, [img.shape])[0]
+        count("boxes", len(dt_boxes))
+        return len(dt_boxes) > 0, score
+
+    def batch(self, img_list, preprocess_op=None):
+        """
+        detect a list of images; images with the same shape after
+        preprocessing are stacked and run together, max_batch_size at a time
+        preprocess_op: operators used instead of self.preprocess_op
+        return: list of dt_boxes in the order of img_list (None if the image
+        could not be preprocessed)
+        """
+        dt_boxes_list = [None] * len(img_list)
+        groups = {}
+        for index, img in enumerate(img_list):
+            with stage("det_preprocess"):
+                det_img, shape_list = self.preprocess(img, preprocess_op=preprocess_op)
+            if det_img is None:
+                continue
+            groups.setdefault(det_img.shape, []).append((index, det_img, shape_list))
+
+        for group in groups.values():
+            for beg_img_no in range(0, len(group), self.det_batch_num):
+                chunk = group[beg_img_no : beg_img_no + self.det_batch_num]
+                with stage("det_preprocess"):
+                    det_batch = np.concatenate([item[1] for item in chunk])
+                    shape_batch = np.concatenate([item[2] for item in chunk])
+                with stage("det_infer"):
+                    outputs = self.run(det_batch)
+                count("det_batches")
+                ori_shapes = [img_list[item[0]].shape for item in chunk]
+                with stage("det_postprocess"):
+                    post_result = self.postprocess(outputs, shape_batch, ori_shapes)
+                for item, dt_boxes in zip(chunk, post_result):
+                    dt_boxes_list[item[0]] = dt_boxes
+                    count("boxes", len(dt_boxes))
+        return dt_boxes_list
@@ -1,11 +1,28 @@
+import os
+import copy
 import cv2
 import numpy as np
 import math
-from PIL import Image
 
 
 from .rec_postprocess import CTCLabelDecode
-from .predict_base import PredictBase
+from .timing import count, stage
+from .predict_base import PredictBase, FOLD_CTC_KEY, FOLD_NORM_KEY, VOCAB_DICT_KEY, get_model_path
+
+
+def parse_rec_charsets(rec_charsets):
+    """
+    "digits=rec_digits.onnx,alnum=rec_alnum.onnx" or {"digits": "rec_digits.onnx"}
+    """
+    if not rec_charsets:
+        return {}
+    if isinstance(rec_charsets, dict):
+        return dict(rec_charsets)
+    charsets = {}
+    for item in rec_charsets.split(","):
+        name, model_dir = item.split("=", 1)
+        charsets[name.strip()] = model_dir.strip()
+    return charsets
 
 
 class TextRecognizer(PredictBase):
@@ -13,19 +30,48 @@ class TextRecognizer(PredictBase):
         self.rec_image_shape = [int(v) for v in args.rec_image_shape.split(",")]
         self.rec_batch_num = args.rec_batch_num
         self.rec_algorithm = args.rec_algorithm
-        self.postprocess_op = CTCLabelDecode(
-            character_dict_path=args.rec_char_dict_path,
-            use_space_char=args.use_space_char,
-        )
 
         # 初始化模型
-        self.rec_onnx_session = self.get_onnx_session(args.rec_model_dir, args.use_gpu, gpu_id = args.gpu_id)
+        self.rec_model_path = self.resolve_model_path(args.rec_model_dir, args.precision)
+        self.rec_onnx_session = self.get_onnx_session(self.rec_model_path, args.use_gpu, gpu_id = args.gpu_id, cpu_threads = args.cpu_threads, share = args.share_sessions)
         self.rec_input_name = self.get_input_name(self.rec_onnx_session)
         self.rec_output_name = self.get_output_name(self.rec_onnx_session)
+        model_meta = self.get_model_meta(self.rec_onnx_session)
+
+        # 词表裁剪过的模型使用与之配套的字典, 字典中已包含空格
+        if VOCAB_DICT_KEY in model_meta:
+            self.postprocess_op = CTCLabelDecode(
+                character_dict_path=os.path.join(
+                    os.path.dirname(args.rec_model_dir), model_meta[VOCAB_DICT_KEY]
+                ),
+                use_space_char=False,
+            )
+        else:
+            self.postprocess_op = CTCLabelDecode(
+                character_dict_path=args.rec_char_dict_path,
+                use_space_char=args.use_space_char,
+            )
+
+        # 按字符集选择的裁剪模型, 调用时通过 charset 参数指定
+        self.charset_recognizers = {}
+        for name, model_dir in parse_rec_charsets(getattr(args, "rec_charsets", None)).items():
+            charset_args = copy.copy(args)
+            charset_args.rec_model_dir = model_dir
+            charset_args.rec_charsets = None
+            # 裁剪模型没有对应精度的量化文件时使用 fp32 裁剪模型
+            if not os.path.exists(get_model_path(model_dir, args.precision)):
+                charset_args.precision = "fp32"
+            self.charset_recognizers[name] = TextRecognizer(charset_args)
+        # 模型已由 model_tools 折叠了 argmax/max, 输出为 (B, T) 的索引和概率
+        self.rec_ctc_folded = FOLD_CTC_KEY in model_meta
+        # 模型已折叠了归一化, 输入为 uint8 的 NHWC 图像和每张图的有效宽度
+        self.rec_norm_folded = FOLD_NORM_KEY in model_meta
 
     def resize_norm_img(self, img, max_wh_ratio):
         imgC, imgH, imgW = self.rec_image_shape
         if self.rec_algorithm == "NRTR" or self.rec_algorithm == "ViTSTR":
+            from PIL import Image
+
             img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
             # return padding_im
             image_pil = Image.fromarray(np.uint8(img))
@@ -277,7 +323,92 @@ class TextRecognizer(PredictBase):
 
         return img
 
-    def __call__(self, img_list):
+    def resize_img(self, img, max_wh_ratio):
+        """
+        resize only, normalization is done inside models prepared by
+        onnxocr.model_tools fold-normalize
+        """
+        imgC, imgH, imgW = self.rec_image_shape
+        assert imgC == img.shape[2]
+        imgW = int((imgH * max_wh_ratio))
+
+        h, w = img.shape[:2]
+        ratio = w / float(h)
+        if math.ceil(imgH * ratio) > imgW:
+            resized_w = imgW
+        else:
+            resized_w = int(math.ceil(imgH * ratio))
+        return cv2.resize(img, (resized_w, imgH))
+
+    def get_batch_feed(self, img_batch):
+        imgC, imgH, imgW = self.rec_image_shape[:3]
+        max_wh_ratio = imgW / imgH
+        # max_wh_ratio = 0
+        for img in img_batch:
+            h, w = img.shape[0:2]
+            wh_ratio = w * 1.0 / h
+            max_wh_ratio = max(max_wh_ratio, wh_ratio)
+
+        if self.rec_norm_folded:
+            imgW = int((imgH * max_wh_ratio))
+            padding_batch = np.zeros((len(img_batch), imgH, imgW, imgC), dtype=np.uint8)
+            width_batch = np.zeros((len(img_batch),), dtype=np.int64)
+            for ino, img in enumerate(img_batch):
+                resized_image = self.resize_img(img, max_wh_ratio)
+                padding_batch[ino, :, 0 : resized_image.shape[1]] = resized_image
+                width_batch[ino] = resized_image.shape[1]
+            return {
+                self.rec_input_name[0]: padding_batch,
+                self.rec_input_name[1]: width_batch,
+            }
+
+        norm_img_batch = []
+        for img in img_batch:
+            norm_img = self.resize_norm_img(img, max_wh_ratio)
+            norm_img = norm_img[np.newaxis, :]
+            norm_img_batch.append(norm_img)
+        norm_img_batch = np.concatenate(norm_img_batch)
+        norm_img_batch = norm_img_batch.copy()
+        return self.get_input_feed(self.rec_input_name, norm_img_batch)
+
+    def postprocess(self, outputs):
+        if self.rec_ctc_folded:
+            preds_idx, preds_prob = outputs[:2]
+            return self.postprocess_op.decode(
+                preds_idx, preds_prob, is_remove_duplicate=True
+            )
+        preds = outputs[0]
+        return self.postprocess_op(preds)
+
+    def get_recognizer(self, charset=None):
+        if charset is None:
+            return self
+        if charset not in self.charset_recognizers:
+            raise KeyError(
+                "unknown charset: {}, loaded: {}".format(
+                    charset, list(self.charset_recognizers)
+                )
+            )
+        return self.charset_recognizers[charset]
+
+    def __call__(self, img_list, charset=None):
+        if charset is not None:
+            return self.get_recognizer(charset)(img_list)
+
+        img_num = len(img_list)
+        rec_res = [["", 0.0]] * img_num
+        for batch_indices, img_batch in self.get_batches(img_list):
+            rec_result = self.recognize_batch(img_batch)
+            for rno in range(len(rec_result)):
+                rec_res[batch_indices[rno]] = rec_result[rno]
+
+        return rec_res
+
+    def get_batches(self, img_list):
+        """
+        split img_list into rec_batch_num sized batches of similar width
+        return: list of (indices into img_list, images)
+        """
         img_num = len(img_list)
         # Calculate the aspect ratio of all text bars
         width_list = []
@@ -285,42 +416,27 @@ class TextRecognizer(PredictBase):
             width_list.append(img.shape[1] / float(img.shape[0]))
         # Sorting can speed up the recognition process
         indices = np.argsort(np.array(width_list))
-        rec_res = [["", 0.0]] * img_num
         batch_num = self.rec_batch_num
 
+        batches = []
         for beg_img_no in range(0, img_num, batch_num):
             end_img_no = min(img_num, beg_img_no + batch_num)
-            norm_img_batch = []
-            imgC, imgH, imgW = self.rec_image_shape[:3]
-            max_wh_ratio = imgW / imgH
-            # max_wh_ratio = 0
-            for ino in range(beg_img_no, end_img_no):
-                h, w = img_list[indices[ino]].shape[0:2]
-                wh_ratio = w * 1.0 / h
-                max_wh_ratio = max(max_wh_ratio, wh_ratio)
-            for ino in range(beg_img_no, end_img_no):
-                norm_img = self.resize_norm_img(img_list[indices[ino]], max_wh_ratio)
-                norm_img = norm_img[np.newaxis, :]
-                norm_img_batch.append(norm_img)
-
-            norm_img_batch = np.concatenate(norm_img_batch)
-            norm_img_batch = norm_img_batch.copy()
-
-            # img = img[:, :, ::-1].transpose(2, 0, 1)
-            # img = img[:, :, ::-1]
-            # img = img.transpose(2, 0, 1)
-            # img = img.astype(np.float32)
-            # img = np.expand_dims(img, axis=0)
-            # print(img.shape)
-            input_feed = self.get_input_feed(self.rec_input_name, norm_img_batch)
-            outputs = self.rec_onnx_session.run(
-                self.rec_output_name, input_feed=input_feed
-            )
-
-            preds = outputs[0]
-
-            rec_result = self.postprocess_op(preds)
-            for rno in range(len(rec_result)):
-                rec_res[indices[beg_img_no + rno]] = rec_result[rno]
-
-        return rec_res
+            batch_indices = [int(indices[ino]) for ino in range(beg_img_no, end_img_no)]
+            batches.append((batch_indices, [img_list[ino] for ino in batch_indices]))
+        return batches
+
+    def recognize_batch(self, img_batch):
+        """
+        recognize img_batch as one batch, in the given order
+        """
+        with stage("rec_preprocess"):
+            input_feed = self.get_batch_feed(img_batch)
+        with stage("rec_infer"):
+            outputs = self.run(input_feed)
+        with stage("rec_decode"):
+            rec_result = self.postprocess(outputs)
+        count("rec_batches")
+        return rec_result
+
+    def run(self, input_feed):
+        return self.rec_onnx_session.run(self.rec_output_name, input_feed=input_feed)
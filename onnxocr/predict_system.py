@@ -1,9 +1,9 @@
 import os
 import cv2
-import copy
 from . import predict_det
 from . import predict_cls
 from . import predict_rec
+from .timing import OCRStats, StatsWindow, count, recording, stage
 from .utils import get_rotate_crop_image, get_minarea_rect_crop
 
 
@@ -18,6 +18,10 @@ class TextSystem(object):
 
         self.args = args
         self.crop_image_res_index = 0
+        # benchmark 为 True 时记录每次调用的分阶段耗时
+        self.benchmark = args.benchmark
+        self.last_stats = None
+        self.stats_window = StatsWindow()
 
     def draw_crop_rec_res(self, output_dir, img_crop_list, rec_res):
         os.makedirs(output_dir, exist_ok=True)
@@ -32,36 +36,114 @@ class TextSystem(object):
 
         self.crop_image_res_index += bbox_num
 
-    def __call__(self, img, cls=True):
+    def crop_boxes(self, ori_im, dt_boxes):
+        img_crop_list = []
+        with stage("crop"):
+            for bno in range(len(dt_boxes)):
+                # 裁剪不会修改文本框, 无需拷贝
+                if self.args.det_box_type == "quad":
+                    img_crop = get_rotate_crop_image(ori_im, dt_boxes[bno])
+                else:
+                    img_crop = get_minarea_rect_crop(ori_im, dt_boxes[bno])
+                img_crop_list.append(img_crop)
+        count("crops", len(img_crop_list))
+        return img_crop_list
+
+    def classify(self, img_crop_list):
+        with stage("cls"):
+            img_crop_list, angle_list = self.text_classifier(img_crop_list)
+        return img_crop_list, angle_list
+
+    def record(self, func, *args, **kwargs):
+        """
+        run func, with its stage timings recorded into last_stats and
+        stats_window when benchmark is on
+        """
+        if not self.benchmark:
+            return func(*args, **kwargs)
+        stats = OCRStats()
+        try:
+            with recording(stats):
+                return func(*args, **kwargs)
+        finally:
+            self.add_stats(stats)
+
+    def record_iter(self, gen):
+        """
+        iterate gen with its stage timings recorded like record(), into one
+        OCRStats published when gen is exhausted or closed
+        """
+        if not self.benchmark:
+            yield from gen
+            return
+        stats = OCRStats()
+        try:
+            while True:
+                # 只记录生成器内部的耗时, 调用方处理结果的时间不计入
+                with recording(stats):
+                    try:
+                        item = next(gen)
+                    except StopIteration:
+                        return
+                yield item
+        finally:
+            gen.close()
+            self.add_stats(stats)
+
+    def add_stats(self, stats):
+        self.last_stats = stats
+        self.stats_window.add(stats)
+
+    def __call__(self, img, cls=True, charset=None, text_height=None):
+        return self.record(self.ocr_image, img, cls, charset, text_height)
+
+    def ocr_image(self, img, cls=True, charset=None, text_height=None):
         ori_im = img.copy()
         # 文字检测
-        dt_boxes = self.text_detector(img)
+        dt_boxes = self.text_detector(img, text_height)
 
         if dt_boxes is None:
             return None, None
 
-        img_crop_list = []
-
         dt_boxes = sorted_boxes(dt_boxes)
 
         # 图片裁剪
-        for bno in range(len(dt_boxes)):
-            tmp_box = copy.deepcopy(dt_boxes[bno])
-            if self.args.det_box_type == "quad":
-                img_crop = get_rotate_crop_image(ori_im, tmp_box)
-            else:
-                img_crop = get_minarea_rect_crop(ori_im, tmp_box)
-            img_crop_list.append(img_crop)
+        img_crop_list = self.crop_boxes(ori_im, dt_boxes)
 
         # 方向分类
         if self.use_angle_cls and cls:
-            img_crop_list, angle_list = self.text_classifier(img_crop_list)
+            img_crop_list, angle_list = self.classify(img_crop_list)
 
         # 图像识别
-        rec_res = self.text_recognizer(img_crop_list)
+        rec_res = self.text_recognizer(img_crop_list, charset=charset)
 
         if self.args.save_crop_res:
             self.draw_crop_rec_res(self.args.crop_res_save_dir, img_crop_list, rec_res)
+        return self.filter_rec_res(dt_boxes, rec_res)
+
+    def iter_results(self, img, cls=True, charset=None):
+        """
+        yield (box, [text, score]) as each recognition batch finishes;
+        batches follow reading order instead of crop width, so the first
+        lines arrive first. Closing the generator skips the remaining batches
+        """
+        text_recognizer = self.text_recognizer.get_recognizer(charset)
+        dt_boxes = self.text_detector(img)
+        if dt_boxes is None:
+            return
+
+        dt_boxes = sorted_boxes(dt_boxes)
+        batch_num = text_recognizer.rec_batch_num
+        for beg_box_no in range(0, len(dt_boxes), batch_num):
+            box_batch = dt_boxes[beg_box_no : beg_box_no + batch_num]
+            img_crop_list = self.crop_boxes(img, box_batch)
+            if self.use_angle_cls and cls:
+                img_crop_list, angle_list = self.classify(img_crop_list)
+            rec_res = text_recognizer.recognize_batch(img_crop_list)
+            for box, rec_result in zip(*self.filter_rec_res(box_batch, rec_res)):
+                yield box, rec_result
+
+    def filter_rec_res(self, dt_boxes, rec_res):
         filter_boxes, filter_rec_res = [], []
         for box, rec_result in zip(dt_boxes, rec_res):
             text, score = rec_result
@@ -71,6 +153,48 @@ class TextSystem(object):
 
         return filter_boxes, filter_rec_res
 
+    def batch(self, img_list, cls=True, charset=None):
+        """
+        OCR many images at once: same-shaped images share detection batches
+        and the crops of all images are pooled into shared width-sorted
+        classification/recognition batches
+        return: list of (dt_boxes, rec_res) in the order of img_list
+        """
+        return self.record(self.ocr_images, img_list, cls, charset)
+
+    def ocr_images(self, img_list, cls=True, charset=None):
+        dt_boxes_list = self.text_detector.batch(img_list)
+
+        img_crop_list = []
+        crop_owner = []
+        for index, (img, dt_boxes) in enumerate(zip(img_list, dt_boxes_list)):
+            if dt_boxes is None:
+                continue
+            dt_boxes = sorted_boxes(dt_boxes)
+            dt_boxes_list[index] = dt_boxes
+            img_crop_list += self.crop_boxes(img, dt_boxes)
+            crop_owner += [index] * len(dt_boxes)
+
+        if self.use_angle_cls and cls and img_crop_list:
+            img_crop_list, angle_list = self.classify(img_crop_list)
+
+        rec_res = self.text_recognizer(img_crop_list, charset=charset)
+        if self.args.save_crop_res:
+            self.draw_crop_rec_res(self.args.crop_res_save_dir, img_crop_list, rec_res)
+
+        # 按所属图片拆分识别结果
+        rec_res_list = [[] for _ in img_list]
+        for owner, rec_result in zip(crop_owner, rec_res):
+            rec_res_list[owner].append(rec_result)
+
+        results = []
+        for dt_boxes, rec_res in zip(dt_boxes_list, rec_res_list):
+            if dt_boxes is None:
+                results.append((None, None))
+            else:
+                results.append(self.filter_rec_res(dt_boxes, rec_res))
+        return results
+
 
 def sorted_boxes(dt_boxes):
     """
@@ -80,18 +204,24 @@ def sorted_boxes(dt_boxes):
     return:
         sorted boxes(array) with shape [4, 2]
     """
-    num_boxes = dt_boxes.shape[0]
-    sorted_boxes = sorted(dt_boxes, key=lambda x: (x[0][1], x[0][0]))
-    _boxes = list(sorted_boxes)
+    return [dt_boxes[i] for i in sorted_box_indices(dt_boxes)]
+
+
+def sorted_box_indices(dt_boxes):
+    """
+    reading order of dt_boxes as indices, see sorted_boxes
+    """
+    num_boxes = len(dt_boxes)
+    _order = sorted(range(num_boxes), key=lambda i: (dt_boxes[i][0][1], dt_boxes[i][0][0]))
 
     for i in range(num_boxes - 1):
         for j in range(i, -1, -1):
-            if abs(_boxes[j + 1][0][1] - _boxes[j][0][1]) < 10 and (
-                _boxes[j + 1][0][0] < _boxes[j][0][0]
+            if abs(dt_boxes[_order[j + 1]][0][1] - dt_boxes[_order[j]][0][1]) < 10 and (
+                dt_boxes[_order[j + 1]][0][0] < dt_boxes[_order[j]][0][0]
             ):
-                tmp = _boxes[j]
-                _boxes[j] = _boxes[j + 1]
-                _boxes[j + 1] = tmp
+                tmp = _order[j]
+                _order[j] = _order[j + 1]
+                _order[j + 1] = tmp
             else:
                 break
-    return _boxes
+    return _order
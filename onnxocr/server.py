@@ -0,0 +1,295 @@
+"""
+本地 OCR 服务 (local OCR service)
+
+One process holds the engine; macro processes send images over localhost
+HTTP (or a Unix socket) instead of loading their own models. Requests from all
+clients that arrive within --batch_window_ms are run together through
+ONNXPaddleOcr.ocr_batch, so detection and recognition batches are shared
+across clients.
+
+    python -m onnxocr.server --port 8765 --use_gpu false --batch_window_ms 10
+
+    POST /ocr   {"image": "<base64 png/jpg>"} or
+                {"image_raw": "<base64 BGR bytes>", "shape": [h, w, 3]},
+                optional "deadline_ms"
+                -> 200 {"result": [[box, [text, score]], ...]}
+                -> 503 queue full (retry later), 504 deadline exceeded
+    GET /stats  -> queue depth and batching counters
+
+    client = OCRClient("127.0.0.1", 8765)
+    result = client.ocr(img)  # same layout as ONNXPaddleOcr.ocr(img)
+"""
+import asyncio
+import base64
+import concurrent.futures
+import http.client
+import json
+import socket
+import time
+
+import numpy as np
+
+from .onnx_paddleocr import ONNXPaddleOcr
+from .utils import base64_to_cv2, infer_args
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class OCRRequest(object):
+    def __init__(self, img, deadline, future):
+        self.img = img
+        self.deadline = deadline
+        self.future = future
+
+
+def decode_image(payload):
+    if "image_raw" in payload:
+        data = base64.b64decode(payload["image_raw"])
+        return np.frombuffer(data, np.uint8).reshape(payload["shape"])
+    return base64_to_cv2(payload["image"])
+
+
+class OCRServer(object):
+    def __init__(self, engine, batch_window_ms=10, max_batch=16, max_queue=64):
+        self.engine = engine
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        # 推理在单独线程中进行, 事件循环继续接收请求
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.queue = None
+        self.counters = {
+            "requests": 0, "rejected": 0, "expired": 0, "failed": 0,
+            "batches": 0, "batched_images": 0, "busy_s": 0.0,
+        }
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats["queue_depth"] = self.queue.qsize() if self.queue else 0
+        stats["mean_batch"] = stats["batched_images"] / max(stats["batches"], 1)
+        return stats
+
+    async def submit(self, img, deadline_ms=None):
+        """
+        queue one image, raise asyncio.QueueFull when the queue is full and
+        DeadlineExceeded when the result is not ready before the deadline
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if deadline_ms is None else loop.time() + deadline_ms / 1000.0
+        request = OCRRequest(img, deadline, loop.create_future())
+        self.counters["requests"] += 1
+        try:
+            self.queue.put_nowait(request)
+        except asyncio.QueueFull:
+            self.counters["rejected"] += 1
+            raise
+        if deadline is None:
+            return await request.future
+        try:
+            return await asyncio.wait_for(request.future, max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            self.counters["expired"] += 1
+            raise DeadlineExceeded()
+
+    async def collect(self):
+        """wait for one request, then gather more until the window closes"""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        window_end = loop.time() + self.batch_window
+        while len(batch) < self.max_batch:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = window_end - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self.collect()
+            now = loop.time()
+            # 已超时或客户端已放弃的请求不再推理
+            live = [
+                request for request in batch
+                if not request.future.done()
+                and (request.deadline is None or request.deadline > now)
+            ]
+            for request in batch:
+                if request not in live and not request.future.done():
+                    self.counters["expired"] += 1
+                    request.future.set_exception(DeadlineExceeded())
+            if not live:
+                continue
+
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, self.engine.ocr_batch, [request.img for request in live]
+                )
+            except Exception as e:
+                self.counters["failed"] += len(live)
+                for request in live:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+            self.counters["busy_s"] += time.perf_counter() - start
+            self.counters["batches"] += 1
+            self.counters["batched_images"] += len(live)
+            for request, result in zip(live, results):
+                if not request.future.done():
+                    request.future.set_result(result)
+
+    async def handle_request(self, method, path, body):
+        if method == "GET" and path == "/stats":
+            return 200, self.stats()
+        if method != "POST" or path != "/ocr":
+            return 404, {"error": "not found"}
+        try:
+            payload = json.loads(body)
+            img = decode_image(payload)
+        except Exception as e:
+            return 400, {"error": "bad request: {}".format(e)}
+        try:
+            result = await self.submit(img, payload.get("deadline_ms"))
+        except asyncio.QueueFull:
+            return 503, {"error": "queue full"}
+        except DeadlineExceeded:
+            return 504, {"error": "deadline exceeded"}
+        except Exception as e:
+            return 500, {"error": str(e)}
+        return 200, {"result": result}
+
+    async def handle_connection(self, reader, writer):
+        # 最小的 HTTP/1.1 实现, 支持 keep-alive
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, value = line.decode("latin-1").split(":", 1)
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, response = await self.handle_request(method, path, body)
+                data = json.dumps(response, ensure_ascii=False, default=float).encode("utf-8")
+                writer.write(
+                    "HTTP/1.1 {} {}\r\nContent-Type: application/json\r\n"
+                    "Content-Length: {}\r\n\r\n".format(
+                        status, http.client.responses.get(status, ""), len(data)
+                    ).encode("latin-1")
+                    + data
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, unix_socket=None):
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        batcher = asyncio.ensure_future(self.batcher())
+        if unix_socket:
+            server = await asyncio.start_unix_server(self.handle_connection, path=unix_socket)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+        print("ocr server listening on", unix_socket or "{}:{}".format(host, port), flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class OCRClient(object):
+    """
+    blocking client of OCRServer, one keep-alive connection per client
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765, unix_socket=None, timeout=30):
+        if unix_socket:
+            self.conn = UnixHTTPConnection(unix_socket, timeout=timeout)
+        else:
+            self.conn = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def request(self, method, path, payload=None):
+        body = None if payload is None else json.dumps(payload)
+        self.conn.request(method, path, body, {"Content-Type": "application/json"})
+        response = self.conn.getresponse()
+        data = json.loads(response.read())
+        if response.status != 200:
+            raise RuntimeError("ocr server {}: {}".format(response.status, data.get("error")))
+        return data
+
+    def ocr(self, img, deadline_ms=None):
+        """same return layout as ONNXPaddleOcr.ocr(img)"""
+        img = np.ascontiguousarray(img)
+        payload = {
+            "image_raw": base64.b64encode(img.tobytes()).decode("ascii"),
+            "shape": list(img.shape),
+        }
+        if deadline_ms is not None:
+            payload["deadline_ms"] = deadline_ms
+        return [self.request("POST", "/ocr", payload)["result"]]
+
+    def stats(self):
+        return self.request("GET", "/stats")
+
+    def close(self):
+        self.conn.close()
+
+
+def build_parser():
+    parser = infer_args()
+    parser.prog = "python -m onnxocr.server"
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix_socket", type=str, default=None)
+    parser.add_argument("--batch_window_ms", type=float, default=10,
+                        help="how long the first request of a batch waits for others")
+    parser.add_argument("--max_batch", type=int, default=16, help="images per combined batch")
+    parser.add_argument("--max_queue", type=int, default=64,
+                        help="queued requests before new ones are rejected with 503")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    server_keys = ["host", "port", "unix_socket", "batch_window_ms", "max_batch", "max_queue"]
+    engine_kwargs = {k: v for k, v in vars(args).items() if k not in server_keys}
+    engine = ONNXPaddleOcr(**engine_kwargs)
+    server = OCRServer(engine, args.batch_window_ms, args.max_batch, args.max_queue)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix_socket))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import difflib
+import math
+import re
+
+import numpy as np
+
+from .utils import str_count
+
+MATCH_MODES = ["exact", "regex", "fuzzy"]
+
+
+def make_matcher(pattern, mode="exact", fuzzy_thresh=0.8):
+    """
+    return a function text -> bool
+    exact: text equals pattern, whitespace ignored
+    regex: re.search(pattern, text)
+    fuzzy: difflib similarity ratio >= fuzzy_thresh, whitespace ignored
+    """
+    if mode == "exact":
+        target = "".join(pattern.split())
+        return lambda text: "".join(text.split()) == target
+    if mode == "regex":
+        regex = re.compile(pattern)
+        return lambda text: regex.search(text) is not None
+    if mode == "fuzzy":
+        target = "".join(pattern.split())
+        return lambda text: difflib.SequenceMatcher(
+            None, "".join(text.split()), target
+        ).ratio() >= fuzzy_thresh
+    raise ValueError("unknown match mode: {}, expected one of {}".format(mode, MATCH_MODES))
+
+
+def box_center(box):
+    box = np.array(box, dtype=np.float32)
+    return float(box[:, 0].mean()), float(box[:, 1].mean())
+
+
+def rank_boxes(dt_boxes, target_len=None, hint=None, fit_ratio=2.0):
+    """
+    order candidate boxes for a text search
+    args:
+        target_len: expected text width in chinese characters (see str_count),
+            a line of n chinese characters is about n times as wide as high;
+            boxes within fit_ratio of it come first
+        hint: (x, y), boxes nearer to it come first within the same tier
+    return: indices into dt_boxes
+    """
+    keys = []
+    for index, box in enumerate(dt_boxes):
+        width = np.linalg.norm(box[0] - box[1])
+        height = max(np.linalg.norm(box[0] - box[3]), 1.0)
+        misfit = 0.0
+        if target_len:
+            misfit = abs(math.log(max(width / height, 0.1) / target_len))
+        distance = 0.0
+        if hint is not None:
+            x, y = box_center(box)
+            distance = math.hypot(x - hint[0], y - hint[1])
+        keys.append((misfit > math.log(fit_ratio), distance, misfit, index))
+    return [key[-1] for key in sorted(keys)]
+
+
+def search_text(text_system, img, pattern, mode="exact", hint=None,
+                batch_size=4, cls=True, charset=None, fuzzy_thresh=0.8):
+    """
+    detect img, then recognize the candidate boxes batch_size at a time in
+    rank_boxes order and stop at the first line matching pattern
+    return: (box, text, score) or None
+    """
+    match = make_matcher(pattern, mode, fuzzy_thresh)
+    text_recognizer = text_system.text_recognizer.get_recognizer(charset)
+    dt_boxes = text_system.text_detector(img)
+    if dt_boxes is None or len(dt_boxes) == 0:
+        return None
+
+    # 正则无法估计文本长度, 只按提示点排序
+    target_len = str_count(pattern) if mode != "regex" else None
+    order = rank_boxes(dt_boxes, target_len, hint)
+    for beg_no in range(0, len(order), batch_size):
+        box_batch = [dt_boxes[index] for index in order[beg_no : beg_no + batch_size]]
+        img_crop_list = text_system.crop_boxes(img, box_batch)
+        if text_system.use_angle_cls and cls:
+            img_crop_list, angle_list = text_system.classify(img_crop_list)
+        rec_res = text_recognizer.recognize_batch(img_crop_list)
+        for box, (text, score) in zip(box_batch, rec_res):
+            if score >= text_system.drop_score and match(text):
+                return box, text, score
+    return None
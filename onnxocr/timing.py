@@ -0,0 +1,149 @@
+"""
+分阶段计时 (per-stage timing of TextSystem calls)
+
+The predictors wrap every stage in `with stage("det_infer"):` and report
+counts with `count("boxes", n)`. Nothing is recorded unless a call runs
+inside `recording(stats)`, which TextSystem does when args.benchmark is
+set; otherwise a stage costs one thread-local lookup.
+
+    engine = ONNXPaddleOcr(benchmark=True)
+    result = engine.ocr(img)
+    print(result.stats.times, result.stats.counts)
+    print(format_summary(engine.timing_summary()))
+"""
+import collections
+import threading
+import time
+
+import numpy as np
+
+from . import trace
+
+# 阶段按流水线顺序排列, 用于输出
+STAGES = [
+    "det_preprocess", "det_infer", "det_postprocess", "crop", "cls",
+    "rec_preprocess", "rec_infer", "rec_decode",
+]
+
+_local = threading.local()
+
+
+class OCRStats(object):
+    """seconds per stage and counters (boxes, batches ...) of one call"""
+
+    def __init__(self):
+        self.times = collections.defaultdict(float)
+        self.counts = collections.defaultdict(int)
+        self.total = 0.0
+
+    def as_dict(self):
+        return {"total_s": self.total, "times": dict(self.times), "counts": dict(self.counts)}
+
+    def __repr__(self):
+        stages = ", ".join(
+            "{}={:.2f}ms".format(name, self.times[name] * 1000) for name in STAGES if name in self.times
+        )
+        return "OCRStats(total={:.2f}ms, {}, {})".format(self.total * 1000, stages, dict(self.counts))
+
+
+def current():
+    """stats being recorded on this thread, or None"""
+    return getattr(_local, "stats", None)
+
+
+class recording(object):
+    """record the stages run on this thread into stats"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def __enter__(self):
+        self.prev = getattr(_local, "stats", None)
+        _local.stats = self.stats
+        self.start = time.perf_counter()
+        return self.stats
+
+    def __exit__(self, *exc):
+        self.stats.total += time.perf_counter() - self.start
+        _local.stats = self.prev
+
+
+class stage(object):
+    """
+    time the block into the stats being recorded, and emit it as a span
+    when tracing is enabled (see trace.enable)
+    """
+
+    __slots__ = ("name", "stats", "tracer", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.stats = getattr(_local, "stats", None)
+        self.tracer = trace._tracer
+        if self.stats is not None or self.tracer is not None:
+            self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        if self.stats is None and self.tracer is None:
+            return
+        end = time.perf_counter()
+        if self.stats is not None:
+            self.stats.times[self.name] += end - self.start
+        if self.tracer is not None:
+            self.tracer.add(self.name, "ocr", self.start, end)
+
+
+def count(name, n=1):
+    stats = getattr(_local, "stats", None)
+    if stats is not None:
+        stats.counts[name] += n
+
+
+class StatsWindow(object):
+    """the last `size` OCRStats, summarized as percentiles"""
+
+    def __init__(self, size=200):
+        self.window = collections.deque(maxlen=size)
+
+    def add(self, stats):
+        self.window.append(stats)
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """
+        return: {stage: {"p50": ms, ..., "mean": ms}} for every stage and
+        "total", plus "calls" and the mean of every counter
+        """
+        window = list(self.window)
+        if not window:
+            return {}
+        summary = {"calls": len(window)}
+        for name in STAGES + ["total"]:
+            values = np.array([
+                s.total if name == "total" else s.times.get(name, 0.0) for s in window
+            ]) * 1000
+            if name != "total" and not any(name in s.times for s in window):
+                continue
+            row = {"p{}".format(p): float(v) for p, v in zip(percentiles, np.percentile(values, percentiles))}
+            row["mean"] = float(values.mean())
+            summary[name] = row
+        counters = sorted({key for s in window for key in s.counts})
+        summary["counts"] = {key: float(np.mean([s.counts.get(key, 0) for s in window])) for key in counters}
+        return summary
+
+
+def format_summary(summary):
+    if not summary:
+        return "no timings recorded, create the engine with benchmark=True"
+    columns = [key for key in summary["total"] if key != "mean"] + ["mean"]
+    lines = ["{:<16}".format("stage ms") + "".join("{:>10}".format(c) for c in columns)]
+    for name in STAGES + ["total"]:
+        if name in summary:
+            lines.append("{:<16}".format(name) + "".join(
+                "{:>10.2f}".format(summary[name][c]) for c in columns
+            ))
+    lines.append("calls {}, mean counts: {}".format(summary["calls"], ", ".join(
+        "{} {:.1f}".format(k, v) for k, v in summary["counts"].items()
+    )))
+    return "\n".join(lines)
@@ -0,0 +1,182 @@
+"""
+时间线追踪 (trace events for Chrome / Perfetto)
+
+Spans from Macro (grab, find_image, ocr, click, keyPress ...) and from the
+OCR stages (see timing.stage) are appended to an in-memory ring buffer while
+tracing is enabled, and can be exported as Chrome trace JSON, which opens in
+chrome://tracing or https://ui.perfetto.dev.
+
+    from onnxocr import trace
+
+    tracer = trace.enable()
+    ...                                  # run the macro loop
+    tracer.export("macro.trace.json")    # on demand
+    tracer.start_rolling("macro.trace.json", interval=5)  # or every 5 s
+    print(tracer.capture_to_action())
+
+Every grab starts a new frame; spans that follow on the same thread carry
+its sequence number, so an input action can be traced back to the capture
+it reacted to.
+"""
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# 当前启用的 tracer, None 表示关闭
+_tracer = None
+_local = threading.local()
+
+
+class Tracer(object):
+    def __init__(self, capacity=100000):
+        # 环形缓冲, 只保留最近 capacity 个 span
+        self.events = deque(maxlen=capacity)
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.thread_names = {}
+        self.frames = itertools.count(1)
+        self.rolling = None
+
+    def add(self, name, cat, start, end, args=None):
+        tid = threading.get_ident()
+        if tid not in self.thread_names:
+            self.thread_names[tid] = threading.current_thread().name
+        frame = getattr(_local, "frame", None)
+        self.events.append((name, cat, start, end - start, tid, frame, args))
+
+    def new_frame(self):
+        """start a new frame on this thread, return: its sequence number"""
+        _local.frame = next(self.frames)
+        return _local.frame
+
+    def to_chrome(self):
+        """trace events in the Chrome trace event format"""
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+            for tid, name in list(self.thread_names.items())
+        ]
+        for name, cat, start, duration, tid, frame, args in list(self.events):
+            event = {
+                "name": name, "cat": cat, "ph": "X", "pid": self.pid, "tid": tid,
+                "ts": (start - self.origin) * 1e6, "dur": duration * 1e6,
+            }
+            if frame is not None or args:
+                event["args"] = dict(args or {})
+                if frame is not None:
+                    event["args"]["frame"] = frame
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path):
+        """write the buffer as Chrome trace JSON, replacing path atomically"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fout:
+            json.dump(self.to_chrome(), fout, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+    def start_rolling(self, path, interval=5.0):
+        """export the buffer to path every interval seconds in a daemon thread"""
+        self.stop_rolling()
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                self.export(path)
+
+        thread = threading.Thread(target=loop, name="trace-export", daemon=True)
+        thread.start()
+        self.rolling = (stop, thread)
+
+    def stop_rolling(self):
+        if self.rolling is not None:
+            stop, thread = self.rolling
+            stop.set()
+            thread.join()
+            self.rolling = None
+
+    def capture_to_action(self):
+        """
+        latency from the start of the grab of a frame to every input action
+        that carries the frame
+        return: list of {"frame", "action", "latency_ms"}
+        """
+        grabs = {}
+        latencies = []
+        for name, cat, start, duration, tid, frame, args in list(self.events):
+            if frame is None:
+                continue
+            if cat == "capture":
+                grabs.setdefault(frame, start)
+            elif cat == "action" and frame in grabs:
+                latencies.append({
+                    "frame": frame, "action": name,
+                    "latency_ms": (start - grabs[frame]) * 1000,
+                })
+        return latencies
+
+
+def enable(capacity=100000):
+    """start tracing into a new ring buffer, return: the Tracer"""
+    global _tracer
+    _tracer = Tracer(capacity)
+    return _tracer
+
+
+def disable():
+    """stop tracing, return: the Tracer that was active (for a final export)"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.stop_rolling()
+    return tracer
+
+
+def get_tracer():
+    return _tracer
+
+
+def new_frame():
+    """start a new frame when tracing, return: its sequence number or None"""
+    tracer = _tracer
+    return tracer.new_frame() if tracer is not None else None
+
+
+class span(object):
+    __slots__ = ("name", "cat", "args", "tracer", "start")
+
+    def __init__(self, name, cat="macro", args=None):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.tracer = _tracer
+        if self.tracer is not None:
+            self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        if self.tracer is not None:
+            self.tracer.add(self.name, self.cat, self.start, time.perf_counter(), self.args)
+
+
+def traced(name=None, cat="macro"):
+    """decorator recording every call of the function as a span"""
+
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with span(span_name, cat):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
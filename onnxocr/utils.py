@@ -2,7 +2,6 @@ import numpy as np
 import cv2
 import argparse
 import math
-from PIL import Image, ImageDraw, ImageFont
 from pathlib import Path
 
 # 获取当前文件所在的目录
@@ -131,6 +130,9 @@ def text_visual(
         font_path: the path of font which is used to draw text
     return(array):
     """
+    # PIL 只在可视化时用到, 不在导入时加载
+    from PIL import Image, ImageDraw, ImageFont
+
     if scores is not None:
         assert len(texts) == len(
             scores
@@ -244,144 +246,274 @@ def base64_to_cv2(b64str):
     return data
 
 
+def get_image_file_list(img_file):
+    """
+    list image files of a directory (sorted), or return [img_file] for a single
+    image; a .txt file is read as a list of image paths, one per line
+    """
+    img_end = {"jpg", "bmp", "png", "jpeg", "rgb", "tif", "tiff", "gif", "webp"}
+    imgs_lists = []
+    if img_file is None or not Path(img_file).exists():
+        raise FileNotFoundError("not found any img file in {}".format(img_file))
+
+    img_file = Path(img_file)
+    if img_file.is_file() and img_file.suffix[1:].lower() in img_end:
+        imgs_lists.append(str(img_file))
+    elif img_file.is_file() and img_file.suffix.lower() == ".txt":
+        with open(img_file, "r", encoding="utf-8") as fin:
+            imgs_lists = [line.strip() for line in fin if line.strip()]
+    elif img_file.is_dir():
+        for file_path in sorted(img_file.iterdir()):
+            if file_path.is_file() and file_path.suffix[1:].lower() in img_end:
+                imgs_lists.append(str(file_path))
+    if len(imgs_lists) == 0:
+        raise FileNotFoundError("not found any img file in {}".format(img_file))
+    return imgs_lists
+
+
 def str2bool(v):
     return v.lower() in ("true", "t", "1")
 
 
-def infer_args():
-    parser = argparse.ArgumentParser()
+# infer_args 的默认值, ONNXPaddleOcr 直接读取, 不需要构建 argparse 解析器
+DEFAULT_ARGS = {
     # params for prediction engine
-    parser.add_argument("--use_gpu", type=str2bool, default=True)
-    parser.add_argument("--use_xpu", type=str2bool, default=False)
-    parser.add_argument("--use_npu", type=str2bool, default=False)
-    parser.add_argument("--ir_optim", type=str2bool, default=True)
-    parser.add_argument("--use_tensorrt", type=str2bool, default=False)
-    parser.add_argument("--min_subgraph_size", type=int, default=15)
-    parser.add_argument("--precision", type=str, default="fp32")
-    parser.add_argument("--gpu_mem", type=int, default=500)
-    parser.add_argument("--gpu_id", type=int, default=0)
+    "use_gpu": True,
+    "use_xpu": False,
+    "use_npu": False,
+    "ir_optim": True,
+    "use_tensorrt": False,
+    "min_subgraph_size": 15,
+    "precision": "fp32",
+    "gpu_mem": 500,
+    "gpu_id": 0,
 
     # params for text detector
-    parser.add_argument("--image_dir", type=str)
-    parser.add_argument("--page_num", type=int, default=0)
-    parser.add_argument("--det_algorithm", type=str, default="DB")
-    parser.add_argument(
-        "--det_model_dir",
-        type=str,
-        default=str(module_dir / "models/ppocrv5/det/det.onnx"),
-    )
-    parser.add_argument("--det_limit_side_len", type=float, default=960)
-    parser.add_argument("--det_limit_type", type=str, default="max")
-    parser.add_argument("--det_box_type", type=str, default="quad")
+    "image_dir": None,
+    "page_num": 0,
+    "det_algorithm": "DB",
+    "det_model_dir": str(module_dir / "models/ppocrv5/det/det.onnx"),
+    "det_limit_side_len": 960,
+    "det_limit_type": "max",
+    # det_limit_type 为 adaptive 时: 文字缩放后的最小高度, 以及长边上限
+    "det_min_text_height": 16,
+    "det_max_side_len": 2560,
+    "det_box_type": "quad",
+    # 固定尺寸的检测画布, 形如 "640x640,960x960,960x1728" (高x宽, 32 的倍数)
+    "det_buckets": None,
+    # 分块检测: 长边超过 det_tile_size 时切成重叠 det_tile_overlap 的块, 0 为关闭
+    "det_tile_size": 0,
+    "det_tile_overlap": 128,
 
     # DB parmas
-    parser.add_argument("--det_db_thresh", type=float, default=0.3)
-    parser.add_argument("--det_db_box_thresh", type=float, default=0.6)
-    parser.add_argument("--det_db_unclip_ratio", type=float, default=1.5)
-    parser.add_argument("--max_batch_size", type=int, default=10)
-    parser.add_argument("--use_dilation", type=str2bool, default=False)
-    parser.add_argument("--det_db_score_mode", type=str, default="fast")
+    "det_db_thresh": 0.3,
+    "det_db_box_thresh": 0.6,
+    "det_db_unclip_ratio": 1.5,
+    "max_batch_size": 10,
+    "use_dilation": False,
+    "det_db_score_mode": "fast",
 
     # EAST parmas
-    parser.add_argument("--det_east_score_thresh", type=float, default=0.8)
-    parser.add_argument("--det_east_cover_thresh", type=float, default=0.1)
-    parser.add_argument("--det_east_nms_thresh", type=float, default=0.2)
+    "det_east_score_thresh": 0.8,
+    "det_east_cover_thresh": 0.1,
+    "det_east_nms_thresh": 0.2,
 
     # SAST parmas
-    parser.add_argument("--det_sast_score_thresh", type=float, default=0.5)
-    parser.add_argument("--det_sast_nms_thresh", type=float, default=0.2)
+    "det_sast_score_thresh": 0.5,
+    "det_sast_nms_thresh": 0.2,
 
     # PSE parmas
-    parser.add_argument("--det_pse_thresh", type=float, default=0)
-    parser.add_argument("--det_pse_box_thresh", type=float, default=0.85)
-    parser.add_argument("--det_pse_min_area", type=float, default=16)
-    parser.add_argument("--det_pse_scale", type=int, default=1)
+    "det_pse_thresh": 0,
+    "det_pse_box_thresh": 0.85,
+    "det_pse_min_area": 16,
+    "det_pse_scale": 1,
 
     # FCE parmas
-    parser.add_argument("--scales", type=list, default=[8, 16, 32])
-    parser.add_argument("--alpha", type=float, default=1.0)
-    parser.add_argument("--beta", type=float, default=1.0)
-    parser.add_argument("--fourier_degree", type=int, default=5)
+    "scales": [8, 16, 32],
+    "alpha": 1.0,
+    "beta": 1.0,
+    "fourier_degree": 5,
 
     # params for text recognizer
-    parser.add_argument("--rec_algorithm", type=str, default="SVTR_LCNet")
-    parser.add_argument(
-        "--rec_model_dir",
-        type=str,
-        default=str(module_dir / "models/ppocrv5/rec/rec.onnx"),
-    )
-    parser.add_argument("--rec_image_inverse", type=str2bool, default=True)
-    parser.add_argument("--rec_image_shape", type=str, default="3, 48, 320")
-    parser.add_argument("--rec_batch_num", type=int, default=6)
-    parser.add_argument("--max_text_length", type=int, default=25)
-    parser.add_argument(
-        "--rec_char_dict_path",
-        type=str,
-        default=str(module_dir / "models/ppocrv5/ppocrv5_dict.txt"),
-    )
-    parser.add_argument("--use_space_char", type=str2bool, default=True)
-    parser.add_argument(
-        "--vis_font_path", type=str, default=str(module_dir / "fonts/simfang.ttf")
-    )
-    parser.add_argument("--drop_score", type=float, default=0.5)
+    "rec_algorithm": "SVTR_LCNet",
+    "rec_model_dir": str(module_dir / "models/ppocrv5/rec/rec.onnx"),
+    "rec_image_inverse": True,
+    "rec_image_shape": "3, 48, 320",
+    "rec_batch_num": 6,
+    "max_text_length": 25,
+    "rec_char_dict_path": str(module_dir / "models/ppocrv5/ppocrv5_dict.txt"),
+    "use_space_char": True,
+    # 词表裁剪后的 rec 模型, 形如 "digits=rec_digits.onnx,alnum=rec_alnum.onnx"
+    "rec_charsets": None,
+    "vis_font_path": str(module_dir / "fonts/simfang.ttf"),
+    "drop_score": 0.5,
 
     # params for e2e
-    parser.add_argument("--e2e_algorithm", type=str, default="PGNet")
-    parser.add_argument("--e2e_model_dir", type=str)
-    parser.add_argument("--e2e_limit_side_len", type=float, default=768)
-    parser.add_argument("--e2e_limit_type", type=str, default="max")
+    "e2e_algorithm": "PGNet",
+    "e2e_model_dir": None,
+    "e2e_limit_side_len": 768,
+    "e2e_limit_type": "max",
 
     # PGNet parmas
-    parser.add_argument("--e2e_pgnet_score_thresh", type=float, default=0.5)
-    parser.add_argument(
-        "--e2e_char_dict_path",
-        type=str,
-        default=str(module_dir / "ppocr/utils/ic15_dict.txt"),
-    )
-    parser.add_argument("--e2e_pgnet_valid_set", type=str, default="totaltext")
-    parser.add_argument("--e2e_pgnet_mode", type=str, default="fast")
+    "e2e_pgnet_score_thresh": 0.5,
+    "e2e_char_dict_path": str(module_dir / "ppocr/utils/ic15_dict.txt"),
+    "e2e_pgnet_valid_set": "totaltext",
+    "e2e_pgnet_mode": "fast",
 
     # params for text classifier
-    parser.add_argument("--use_angle_cls", type=str2bool, default=False)
-    parser.add_argument(
-        "--cls_model_dir",
-        type=str,
-        default=str(module_dir / "models/ppocrv5/cls/cls.onnx"),
-    )
-    parser.add_argument("--cls_image_shape", type=str, default="3, 48, 192")
-    parser.add_argument("--label_list", type=list, default=["0", "180"])
-    parser.add_argument("--cls_batch_num", type=int, default=6)
-    parser.add_argument("--cls_thresh", type=float, default=0.9)
-
-    parser.add_argument("--enable_mkldnn", type=str2bool, default=False)
-    parser.add_argument("--cpu_threads", type=int, default=10)
-    parser.add_argument("--use_pdserving", type=str2bool, default=False)
-    parser.add_argument("--warmup", type=str2bool, default=False)
+    "use_angle_cls": False,
+    "cls_model_dir": str(module_dir / "models/ppocrv5/cls/cls.onnx"),
+    "cls_image_shape": "3, 48, 192",
+    "label_list": ["0", "180"],
+    "cls_batch_num": 6,
+    "cls_thresh": 0.9,
+    # 宽高比小于 cls_min_aspect 的文本不做方向分类
+    "cls_min_aspect": 0,
+    # 前 cls_prior_frames 次调用都没有旋转文本时, 之后每 cls_recheck_interval 次调用才分类一次
+    "cls_prior_frames": 0,
+    "cls_recheck_interval": 30,
+
+    "enable_mkldnn": False,
+    # ORT intra-op 线程数, 0 为 ORT 默认 (所有核心)
+    "cpu_threads": 0,
+    # 相同模型和参数的引擎共用 ORT 会话 (见 predict_base.SessionRegistry)
+    "share_sessions": True,
+    "use_pdserving": False,
+    "warmup": False,
 
     # SR parmas
-    parser.add_argument("--sr_model_dir", type=str)
-    parser.add_argument("--sr_image_shape", type=str, default="3, 32, 128")
-    parser.add_argument("--sr_batch_num", type=int, default=1)
+    "sr_model_dir": None,
+    "sr_image_shape": "3, 32, 128",
+    "sr_batch_num": 1,
 
-    #
-    parser.add_argument(
-        "--draw_img_save_dir", type=str, default=str(module_dir / "inference_results")
-    )
-    parser.add_argument("--save_crop_res", type=str2bool, default=False)
-    parser.add_argument(
-        "--crop_res_save_dir", type=str, default=str(module_dir / "output")
-    )
+    "draw_img_save_dir": str(module_dir / "inference_results"),
+    "save_crop_res": False,
+    "crop_res_save_dir": str(module_dir / "output"),
 
     # multi-process
-    parser.add_argument("--use_mp", type=str2bool, default=False)
-    parser.add_argument("--total_process_num", type=int, default=1)
-    parser.add_argument("--process_id", type=int, default=0)
+    "use_mp": False,
+    "total_process_num": 1,
+    "process_id": 0,
 
-    parser.add_argument("--benchmark", type=str2bool, default=False)
-    parser.add_argument(
-        "--save_log_path", type=str, default=str(module_dir / "log_output/")
-    )
+    "benchmark": False,
+    "save_log_path": str(module_dir / "log_output/"),
+
+    "show_log": True,
+    "use_onnx": False,
+}
+
+
+def default_args():
+    """
+    copy of DEFAULT_ARGS (list defaults are copied too), the defaults of
+    infer_args
+    """
+    return {k: list(v) if isinstance(v, list) else v for k, v in DEFAULT_ARGS.items()}
+
+
+def infer_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--use_gpu", type=str2bool)
+    parser.add_argument("--use_xpu", type=str2bool)
+    parser.add_argument("--use_npu", type=str2bool)
+    parser.add_argument("--ir_optim", type=str2bool)
+    parser.add_argument("--use_tensorrt", type=str2bool)
+    parser.add_argument("--min_subgraph_size", type=int)
+    parser.add_argument("--precision", type=str)
+    parser.add_argument("--gpu_mem", type=int)
+    parser.add_argument("--gpu_id", type=int)
+
+    parser.add_argument("--image_dir", type=str)
+    parser.add_argument("--page_num", type=int)
+    parser.add_argument("--det_algorithm", type=str)
+    parser.add_argument("--det_model_dir", type=str)
+    parser.add_argument("--det_limit_side_len", type=float)
+    parser.add_argument("--det_limit_type", type=str)
+    parser.add_argument("--det_min_text_height", type=float)
+    parser.add_argument("--det_max_side_len", type=float)
+    parser.add_argument("--det_box_type", type=str)
+    parser.add_argument("--det_buckets", type=str)
+    parser.add_argument("--det_tile_size", type=int)
+    parser.add_argument("--det_tile_overlap", type=int)
+
+    parser.add_argument("--det_db_thresh", type=float)
+    parser.add_argument("--det_db_box_thresh", type=float)
+    parser.add_argument("--det_db_unclip_ratio", type=float)
+    parser.add_argument("--max_batch_size", type=int)
+    parser.add_argument("--use_dilation", type=str2bool)
+    parser.add_argument("--det_db_score_mode", type=str)
+
+    parser.add_argument("--det_east_score_thresh", type=float)
+    parser.add_argument("--det_east_cover_thresh", type=float)
+    parser.add_argument("--det_east_nms_thresh", type=float)
+
+    parser.add_argument("--det_sast_score_thresh", type=float)
+    parser.add_argument("--det_sast_nms_thresh", type=float)
+
+    parser.add_argument("--det_pse_thresh", type=float)
+    parser.add_argument("--det_pse_box_thresh", type=float)
+    parser.add_argument("--det_pse_min_area", type=float)
+    parser.add_argument("--det_pse_scale", type=int)
+
+    parser.add_argument("--scales", type=list)
+    parser.add_argument("--alpha", type=float)
+    parser.add_argument("--beta", type=float)
+    parser.add_argument("--fourier_degree", type=int)
+
+    parser.add_argument("--rec_algorithm", type=str)
+    parser.add_argument("--rec_model_dir", type=str)
+    parser.add_argument("--rec_image_inverse", type=str2bool)
+    parser.add_argument("--rec_image_shape", type=str)
+    parser.add_argument("--rec_batch_num", type=int)
+    parser.add_argument("--max_text_length", type=int)
+    parser.add_argument("--rec_char_dict_path", type=str)
+    parser.add_argument("--use_space_char", type=str2bool)
+    parser.add_argument("--rec_charsets", type=str)
+    parser.add_argument("--vis_font_path", type=str)
+    parser.add_argument("--drop_score", type=float)
+
+    parser.add_argument("--e2e_algorithm", type=str)
+    parser.add_argument("--e2e_model_dir", type=str)
+    parser.add_argument("--e2e_limit_side_len", type=float)
+    parser.add_argument("--e2e_limit_type", type=str)
+
+    parser.add_argument("--e2e_pgnet_score_thresh", type=float)
+    parser.add_argument("--e2e_char_dict_path", type=str)
+    parser.add_argument("--e2e_pgnet_valid_set", type=str)
+    parser.add_argument("--e2e_pgnet_mode", type=str)
+
+    parser.add_argument("--use_angle_cls", type=str2bool)
+    parser.add_argument("--cls_model_dir", type=str)
+    parser.add_argument("--cls_image_shape", type=str)
+    parser.add_argument("--label_list", type=list)
+    parser.add_argument("--cls_batch_num", type=int)
+    parser.add_argument("--cls_thresh", type=float)
+    parser.add_argument("--cls_min_aspect", type=float)
+    parser.add_argument("--cls_prior_frames", type=int)
+    parser.add_argument("--cls_recheck_interval", type=int)
+
+    parser.add_argument("--enable_mkldnn", type=str2bool)
+    parser.add_argument("--cpu_threads", type=int)
+    parser.add_argument("--share_sessions", type=str2bool)
+    parser.add_argument("--use_pdserving", type=str2bool)
+    parser.add_argument("--warmup", type=str2bool)
+
+    parser.add_argument("--sr_model_dir", type=str)
+    parser.add_argument("--sr_image_shape", type=str)
+    parser.add_argument("--sr_batch_num", type=int)
+
+    parser.add_argument("--draw_img_save_dir", type=str)
+    parser.add_argument("--save_crop_res", type=str2bool)
+    parser.add_argument("--crop_res_save_dir", type=str)
+
+    parser.add_argument("--use_mp", type=str2bool)
+    parser.add_argument("--total_process_num", type=int)
+    parser.add_argument("--process_id", type=int)
+
+    parser.add_argument("--benchmark", type=str2bool)
+    parser.add_argument("--save_log_path", type=str)
 
-    parser.add_argument("--show_log", type=str2bool, default=True)
-    parser.add_argument("--use_onnx", type=str2bool, default=False)
+    parser.add_argument("--show_log", type=str2bool)
+    parser.add_argument("--use_onnx", type=str2bool)
+    parser.set_defaults(**default_args())
     return parser
@@ -0,0 +1,172 @@
+"""
+进程外 OCR worker (out-of-process OCR worker)
+
+The engine runs in a child process so that ORT threads do not compete with
+the caller's input timing. Frames are copied into a multiprocessing
+shared_memory ring of fixed-size slots and only a small descriptor
+(request id, slot, shape, dtype) goes over the control pipe; the slot is
+reused once the result is back.
+
+    worker = OCRWorker(engine_kwargs=dict(use_gpu=False))
+    future = worker.submit(img)           # never blocks on inference
+    result = future.result()              # same layout as ONNXPaddleOcr.ocr(img)
+    worker.close()
+"""
+import atexit
+import collections
+import concurrent.futures
+import multiprocessing
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def worker_main(shm_name, slot_size, conn, engine_kwargs):
+    from .onnx_paddleocr import ONNXPaddleOcr
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        engine = ONNXPaddleOcr(**engine_kwargs)
+        conn.send(("ready", None, None))
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            req_id, slot, shape, dtype, method, kwargs = message
+            start = time.perf_counter()
+            try:
+                # 直接在共享内存上构造数组, 不做拷贝
+                img = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=slot * slot_size)
+                result = getattr(engine, method)(img, **kwargs)
+                del img
+                conn.send((req_id, result, time.perf_counter() - start))
+            except Exception as e:
+                conn.send((req_id, e, time.perf_counter() - start))
+    except Exception as e:
+        conn.send(("error", e, None))
+    finally:
+        shm.close()
+
+
+class OCRWorker(object):
+    def __init__(self, engine_kwargs=None, slots=8, slot_size=1920 * 1080 * 3, start_timeout=120):
+        self.slots = slots
+        self.slot_size = slot_size
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_size)
+        self.free_slots = collections.deque(range(slots))
+        # 没有空闲槽位时先排队, 由接收线程在槽位释放后发送
+        self.pending = collections.deque()
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.next_id = 0
+        self.compute_time = 0.0
+        self.completed = 0
+        self.closed = False
+
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=worker_main,
+            args=(self.shm.name, slot_size, child_conn, engine_kwargs or {}),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        if not self.conn.poll(start_timeout):
+            self.close()
+            raise RuntimeError("ocr worker did not start in {}s".format(start_timeout))
+        status, error, _ = self.conn.recv()
+        if status != "ready":
+            self.close()
+            raise RuntimeError("ocr worker failed to start: {}".format(error))
+
+        self.receiver = threading.Thread(target=self.receive, name="ocr-worker-recv", daemon=True)
+        self.receiver.start()
+        # 进程退出时回收 worker 和共享内存
+        atexit.register(self.close)
+
+    def submit(self, img, method="ocr", **kwargs):
+        """
+        queue img for engine.<method>(img, **kwargs) in the worker process
+        return: concurrent.futures.Future of the result
+        """
+        img = np.ascontiguousarray(img)
+        if img.nbytes > self.slot_size:
+            raise ValueError(
+                "frame of {} bytes does not fit a {} byte slot".format(img.nbytes, self.slot_size)
+            )
+        future = concurrent.futures.Future()
+        with self.lock:
+            req_id = self.next_id
+            self.next_id += 1
+            if self.free_slots:
+                self.send(req_id, self.free_slots.popleft(), img, method, kwargs, future)
+            else:
+                # 复制一份, 调用方可以立即复用自己的缓冲
+                self.pending.append((req_id, img.copy(), method, kwargs, future))
+        return future
+
+    def send(self, req_id, slot, img, method, kwargs, future):
+        offset = slot * self.slot_size
+        view = np.ndarray(img.shape, dtype=img.dtype, buffer=self.shm.buf, offset=offset)
+        view[...] = img
+        del view
+        self.inflight[req_id] = (slot, future)
+        self.conn.send((req_id, slot, img.shape, img.dtype.str, method, kwargs))
+
+    def receive(self):
+        error = RuntimeError("ocr worker exited")
+        while True:
+            try:
+                req_id, result, elapsed = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            with self.lock:
+                entry = self.inflight.pop(req_id, None)
+                if entry is None:
+                    # worker_main 的外层异常 ("error", e, None) 或未知请求, worker 已不可用
+                    error = result if isinstance(result, Exception) else RuntimeError(
+                        "ocr worker sent an unknown request id: {!r}".format(req_id)
+                    )
+                    break
+                slot, future = entry
+                if elapsed is not None:
+                    self.compute_time += elapsed
+                    self.completed += 1
+                if self.pending:
+                    req, img, method, kwargs, next_future = self.pending.popleft()
+                    self.send(req, slot, img, method, kwargs, next_future)
+                else:
+                    self.free_slots.append(slot)
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        # worker 退出后让等待中的调用方失败
+        with self.lock:
+            futures = [future for _, future in self.inflight.values()]
+            futures += [item[-1] for item in self.pending]
+            self.inflight.clear()
+            self.pending.clear()
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        # 取消 atexit 注册, 关闭后的 worker 可以被回收
+        atexit.unregister(self.close)
+        try:
+            if self.process.is_alive():
+                self.conn.send(None)
+                self.process.join(5)
+            if self.process.is_alive():
+                self.process.terminate()
+        finally:
+            self.conn.close()
+            self.shm.close()
+            self.shm.unlink()
@@ -0,0 +1,339 @@
+"""
+常驻引擎进程 (pre-forked engine zygote)
+
+A resident process imports cv2 / onnxruntime / pyclipper and loads
+the models once. Short macro scripts are then launched through it instead of
+paying for imports and session creation every time:
+
+    python -m onnxocr.zygote serve --use_gpu false
+    python -m onnxocr.zygote run my_macro.py arg1 arg2
+
+On POSIX the zygote forks and runs the script in the child, with the
+client's stdin/stdout/stderr, cwd, environment and argv; the child inherits
+the warm sessions copy-on-write. On Windows (no fork) the script runs in the
+client process and attaches to the zygote, whose engine then serves its calls
+over a named pipe.
+
+In the script:
+
+    from onnxocr.zygote import get_engine
+    engine = get_engine(use_angle_cls=False, use_gpu=False)
+    engine.ocr(img)
+
+get_engine returns the inherited engine, an attached proxy, or a freshly
+loaded ONNXPaddleOcr when no zygote is running, so the script also works
+when started with plain python.
+"""
+import argparse
+import functools
+import getpass
+import os
+import runpy
+import signal
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from multiprocessing.connection import Client, Listener
+
+ENV_ADDRESS = "ONNXOCR_ZYGOTE"
+SERVE_KEYS = ["address", "preload"]
+
+# 本进程中已加载的引擎, fork 出的子进程继承这些引擎
+_engines = {}
+
+
+def default_address():
+    if sys.platform == "win32":
+        return r"\\.\pipe\onnxocr-zygote-" + getpass.getuser()
+    return os.path.join(tempfile.gettempdir(), "onnxocr-zygote-{}.sock".format(os.getuid()))
+
+
+def engine_key(kwargs):
+    """kwargs that differ from the infer_args defaults, as a hashable key"""
+    from .utils import default_args
+
+    defaults = default_args()
+    return tuple(sorted((k, repr(v)) for k, v in kwargs.items() if v != defaults.get(k)))
+
+
+def load_engine(kwargs):
+    from .onnx_paddleocr import ONNXPaddleOcr
+
+    key = engine_key(kwargs)
+    if key not in _engines:
+        _engines[key] = ONNXPaddleOcr(**kwargs)
+    return _engines[key]
+
+
+class EngineProxy(object):
+    """
+    engine living in the zygote; method calls are forwarded over the
+    connection, so arguments and results must be picklable (ocr, ocr_batch,
+    ocr_many, find_text, has_text; not the generator methods)
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.lock = threading.Lock()
+
+    def call(self, method, *args, **kwargs):
+        with self.lock:
+            self.conn.send((method, args, kwargs))
+            status, value = self.conn.recv()
+        if status == "error":
+            raise value
+        return value
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return functools.partial(self.call, name)
+
+    def close(self):
+        self.conn.close()
+
+
+def attach(address, kwargs):
+    conn = Client(address)
+    conn.send(("attach", kwargs))
+    status, value = conn.recv()
+    if status == "error":
+        conn.close()
+        raise value
+    return EngineProxy(conn)
+
+
+def get_engine(**kwargs):
+    """
+    ONNXPaddleOcr(**kwargs), taken from the zygote when the script was
+    launched through one
+    """
+    if _engines:
+        key = engine_key(kwargs)
+        if key in _engines:
+            return _engines[key]
+    address = os.environ.get(ENV_ADDRESS)
+    if address:
+        try:
+            return attach(address, kwargs)
+        except OSError:
+            # zygote 未运行, 在本进程加载
+            pass
+    return load_engine(kwargs)
+
+
+def warmup(engine):
+    import numpy as np
+
+    # 首次推理会分配缓冲, 提前跑一次
+    img = np.full((64, 320, 3), 255, dtype=np.uint8)
+    img[20:44, 16:300] = 0
+    engine.text_detector(img)
+    engine.text_recognizer([img[:48]])
+
+
+class Zygote(object):
+    def __init__(self, engine_kwargs=None, address=None, preload=()):
+        self.address = address or default_address()
+        # 串行化引擎调用, fork 时不能有线程正在推理
+        self.lock = threading.Lock()
+        for name in preload:
+            __import__(name)
+        warmup(load_engine(engine_kwargs or {}))
+
+    def serve(self):
+        if sys.platform != "win32" and os.path.exists(self.address):
+            os.unlink(self.address)
+        listener = Listener(self.address)
+        if sys.platform != "win32":
+            os.chmod(self.address, 0o600)
+            # 子进程退出后自动回收
+            signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        print("ocr zygote listening on", self.address, flush=True)
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                    kind, *payload = conn.recv()
+                except (OSError, EOFError):
+                    continue
+                if kind == "attach":
+                    threading.Thread(
+                        target=self.serve_attached, args=(conn, payload[0]), daemon=True
+                    ).start()
+                elif kind == "fork" and hasattr(os, "fork"):
+                    self.fork(conn, listener, *payload)
+                else:
+                    conn.send(("error", RuntimeError("unsupported request: {}".format(kind))))
+                    conn.close()
+        finally:
+            listener.close()
+
+    def serve_attached(self, conn, kwargs):
+        try:
+            with self.lock:
+                engine = load_engine(kwargs)
+            conn.send(("ready", None))
+            while True:
+                method, args, call_kwargs = conn.recv()
+                try:
+                    with self.lock:
+                        result = getattr(engine, method)(*args, **call_kwargs)
+                    conn.send(("ok", result))
+                except Exception as e:
+                    conn.send(("error", e))
+        except (EOFError, OSError):
+            pass
+        except Exception as e:
+            conn.send(("error", e))
+        finally:
+            conn.close()
+
+    def fork(self, conn, listener, argv, cwd, env):
+        from multiprocessing.reduction import recv_handle
+
+        fds = [recv_handle(conn) for _ in range(3)]
+        sys.stdout.flush()
+        sys.stderr.flush()
+        with self.lock:
+            pid = os.fork()
+        if pid:
+            for fd in fds:
+                os.close(fd)
+            conn.close()
+            return
+        listener.close()
+        run_child(conn, fds, argv, cwd, env)
+
+
+def run_child(conn, fds, argv, cwd, env):
+    """run the script in the forked child, never returns"""
+    code = 1
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        sys.stdin = open(0, "r", closefd=False)
+        sys.stdout = open(1, "w", buffering=1, closefd=False)
+        sys.stderr = open(2, "w", buffering=1, closefd=False)
+        os.chdir(cwd)
+        os.environ.clear()
+        os.environ.update(env)
+        sys.argv = list(argv)
+        sys.path.insert(0, os.path.dirname(os.path.abspath(argv[0])))
+        conn.send(("pid", os.getpid()))
+        code = run_script(argv)
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            conn.send(("exit", code))
+        finally:
+            os._exit(code)
+
+
+def run_script(argv):
+    """run argv[0] as __main__, return: exit code"""
+    try:
+        runpy.run_path(argv[0], run_name="__main__")
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except BaseException:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def launch(argv, address=None, force_attach=False):
+    """
+    run the script argv[0] through the zygote at address
+    return: exit code of the script
+    """
+    address = address or default_address()
+    if hasattr(os, "fork") and not force_attach:
+        from multiprocessing.reduction import send_handle
+
+        conn = Client(address)
+        conn.send(("fork", argv, os.getcwd(), dict(os.environ)))
+        for fd in (0, 1, 2):
+            send_handle(conn, fd, None)
+        pid = None
+        while True:
+            try:
+                kind, value = conn.recv()
+            except KeyboardInterrupt:
+                # Ctrl-C 只发给了本进程, 转发给脚本
+                if pid is None:
+                    raise
+                os.kill(pid, signal.SIGINT)
+                continue
+            except EOFError:
+                return 1
+            if kind == "pid":
+                pid = value
+            elif kind == "exit":
+                return value
+            elif kind == "error":
+                raise value
+
+    # 没有 fork 时脚本在本进程运行, get_engine 连接到 zygote
+    os.environ[ENV_ADDRESS] = address
+    sys.argv = list(argv)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(argv[0])))
+    return run_script(argv)
+
+
+def build_serve_parser():
+    from .utils import infer_args
+
+    parser = infer_args()
+    parser.prog = "python -m onnxocr.zygote serve"
+    parser.add_argument("--address", type=str, default=None,
+                        help="unix socket path or windows pipe name of the zygote")
+    parser.add_argument("--preload", type=str, default="",
+                        help="comma separated modules imported before forking, e.g. dxcam,pydirectinput")
+    return parser
+
+
+def build_run_parser():
+    parser = argparse.ArgumentParser(prog="python -m onnxocr.zygote run")
+    parser.add_argument("--address", type=str, default=None)
+    parser.add_argument("--attach", action="store_true",
+                        help="run the script in this process and attach to the zygote engine")
+    parser.add_argument("script")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["serve"]:
+        parser = build_serve_parser()
+        args = parser.parse_args(argv[1:])
+        engine_kwargs = {
+            k: v for k, v in vars(args).items()
+            if k not in SERVE_KEYS and v != parser.get_default(k)
+        }
+        start = time.perf_counter()
+        zygote = Zygote(engine_kwargs, args.address, [m for m in args.preload.split(",") if m])
+        print("ocr zygote ready in {:.2f}s".format(time.perf_counter() - start), flush=True)
+        try:
+            zygote.serve()
+        except KeyboardInterrupt:
+            pass
+    elif argv[:1] == ["run"]:
+        args = build_run_parser().parse_args(argv[1:])
+        sys.exit(launch([args.script] + args.args, args.address, args.attach))
+    else:
+        raise SystemExit("usage: python -m onnxocr.zygote {serve,run} ...")
+
+
+if __name__ == "__main__":
+    main()